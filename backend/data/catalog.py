@@ -0,0 +1,144 @@
+# ============== LESSON CATALOG ==============
+# In-memory view of the seed lessons merged with the custom lessons/methods
+# stored in MongoDB. The seed part is indexed once at startup; the custom
+# part is layered on top of it whenever the custom catalog changes. The
+# catalog is shared read-only between requests.
+
+# Custom lessons get per-session IDs above this offset so they never collide
+# with seed lesson IDs (seed sessions have at most a few hundred lessons).
+CUSTOM_LESSON_ID_OFFSET = 10000
+
+
+def custom_method_entry(cm: dict) -> dict:
+    """Public representation of a custom method document"""
+    return {
+        "id": str(cm["_id"]),
+        "name": cm["name"],
+        "author": cm["author"],
+        "category": cm.get("category", ""),
+        "session_type": cm.get("session_type", ""),
+        "is_seed": False,
+        "is_custom": True,
+    }
+
+
+def custom_lesson_entry(cl: dict) -> dict:
+    """Public representation of a custom lesson document inside a session list"""
+    return {
+        "id": cl["lesson_id"],
+        "title": cl["title"],
+        "method_id": cl.get("custom_method_id"),
+        "subtitle": cl.get("subtitle", ""),
+        "instruction": cl.get("instruction", ""),
+        "level": cl.get("level", ""),
+        "tags": cl.get("tags", []),
+        "is_custom": True,
+        "custom_lesson_id": str(cl["_id"]),
+        "custom_method_id": cl.get("custom_method_id"),
+    }
+
+
+def custom_method_lesson_entry(cl: dict) -> dict:
+    """Representation of a custom lesson in its method's lesson list"""
+    return {
+        "id": str(cl["_id"]),
+        "lesson_id": cl.get("lesson_id"),
+        "title": cl["title"],
+        "subtitle": cl.get("subtitle", ""),
+        "instruction": cl.get("instruction", ""),
+        "level": cl.get("level", ""),
+        "tags": cl.get("tags", []),
+        "order": cl.get("order", 0),
+        "is_seed": False,
+        "is_custom": True,
+        "session_type": cl.get("session_type", ""),
+    }
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+class LessonCatalog:
+    """Lessons organized by session, with indexes by ID, method and tag.
+
+    - lessons: session_type -> lessons as stored (seed records / custom entries)
+    - views: session_type -> lessons with method name/author joined in
+    - by_id: (session_type, lesson_id) -> view
+    - by_tag: (session_type, tag) -> views carrying that tag
+    - method_lessons: method_id -> lessons of that method (method listing shape)
+    - methods_by_id: method_id -> method
+    - custom: (session_type, lesson_id) -> view, for custom lessons only
+    """
+
+    def __init__(self, seed_lessons: dict, seed_methods: list):
+        self.methods = [dict(m, is_seed=True) for m in seed_methods]
+        self.methods_by_id = {m["id"]: m for m in self.methods}
+        self.lessons = {session_type: list(lessons) for session_type, lessons in seed_lessons.items()}
+        self.views = {session_type: [] for session_type in self.lessons}
+        self.by_id = {}
+        self.by_tag = {}
+        self.method_lessons = {m["id"]: [] for m in self.methods}
+        self.custom = {}
+
+        for session_type, lessons in self.lessons.items():
+            for lesson in lessons:
+                self._index(session_type, lesson)
+                if lesson.method_id in self.method_lessons:
+                    self.method_lessons[lesson.method_id].append(
+                        dict(lesson.as_dict(), is_seed=True, session_type=session_type)
+                    )
+
+    def with_custom(self, custom_lessons: list, custom_methods: list) -> "LessonCatalog":
+        """New catalog sharing this one's entries, extended with custom methods/lessons"""
+        catalog = object.__new__(LessonCatalog)
+        catalog.methods = self.methods + [custom_method_entry(cm) for cm in custom_methods]
+        catalog.methods_by_id = {m["id"]: m for m in catalog.methods}
+        catalog.lessons = {k: list(v) for k, v in self.lessons.items()}
+        catalog.views = {k: list(v) for k, v in self.views.items()}
+        catalog.by_id = dict(self.by_id)
+        catalog.by_tag = {k: list(v) for k, v in self.by_tag.items()}
+        catalog.method_lessons = {k: list(v) for k, v in self.method_lessons.items()}
+        catalog.custom = {}
+        for cm in custom_methods:
+            catalog.method_lessons[str(cm["_id"])] = []
+
+        for cl in custom_lessons:
+            session_type = cl.get("session_type")
+            if session_type in catalog.lessons and "lesson_id" in cl:
+                lesson = custom_lesson_entry(cl)
+                catalog.lessons[session_type].append(lesson)
+                catalog.custom[(session_type, lesson["id"])] = catalog._index(session_type, lesson)
+            method_id = cl.get("custom_method_id")
+            if method_id in catalog.method_lessons:
+                catalog.method_lessons[method_id].append(custom_method_lesson_entry(cl))
+        return catalog
+
+    def _index(self, session_type: str, lesson) -> dict:
+        view = self.with_method_info(lesson)
+        self.views[session_type].append(view)
+        self.by_id[(session_type, view["id"])] = view
+        for tag in {normalize_tag(t) for t in view.get("tags") or ()}:
+            self.by_tag.setdefault((session_type, tag), []).append(view)
+        return view
+
+    @property
+    def total_lessons(self) -> int:
+        return sum(len(lessons) for lessons in self.lessons.values())
+
+    def get_lesson(self, session_type: str, lesson_id: int):
+        """Resolve a lesson (with method info) by session and ID, or None"""
+        return self.by_id.get((session_type, lesson_id))
+
+    def lessons_with_tag(self, session_type: str, tag: str) -> list:
+        return self.by_tag.get((session_type, normalize_tag(tag)), [])
+
+    def with_method_info(self, lesson) -> dict:
+        """Copy of the lesson (seed record or custom dict) with the method name/author joined in"""
+        lesson_copy = dict(lesson) if isinstance(lesson, dict) else lesson.as_dict()
+        method_id = lesson_copy.get("method_id") or lesson_copy.get("custom_method_id")
+        method = self.methods_by_id.get(method_id) if method_id else None
+        if method:
+            lesson_copy["method"] = method["name"]
+            lesson_copy["method_author"] = method["author"]
+        return lesson_copy
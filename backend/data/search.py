@@ -0,0 +1,154 @@
+# ============== LESSON SEARCH ==============
+# In-process inverted index over lesson titles, subtitles, instructions, tags
+# and method names. Tokens are lower-cased and accent-folded, so "Ševčík"
+# matches "sevcik" and "détaché" matches "detache".
+
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+# Relative weight of a query term found in each lesson field
+FIELD_WEIGHTS = {
+    "title": 4,
+    "tags": 3,
+    "method": 2,
+    "subtitle": 1,
+    "method_author": 1,
+    "instruction": 1,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _strip_marks(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+# Accented Latin letters map to their base letter and combining marks are
+# dropped, all in a single str.translate. Text still non-ASCII after that
+# (ligatures, fullwidth forms, Vietnamese letters...) goes through the full
+# NFKD fold; what remains is treated as separators by the tokenizer.
+_FOLD_TABLE = {
+    cp: _strip_marks(chr(cp)) for cp in range(0xAA, 0x250) if _strip_marks(chr(cp)).isascii()
+}
+_FOLD_TABLE.update({cp: None for cp in range(0x300, 0x370)})
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip diacritics"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = text.translate(_FOLD_TABLE)
+    return text if text.isascii() else _strip_marks(text)
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(fold(text))
+
+
+@lru_cache(maxsize=512)
+def _field_tokens(text: str) -> frozenset:
+    # Subtitles, tags and method names repeat across many lessons
+    return frozenset(tokenize(text))
+
+
+class LessonSearchIndex:
+    """Inverted index of lesson views keyed by (session_type, lesson_id)"""
+
+    def __init__(self):
+        self._postings = {}  # token -> {key: weight}
+        self._docs = {}  # key -> lesson view
+        self._doc_tokens = {}  # key -> tokens, for removal
+        self._order = {}  # key -> insertion rank, for stable tie-breaking
+        self._vocabulary = None  # sorted tokens, rebuilt lazily for prefix queries
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, key: tuple, lesson: dict):
+        if key in self._docs:
+            self.remove(key)
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = lesson.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+            tokens = set(tokenize(text)) if field == "instruction" else _field_tokens(text)
+            for token in tokens:
+                weights[token] = weights.get(token, 0) + weight
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary = None
+            postings[key] = weight
+        self._docs[key] = lesson
+        self._doc_tokens[key] = tuple(weights)
+        self._order.setdefault(key, len(self._order))
+
+    def remove(self, key: tuple):
+        if key not in self._docs:
+            return
+        for token in self._doc_tokens.pop(key):
+            postings = self._postings[token]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+        del self._docs[key]
+
+    def sync(self, lessons: dict, keep=lambda key: False):
+        """Make the index hold exactly `lessons` ({key: view}) plus keys for which keep(key) is true.
+
+        Only entries that were added, removed or changed are re-indexed.
+        """
+        for key in [k for k in self._docs if k not in lessons and not keep(k)]:
+            self.remove(key)
+        for key, lesson in lessons.items():
+            if self._docs.get(key) != lesson:
+                self.add(key, lesson)
+
+    def _prefix_matches(self, prefix: str) -> dict:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        matches = {}
+        i = bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            for key, weight in self._postings[self._vocabulary[i]].items():
+                if weight > matches.get(key, 0):
+                    matches[key] = weight
+            i += 1
+        return matches
+
+    def search(self, query: str, session_type: str = None, limit: int = 20) -> tuple:
+        """(number of matching lessons, the best `limit` of them as (score, key, lesson)).
+
+        The last term also matches as a prefix so partial input ("spicc") works.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return 0, []
+
+        scores = None
+        for i, term in enumerate(terms):
+            if i == len(terms) - 1:
+                matches = self._prefix_matches(term)
+            else:
+                matches = self._postings.get(term, {})
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+            if not scores:
+                return 0, []
+
+        if session_type:
+            scores = {key: score for key, score in scores.items() if key[0] == session_type}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+        return len(ranked), [(score, key, self._docs[key]) for key, score in ranked[:limit]]
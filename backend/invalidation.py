@@ -0,0 +1,164 @@
+# ============== CACHE INVALIDATION BUS ==============
+# Keeps in-process caches coherent across uvicorn workers and replicas.
+# A write path invalidates its own process and publishes {topic, key} to a
+# small capped collection; every other process follows that collection and
+# runs the matching handler. Processes follow it with a change stream when
+# MongoDB runs as a replica set, and with a tailable cursor otherwise (a
+# standalone mongod), so the bus works on both.
+#
+# Topics published with `data` (live progress updates) call their handler
+# with (key, data) instead of (key). Those go through a second bus on their
+# own collection, so a burst of them can't roll invalidations out of this one.
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "cache_invalidations"
+CAPPED_SIZE_BYTES = 1 << 20
+CAPPED_MAX_DOCS = 10000
+RETRY_DELAY_SEC = 1.0
+TAIL_POLL_SEC = 0.2
+
+
+class InvalidationBus:
+    """Publishes and follows cache invalidation events through MongoDB"""
+
+    def __init__(self, get_db: Callable, handlers: Dict[str, Callable[[Optional[str]], None]], enabled: bool = True,
+                 collection: str = COLLECTION, capped_size: int = CAPPED_SIZE_BYTES, capped_max: int = CAPPED_MAX_DOCS):
+        self.get_db = get_db
+        self.handlers = handlers
+        self.collection = collection
+        self.capped_size = capped_size
+        self.capped_max = capped_max
+        self.enabled = enabled  # when False, publish() only invalidates this process
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.mode = None  # "change_stream" or "tailable" once following
+        self.received = 0
+        self.published = 0
+        self._resume_token = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is not None or not self.enabled:
+            return
+        db = self.get_db()
+        try:
+            if self.collection not in await db.list_collection_names():
+                await db.create_collection(self.collection, capped=True, size=self.capped_size, max=self.capped_max)
+        except CollectionInvalid:
+            pass  # another worker created it first
+        except Exception as e:
+            logger.warning(f"Invalidation bus could not prepare {self.collection}: {e}")
+        self._task = asyncio.get_running_loop().create_task(self._follow())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # A restart must probe change streams again (and fall back to tailing)
+        self.mode = None
+
+    async def publish(self, topic: str, key: Optional[str] = None, data: Optional[dict] = None):
+        """Invalidate `topic` (optionally one `key`) here and in every other process"""
+        self._dispatch(topic, key, data)
+        if not self.enabled:
+            return
+        event = {
+            "topic": topic,
+            "key": key,
+            "origin": self.origin,
+            "ts": datetime.utcnow(),
+        }
+        if data is not None:
+            event["data"] = data
+        try:
+            await self.get_db()[self.collection].insert_one(event)
+            self.published += 1
+        except PyMongoError as e:
+            # Other processes stay stale until their own TTLs/writes; don't fail the request
+            logger.warning(f"Could not publish {topic} invalidation: {e}")
+
+    def _dispatch(self, topic: str, key: Optional[str], data: Optional[dict] = None):
+        handler = self.handlers.get(topic)
+        if handler is None:
+            return
+        if data is None:
+            handler(key)
+        else:
+            handler(key, data)
+
+    def _receive(self, event: dict):
+        if event.get("origin") == self.origin:
+            return
+        self.received += 1
+        self._dispatch(event.get("topic"), event.get("key"), event.get("data"))
+
+    async def _follow(self):
+        use_change_stream = True
+        while True:
+            try:
+                if use_change_stream:
+                    await self._follow_change_stream()
+                else:
+                    await self._follow_tailable()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if use_change_stream and self.mode is None:
+                    # The stream could not even be opened (standalone server
+                    # without change streams): tail the capped collection
+                    logger.info(f"Invalidation bus falling back to a tailable cursor ({e})")
+                    use_change_stream = False
+                    continue
+                logger.warning(f"Invalidation bus interrupted, retrying: {e}")
+                await asyncio.sleep(RETRY_DELAY_SEC)
+
+    async def _follow_change_stream(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with self.get_db()[self.collection].watch(pipeline, resume_after=self._resume_token) as stream:
+            self.mode = "change_stream"
+            async for change in stream:
+                self._resume_token = stream.resume_token
+                self._receive(change["fullDocument"])
+
+    async def _follow_tailable(self):
+        collection = self.get_db()[self.collection]
+        # Start after the newest event so history isn't replayed
+        last = await collection.find_one({}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+        self.mode = "tailable"
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+            while cursor.alive:
+                # Each getMore waits server-side for new events, so this doesn't spin
+                async for event in cursor:
+                    last_id = event["_id"]
+                    self._receive(event)
+            # The cursor dies when the collection is empty or was rolled over
+            await asyncio.sleep(TAIL_POLL_SEC)
+
+    def snapshot(self) -> dict:
+        return {
+            "origin": self.origin,
+            "collection": self.collection,
+            "mode": self.mode,
+            "published": self.published,
+            "received": self.received,
+            "enabled": self.enabled,
+            "running": self._task is not None,
+        }
@@ -0,0 +1,288 @@
+# ============== BACKGROUND JOBS ==============
+# Heavy per-user operations (import, reset, deleting a method with its
+# lessons) run outside the request that asked for them: the endpoint stores
+# a job in the `jobs` collection and answers 202 with its id, and
+# /api/jobs/{id} reports its progress and result.
+#
+# A running job holds a lease that its process keeps renewing. Jobs left
+# behind by a restart or a crash (still queued, or running with an expired
+# lease) are claimed again at startup and by the periodic poll of any
+# worker, so handlers must be safe to run more than once. A semaphore caps
+# the jobs running per process, so they can't starve interactive requests of
+# Mongo connections.
+#
+# Large inputs (an import's backup) don't go in the job document, which is
+# bound by the 16 MB BSON limit: they are staged in job_payloads in chunks
+# and dropped when the job finishes.
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "jobs"
+PAYLOAD_COLLECTION = "job_payloads"
+PAYLOAD_CHUNK_BYTES = 4 << 20
+ACTIVE = ("queued", "running")
+
+# handler(job, report) -> result stored on the job; report(done, total, stage)
+Handler = Callable[[dict, Callable[..., Awaitable[None]]], Awaitable[Optional[dict]]]
+
+
+def job_view(job: dict) -> dict:
+    """What /api/jobs/{id} returns"""
+    return {
+        "id": job["_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job.get("progress", {}),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "attempts": job.get("attempts", 0),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+class JobRunner:
+    """Runs jobs stored in MongoDB, at most `concurrency` at a time per process"""
+
+    def __init__(self, get_db: Callable, concurrency: int = 1, lease_sec: float = 60,
+                 poll_interval_sec: float = 5, retention_sec: int = 7 * 86400, max_attempts: int = 3):
+        self.get_db = get_db
+        self.concurrency = concurrency
+        self.lease = timedelta(seconds=lease_sec)
+        self.poll_interval = poll_interval_sec
+        self.retention_sec = retention_sec
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Handler] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0  # jobs claimed from the queue or retried, rather than run where submitted
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._tasks = set()
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    @property
+    def collection(self):
+        return self.get_db()[COLLECTION]
+
+    @property
+    def payloads(self):
+        return self.get_db()[PAYLOAD_COLLECTION]
+
+    async def start(self):
+        """Create the indexes, resume interrupted jobs and start polling"""
+        if self._poll_task is not None:
+            return
+        try:
+            await self.collection.create_index([("status", 1), ("created_at", 1)])
+            await self.collection.create_index([("username", 1), ("kind", 1), ("key", 1), ("status", 1)])
+            await self.collection.create_index("finished_at", expireAfterSeconds=self.retention_sec)
+            await self.payloads.create_index([("job_id", 1), ("n", 1)], unique=True)
+            # Payloads of jobs that were never finished
+            await self.payloads.create_index("created_at", expireAfterSeconds=self.retention_sec)
+        except PyMongoError as e:
+            logger.warning(f"Job runner could not create its indexes: {e}")
+        await self._resume()
+        self._poll_task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        """Stop polling and hand unfinished jobs back to the queue"""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, kind: str, username: str, params: Optional[dict] = None, key: Optional[str] = None,
+                     payload: Optional[bytes] = None) -> dict:
+        """Queue a job; an active job of the same user, kind and key is returned instead.
+        `payload` (any size) is read back by the handler with load_payload(job)."""
+        if key is not None:
+            active = await self.collection.find_one(
+                {"username": username, "kind": kind, "key": key, "status": {"$in": list(ACTIVE)}}
+            )
+            if active is not None:
+                return active
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "key": key,
+            "username": username,
+            "params": params or {},
+            "status": "queued",
+            "progress": {"done": 0, "total": None, "stage": None},
+            "attempts": 0,
+            "created_at": datetime.utcnow(),
+        }
+        if payload is not None:
+            # Staged first: a job that can be claimed always has its payload
+            job["payload_chunks"] = await self._store_payload(job["_id"], payload, job["created_at"])
+        await self.collection.insert_one(job)
+        self._spawn(job["_id"])
+        return job
+
+    async def _store_payload(self, job_id: str, payload: bytes, created_at: datetime) -> int:
+        chunks = [payload[i:i + PAYLOAD_CHUNK_BYTES] for i in range(0, len(payload), PAYLOAD_CHUNK_BYTES)] or [b""]
+        await self.payloads.insert_many([
+            {"job_id": job_id, "n": n, "data": chunk, "created_at": created_at}
+            for n, chunk in enumerate(chunks)
+        ])
+        return len(chunks)
+
+    async def load_payload(self, job: dict) -> bytes:
+        """The payload given to submit()"""
+        chunks = await self.payloads.find({"job_id": job["_id"]}).sort("n", 1).to_list(None)
+        if len(chunks) != job.get("payload_chunks"):
+            raise RuntimeError("job payload is missing")
+        return b"".join(chunk["data"] for chunk in chunks)
+
+    async def get(self, job_id: str, username: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id, "username": username}, {"params": 0})
+
+    def _spawn(self, job_id: Optional[str] = None):
+        task = asyncio.get_running_loop().create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _claimable(self) -> dict:
+        return {"$or": [
+            {"status": "queued"},
+            {"status": "running", "lease_until": {"$lt": datetime.utcnow()}},
+        ]}
+
+    async def _claim(self, job_id: Optional[str]) -> Optional[dict]:
+        query = self._claimable()
+        if job_id is not None:
+            query["_id"] = job_id
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            query,
+            {"$set": {"status": "running", "owner": self.owner, "lease_until": now + self.lease, "started_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _run(self, job_id: Optional[str]):
+        async with self._semaphore:
+            try:
+                job = await self._claim(job_id)
+            except PyMongoError as e:
+                logger.warning(f"Could not claim a job: {e}")
+                return
+            if job is None:
+                return  # already taken by another process
+            if job_id is None or job["attempts"] > 1:
+                self.resumed += 1
+            await self._execute(job)
+
+    async def _execute(self, job: dict):
+        mine = {"_id": job["_id"], "owner": self.owner}
+        handler = self.handlers.get(job["kind"])
+        if handler is None or job["attempts"] > self.max_attempts:
+            error = "unknown job kind" if handler is None else "interrupted too many times"
+            await self._finish(mine, "failed", error=error)
+            return
+
+        async def report(done: int, total: Optional[int] = None, stage: Optional[str] = None):
+            progress = {"done": done, "total": total, "stage": stage}
+            await self.collection.update_one(
+                mine, {"$set": {"progress": progress, "lease_until": datetime.utcnow() + self.lease}}
+            )
+
+        renewal = asyncio.get_running_loop().create_task(self._renew_lease(mine))
+        self._running[job["_id"]] = renewal
+        try:
+            result = await handler(job, report)
+        except asyncio.CancelledError:
+            # Shutdown: let the next process pick it up right away
+            await asyncio.shield(self._requeue(mine))
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job['_id']} ({job['kind']}) failed")
+            await self._finish(mine, "failed", error=getattr(e, "detail", None) or str(e))
+        else:
+            await self._finish(mine, "done", result=result)
+        finally:
+            renewal.cancel()
+            self._running.pop(job["_id"], None)
+
+    async def _renew_lease(self, mine: dict):
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            try:
+                await self.collection.update_one(mine, {"$set": {"lease_until": datetime.utcnow() + self.lease}})
+            except PyMongoError as e:
+                logger.warning(f"Could not renew the lease of job {mine['_id']}: {e}")
+
+    async def _finish(self, mine: dict, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        if status == "done":
+            self.completed += 1
+        else:
+            self.failed += 1
+        update = {"status": status, "finished_at": datetime.utcnow(), "result": result, "error": error}
+        try:
+            await self.collection.update_one(mine, {"$set": update, "$unset": {"lease_until": "", "params": ""}})
+        except PyMongoError as e:
+            # The lease expires and another process runs the job again
+            logger.error(f"Could not record the outcome of job {mine['_id']}: {e}")
+            return
+        try:
+            await self.payloads.delete_many({"job_id": mine["_id"]})
+        except PyMongoError as e:
+            logger.warning(f"Could not drop the payload of job {mine['_id']}: {e}")
+
+    async def _requeue(self, mine: dict):
+        try:
+            await self.collection.update_one(mine, {"$set": {"status": "queued"}, "$unset": {"owner": "", "lease_until": ""}})
+        except PyMongoError as e:
+            logger.warning(f"Could not requeue job {mine['_id']}: {e}")
+
+    async def _resume(self):
+        """Spawn one runner per claimable job, up to the free slots"""
+        try:
+            waiting = await self.collection.count_documents(self._claimable())
+        except PyMongoError as e:
+            logger.warning(f"Could not look for pending jobs: {e}")
+            return
+        for _ in range(min(waiting, self.concurrency - len(self._running))):
+            self._spawn()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if len(self._running) < self.concurrency:
+                await self._resume()
+
+    def snapshot(self) -> dict:
+        return {
+            "owner": self.owner,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            "waiting_here": len(self._tasks) - len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "resumed": self.resumed,
+        }
@@ -0,0 +1,168 @@
+# ============== LIVE UPDATES ==============
+# In-process fan-out of per-user progress deltas to Server-Sent Events
+# streams. Writers publish through the live bus (topic "live"), which
+# dispatches here immediately and to the other workers through MongoDB.
+#
+# Open streams are registered in the live_streams collection (refreshed every
+# heartbeat, whether or not deltas flow, and dropped by a TTL index) and every
+# process polls the set of users with a stream, so writers skip deltas nobody
+# would receive. A stream opened on another worker is seen at the next poll;
+# its hello event tells the client to load the current state meanwhile.
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_COLLECTION = "live_streams"
+_CLOSE = object()
+
+
+class LiveHub:
+    """Per-user subscriber queues for SSE streams"""
+
+    def __init__(self, queue_size: int = 100, heartbeat_sec: float = 15, get_db: Optional[Callable] = None,
+                 presence_poll_sec: float = 5):
+        self.queue_size = queue_size
+        self.heartbeat_sec = heartbeat_sec
+        self.get_db = get_db  # None: only streams of this process count
+        self.presence_poll_sec = presence_poll_sec
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._watched: Set[str] = set()  # users with a stream in any process, as of the last poll
+        self._task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, username: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(username, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, username: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(username)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[username]
+
+    def wants(self, username: str) -> bool:
+        """Whether a delta for `username` could reach an open stream"""
+        return username in self._subscribers or username in self._watched
+
+    async def start(self):
+        """Create the presence TTL index and start polling it"""
+        if self.get_db is None or self._task is not None:
+            return
+        try:
+            await self.get_db()[PRESENCE_COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+        except PyMongoError as e:
+            logger.warning(f"Could not create the {PRESENCE_COLLECTION} TTL index: {e}")
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll(self):
+        while True:
+            try:
+                self._watched = set(await self.get_db()[PRESENCE_COLLECTION].distinct(
+                    "username", {"expires_at": {"$gt": datetime.utcnow()}}
+                ))
+            except PyMongoError as e:
+                logger.warning(f"Could not read the open live streams: {e}")
+            await asyncio.sleep(self.presence_poll_sec)
+
+    async def _announce(self, username: str):
+        """Register (or refresh) this process's streams of `username`"""
+        if self.get_db is None:
+            return
+        expires_at = datetime.utcnow() + timedelta(seconds=self.heartbeat_sec * 3)
+        try:
+            await self.get_db()[PRESENCE_COLLECTION].update_one(
+                {"_id": f"{self.origin}|{username}"},
+                {"$set": {"username": username, "expires_at": expires_at}},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            logger.warning(f"Could not register the live stream of {username}: {e}")
+
+    async def _withdraw(self, username: str):
+        if self.get_db is None or username in self._subscribers:
+            return
+        try:
+            await self.get_db()[PRESENCE_COLLECTION].delete_one({"_id": f"{self.origin}|{username}"})
+        except PyMongoError as e:
+            logger.warning(f"Could not unregister the live stream of {username}: {e}")
+
+    def dispatch(self, username: Optional[str], event: Optional[dict]):
+        """Queue `event` for every stream of `username`"""
+        for queue in self._subscribers.get(username, ()):
+            try:
+                queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # A stalled client: replace its backlog with one resync hint
+                self.dropped += queue.qsize()
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    def close(self):
+        """End every open stream (server shutdown)"""
+        for queues in self._subscribers.values():
+            for queue in queues:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_CLOSE)
+
+    async def stream(self, username: str, queue: asyncio.Queue):
+        """SSE body: a hello event, then deltas, with comment heartbeats"""
+        try:
+            await self._announce(username)
+            announced = time.monotonic()
+            yield format_event({"type": "hello"})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.heartbeat_sec)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    event = None
+                if event is _CLOSE:
+                    return
+                if time.monotonic() - announced >= self.heartbeat_sec:
+                    # A busy stream never idles: refresh its presence on time
+                    await self._announce(username)
+                    announced = time.monotonic()
+                yield ": keepalive\n\n" if event is None else format_event(event)
+        finally:
+            self.unsubscribe(username, queue)
+            await self._withdraw(username)
+
+    def snapshot(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "streams": sum(len(q) for q in self._subscribers.values()),
+            "watched_users": len(self._watched),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, separators=(',', ':'), default=str)}\n\n"
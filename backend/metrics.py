@@ -0,0 +1,216 @@
+# ============== METRICS ==============
+# Prometheus-style counters and histograms kept in process and rendered in
+# the text exposition format by /metrics. Every thread records into its own
+# shard (see monitoring.ThreadCounters), so taking a sample never locks;
+# shards are only merged when /metrics is scraped.
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Tuple
+
+from pymongo import monitoring as mongo_monitoring
+
+from monitoring import ThreadCounters
+
+# Seconds; covers ~1 ms Mongo round trips up to multi-second exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = ThreadCounters()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values.inc(label_values, amount)
+
+    def samples(self):
+        for label_values, value in sorted(self._values.snapshot().items()):
+            yield self.name, self.labels, label_values, value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values):
+        rows = getattr(self._local, "rows", None)
+        if rows is None:
+            rows = self._local.rows = {}
+            self._shards.append(rows)
+        row = rows.get(label_values)
+        if row is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            row = rows[label_values] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def merged(self) -> Dict[tuple, list]:
+        merged = {}
+        for rows in list(self._shards):
+            for label_values, row in list(rows.items()):
+                total = merged.setdefault(label_values, [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+        return merged
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for label_values, row in sorted(self.merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                yield f"{self.name}_bucket", names, label_values + (le,), cumulative
+            yield f"{self.name}_sum", self.labels, label_values, row[-1]
+            yield f"{self.name}_count", self.labels, label_values, cumulative
+
+
+class CallbackMetric:
+    """Gauge/counter whose values are read from a callback at scrape time"""
+
+    def __init__(self, kind: str, name: str, help: str, labels: tuple, read: Callable[[], Dict[tuple, float]]):
+        self.kind, self.name, self.help, self.labels = kind, name, help, labels
+        self._read = read
+        REGISTRY.append(self)
+
+    def samples(self):
+        for label_values, value in sorted(self._read().items()):
+            yield self.name, self.labels, label_values, value
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, label_names, label_values, value in metric.samples():
+            lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ============== COLLECTORS ==============
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+)
+MONGO_COMMANDS = Counter(
+    "mongo_commands_total", "MongoDB commands by collection, command and outcome",
+    ("collection", "command", "outcome"),
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"),
+)
+BCRYPT_LATENCY = Histogram(
+    "bcrypt_duration_seconds", "Time spent hashing or verifying passwords",
+    ("operation",), buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up a periodic timer (blocking)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def route_template(scope: dict) -> str:
+    """Path template of the matched route ("/api/lessons/{session_type}"), bounded cardinality"""
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, status and latency per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, status)
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], route)
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a command targets, or "" for database/admin commands"""
+    if command_name == "getMore":
+        return command.get("collection", "")
+    target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+class MongoCommandMetrics(mongo_monitoring.CommandListener):
+    """Counts and times every command the driver sends"""
+
+    def __init__(self):
+        # (connection, request_id) -> collection; dict set/pop are atomic
+        self._pending: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = command_collection(
+            event.command_name, event.command
+        )
+
+    def _finished(self, event, outcome: str):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMANDS.inc(collection, event.command_name, outcome)
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def succeeded(self, event):
+        self._finished(event, "success")
+
+    def failed(self, event):
+        self._finished(event, "failure")
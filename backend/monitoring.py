@@ -0,0 +1,203 @@
+# ============== RUNTIME MONITORING ==============
+# In-process signals used by the health/status endpoints: MongoDB connection
+# pool usage, in-process cache hit rates and event-loop lag.
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from pymongo import monitoring
+
+
+class ThreadCounters:
+    """Counters sharded per thread and summed on read.
+
+    Driver event listeners run on Motor's executor threads; giving every
+    thread its own dicts means writers never contend or take a lock. Keys
+    may be any hashable (metric label tuples included).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self) -> tuple:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})  # (sums, maxima)
+            self._shards.append(shard)  # list.append is atomic
+        return shard
+
+    def inc(self, key, amount: float = 1):
+        sums = self._shard()[0]
+        sums[key] = sums.get(key, 0) + amount
+
+    def max(self, key, value: float):
+        maxima = self._shard()[1]
+        if value > maxima.get(key, 0):
+            maxima[key] = value
+
+    def snapshot(self) -> dict:
+        """Sums of inc() keys merged with the maxima of max() keys"""
+        totals, maxima = {}, {}
+        for sums, shard_maxima in list(self._shards):
+            for key, value in list(sums.items()):
+                totals[key] = totals.get(key, 0) + value
+            for key, value in list(shard_maxima.items()):
+                maxima[key] = max(maxima.get(key, 0), value)
+        totals.update(maxima)
+        return totals
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool size, checkouts and time spent waiting for a connection"""
+
+    # A checkout that waited longer than this counts as a "slow" wait
+    SLOW_WAIT_MS = 10
+
+    def __init__(self):
+        self.counters = ThreadCounters()
+        self._local = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.counters.inc("pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.counters.inc("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.counters.inc("connections_closed")
+
+    def connection_check_out_started(self, event):
+        # Started/checked-out events for one checkout fire on the same thread
+        self._local.started = time.perf_counter()
+        self.counters.inc("checkouts_started")
+
+    def connection_check_out_failed(self, event):
+        self.counters.inc("checkout_failures")
+        self._local.started = None
+
+    def connection_checked_out(self, event):
+        self.counters.inc("checkouts")
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            wait_ms = (time.perf_counter() - started) * 1000
+            self.counters.inc("wait_ms_total", wait_ms)
+            self.counters.max("max_wait_ms", wait_ms)
+            if wait_ms > self.SLOW_WAIT_MS:
+                self.counters.inc("slow_waits")
+            self._local.started = None
+
+    def connection_checked_in(self, event):
+        self.counters.inc("checkins")
+
+    def snapshot(self) -> dict:
+        c = self.counters.snapshot()
+        checkouts = c.get("checkouts", 0)
+        return {
+            "open_connections": c.get("connections_created", 0) - c.get("connections_closed", 0),
+            "checked_out": checkouts - c.get("checkins", 0),
+            "waiting": c.get("checkouts_started", 0) - checkouts - c.get("checkout_failures", 0),
+            "checkouts": checkouts,
+            "checkout_failures": c.get("checkout_failures", 0),
+            "slow_waits": c.get("slow_waits", 0),
+            "avg_wait_ms": round(c.get("wait_ms_total", 0) / checkouts, 3) if checkouts else 0,
+            "max_wait_ms": round(c.get("max_wait_ms", 0), 3),
+            "pool_cleared": c.get("pool_cleared", 0),
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic sleeper"""
+
+    def __init__(self, interval: float = 0.5, on_sample: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (loop.time() - expected) * 1000))
+
+    def record(self, lag_ms: float):
+        self.last_ms = lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        self.samples += 1
+        if self.on_sample is not None:
+            self.on_sample(lag_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "lag_ms": round(self.last_ms, 3),
+            "max_lag_ms": round(self.max_ms, 3),
+            "samples": self.samples,
+            "running": self._task is not None,
+        }
+
+
+class CacheStats:
+    """Hit/miss counters of one in-process cache (updated from the event loop only)"""
+
+    def __init__(self, size: Callable[[], int]):
+        self.hits = 0
+        self.misses = 0
+        self._size = size
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+CACHES: Dict[str, CacheStats] = {}
+
+
+def register_cache(name: str, size: Callable[[], int]) -> CacheStats:
+    stats = CACHES[name] = CacheStats(size)
+    return stats
+
+
+def caches_snapshot() -> dict:
+    return {name: stats.snapshot() for name, stats in CACHES.items()}
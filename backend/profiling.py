@@ -0,0 +1,112 @@
+# ============== REQUEST PROFILING ==============
+# On-demand profile of a single request. A request carrying the `X-Profile`
+# header (or `?__profile=1`) from the admin is run while a background thread
+# samples the event-loop thread's stack; the samples are written as a
+# collapsed-stack file ("frame;frame;frame count" per line) that flamegraph.pl,
+# speedscope or inferno render directly. Unflagged requests only pay for the
+# header/query check.
+#
+# The loop thread is shared, so samples taken while the profiled request is
+# awaiting I/O show whatever else the loop was doing (usually the selector).
+
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "__profile"
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _bearer_token(headers: list) -> Optional[str]:
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    return None
+
+
+def profiling_requested(scope: dict) -> bool:
+    if any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+        return True
+    query = scope.get("query_string", b"")
+    return bool(query) and PROFILE_QUERY.encode() in query and PROFILE_QUERY in parse_qs(query.decode("latin-1"))
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling admin requests flagged with X-Profile / ?__profile"""
+
+    def __init__(self, app, is_admin_token: Callable[[str], bool], profile_dir: str, interval_ms: float = 1):
+        self.app = app
+        self.is_admin_token = is_admin_token
+        self.profile_dir = profile_dir
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        token = _bearer_token(scope["headers"])
+        if not token or not self.is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9-]+", "_", scope["path"].strip("/")) or "root"
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method'].lower()}-{route}.collapsed"
+        sampler = StackSampler(threading.get_ident(), self.interval)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", name.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            stacks = sampler.stop()
+            with open(os.path.join(self.profile_dir, name), "w", encoding="utf-8") as f:
+                f.write(collapsed(stacks))
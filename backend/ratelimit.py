@@ -0,0 +1,222 @@
+# ============== RATE LIMITING ==============
+# Token buckets per (rule, caller) for write requests, so one buggy client
+# can't saturate MongoDB for everyone. A rule matches a method and a path
+# pattern and holds `capacity` tokens that refill evenly over `period`
+# seconds; each request takes one, and a request finding the bucket empty
+# gets 429 with Retry-After. The caller is the JWT subject, or the client IP
+# for anonymous requests.
+#
+# Buckets live in this process by default, so with several workers each one
+# enforces the limit on its own share of the traffic. The "mongo" backend
+# keeps them in one collection, updated atomically with a pipeline update,
+# so the limits hold across workers at the cost of one round trip per
+# limited request. When MongoDB is unreachable requests are let through.
+
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "rate_limits"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# "METHOD PATH=CAPACITY/PERIOD_SEC"; `*` is any write method or one path
+# segment, a trailing `/**` any rest of the path. The first matching rule applies.
+DEFAULT_RULES = (
+    "POST /api/progress/practice=60/60",
+    "POST /api/methods/*/lessons/batch=10/60",
+    "POST /api/methods/*/lessons=60/60",
+    "POST /api/sync=30/60",
+    "POST /api/timer/heartbeat=120/60",
+    "* /api/**=300/60",
+)
+
+THROTTLED = metrics.Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by rule and caller kind",
+    ("rule", "caller"),
+)
+BACKEND_ERRORS = metrics.Counter(
+    "rate_limit_backend_errors_total", "Shared rate limit lookups that failed (requests let through)",
+)
+
+
+class Rule(NamedTuple):
+    name: str
+    methods: tuple
+    pattern: re.Pattern
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second"""
+        return self.capacity / self.period
+
+
+def parse_rule(spec: str) -> Rule:
+    """Rule from "POST /api/progress/practice=60/60" (ValueError when malformed)"""
+    target, _, limit = spec.strip().rpartition("=")
+    method, _, path = target.strip().partition(" ")
+    capacity, _, period = limit.partition("/")
+    if not path or int(capacity) < 1 or float(period) <= 0:
+        raise ValueError(f"Invalid rate limit rule: {spec!r}")
+    method = method.upper()
+    methods = WRITE_METHODS if method == "*" else (method,)
+    path = path.strip()
+    regex = re.escape(path[:-3] if path.endswith("/**") else path).replace(r"\*", "[^/]+")
+    if path.endswith("/**"):
+        regex += "(/.*)?"
+    return Rule(f"{method} {path}", methods, re.compile(regex + "$"), int(capacity), float(period))
+
+
+def parse_rules(spec: str = "") -> List[Rule]:
+    """RATE_LIMIT_RULES (";"-separated) ahead of the defaults; a rule for the
+    same method and path replaces the default one"""
+    rules = [parse_rule(s) for s in spec.split(";") if s.strip()]
+    names = {rule.name for rule in rules}
+    return rules + [rule for rule in map(parse_rule, DEFAULT_RULES) if rule.name not in names]
+
+
+class TokenBucketLimiter:
+    """Token buckets kept in process or in a shared MongoDB collection"""
+
+    def __init__(self, rules: List[Rule], get_db: Optional[Callable] = None, backend: str = "memory",
+                 max_keys: int = 10000):
+        self.rules = rules
+        self.get_db = get_db
+        self.backend = backend
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.throttled = 0
+        # (rule name, caller) -> [tokens, monotonic time of the last refill]
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def match(self, method: str, path: str) -> Optional[Rule]:
+        for rule in self.rules:
+            if method in rule.methods and rule.pattern.match(path):
+                return rule
+        return None
+
+    async def acquire(self, rule: Rule, caller: str) -> float:
+        """Take a token: 0 when allowed, otherwise the seconds until one is available"""
+        if self.backend == "mongo":
+            retry_after = await self._take_shared(rule, caller)
+        else:
+            retry_after = self._take_local(rule, caller)
+        if retry_after:
+            self.throttled += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def _take_local(self, rule: Rule, caller: str) -> float:
+        key = (rule.name, caller)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [rule.capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rule.rate
+
+    async def _take_shared(self, rule: Rule, caller: str) -> float:
+        now = datetime.utcnow()
+        # Refill from the elapsed time (never negative across worker clocks),
+        # then take a token if there is one, in a single atomic update
+        elapsed_sec = {"$max": [0, {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}]}
+        refilled = {"$min": [rule.capacity, {"$add": [
+            {"$ifNull": ["$tokens", rule.capacity]}, {"$multiply": [elapsed_sec, rule.rate]},
+        ]}]}
+        try:
+            bucket = await self.get_db()[COLLECTION].find_one_and_update(
+                {"_id": f"{rule.name}|{caller}"},
+                [
+                    {"$set": {"tokens": refilled, "updated_at": now}},
+                    {"$set": {
+                        "allowed": {"$gte": ["$tokens", 1]},
+                        "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                        "expires_at": now + timedelta(seconds=rule.period),
+                    }},
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            BACKEND_ERRORS.inc()
+            logger.warning(f"Rate limit backend unavailable, letting the request through: {e}")
+            return 0
+        if bucket["allowed"]:
+            return 0
+        return (1 - bucket["tokens"]) / rule.rate
+
+    async def prepare(self):
+        """TTL index dropping shared buckets once they would be full again"""
+        if self.backend != "mongo":
+            return
+        try:
+            await self.get_db()[COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+        except PyMongoError as e:
+            logger.warning(f"Could not create the {COLLECTION} TTL index: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": self.backend,
+            "rules": {rule.name: f"{rule.capacity}/{rule.period:g}s" for rule in self.rules},
+            "local_buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+        }
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware answering 429 when the caller's bucket is empty"""
+
+    def __init__(self, app, limiter: TokenBucketLimiter, identify: Callable[[Request], str],
+                 enabled: bool = True):
+        self.app = app
+        self.limiter = limiter
+        self.identify = identify  # "user:<name>" or "ip:<address>"
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = self.limiter.match(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        caller = self.identify(Request(scope))
+        retry_after = await self.limiter.acquire(rule, caller)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        THROTTLED.inc(rule.name, caller.partition(":")[0])
+        seconds = max(1, math.ceil(retry_after))
+        response = JSONResponse(
+            {"detail": f"Muitas requisições. Tente novamente em {seconds} s."},
+            status_code=429,
+            headers={"Retry-After": str(seconds)},
+        )
+        await response(scope, receive, send)
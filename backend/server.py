@@ -1,22 +1,28 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+import asyncio
 import os
+from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import bcrypt
 from jose import JWTError, jwt
 import time
 import json
+import secrets
 from bson import ObjectId
 
 ROOT_DIR = Path(__file__).parent
@@ -29,6 +35,18 @@ from data.lessons_seed import (
     POSITIONS_TRILLS_LESSONS, STUDIES_LESSONS, REPERTOIRE_LESSONS,
     REPERTOIRE_STUDY_GUIDE, get_all_lessons, get_total_lessons
 )
+from data.catalog import LessonCatalog, CUSTOM_LESSON_ID_OFFSET
+from data.search import LessonSearchIndex
+from monitoring import PoolMonitor, LoopLagMonitor, register_cache, caches_snapshot, CACHES
+import metrics
+from invalidation import InvalidationBus
+from write_behind import CoalescingBuffer, coalesce
+from live import LiveHub
+from jobs import JobRunner, job_view
+from ratelimit import RateLimitMiddleware, TokenBucketLimiter, parse_rules
+import tracing
+import profiling
+from tracing import span
 
 # JWT Configuration
 _jwt_secret = os.environ.get('JWT_SECRET', '')
@@ -46,10 +64,99 @@ LOGIN_ATTEMPTS = {}  # {ip: {"count": int, "last_attempt": timestamp, "locked_un
 MAX_ATTEMPTS = 5
 LOCKOUT_DURATION = 300  # 5 minutes
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'violin_study')]
+# MongoDB connection — opened by the app lifespan (see `lifespan`), so the
+# module can be imported without a database. Tests/tools may assign `db`
+# before startup to use their own database handle.
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Env var -> Motor/PyMongo client option (pool sizing and timeouts)
+MONGO_CLIENT_OPTIONS_ENV = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+# Readiness: how long the Mongo ping may take, and the loop lag / pool wait
+# queue above which the instance reports itself as saturated (0 disables)
+READINESS_TIMEOUT_MS = int(os.environ.get('READINESS_TIMEOUT_MS', 1000))
+READINESS_MAX_LOOP_LAG_MS = int(os.environ.get('READINESS_MAX_LOOP_LAG_MS', 1000))
+READINESS_MAX_POOL_WAITING = int(os.environ.get('READINESS_MAX_POOL_WAITING', 0))
+
+# Runtime signals reported by /readyz and /api/internal/status
+POOL_MONITOR = PoolMonitor()
+LOOP_MONITOR = LoopLagMonitor(on_sample=lambda lag_ms: metrics.EVENT_LOOP_LAG.observe(lag_ms / 1000))
+COMMAND_METRICS = metrics.MongoCommandMetrics()
+TRACE_LISTENER = tracing.TraceCommandListener()
+
+# Requests slower than TRACE_SLOW_MS are sampled (TRACE_SAMPLE_RATE) to TRACE_FILE
+# (unset: not recorded)
+TRACE_SLOW_MS = float(os.environ.get('TRACE_SLOW_MS', 500))
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+TRACE_FILE = os.environ.get('TRACE_FILE', '')
+
+# Admin requests flagged with X-Profile / ?__profile=1 are profiled into PROFILE_DIR
+PROFILE_DIR = os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 1))
+STARTED_AT = time.time()
+
+# Optional write-behind for practice taps and daily log updates: coalesced in
+# memory and flushed every WRITE_BEHIND_FLUSH_MS, or sooner once
+# WRITE_BEHIND_MAX_PENDING documents are waiting. A crash loses at most the
+# updates of the last interval, so it is off by default.
+WRITE_BEHIND = CoalescingBuffer(
+    lambda: db,
+    enabled=os.environ.get('WRITE_BEHIND', 'false').lower() == 'true',
+    flush_interval_ms=float(os.environ.get('WRITE_BEHIND_FLUSH_MS', 1000)),
+    max_pending=int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 500)),
+)
+
+# Practice timer heartbeats are accumulated in memory and flushed every
+# HEARTBEAT_FLUSH_MS as one $inc per user and day
+HEARTBEATS = CoalescingBuffer(
+    lambda: db,
+    enabled=True,
+    flush_interval_ms=float(os.environ.get('HEARTBEAT_FLUSH_MS', 10000)),
+    max_pending=int(os.environ.get('HEARTBEAT_MAX_PENDING', 1000)),
+)
+
+# Live progress deltas pushed to /api/events (Server-Sent Events)
+LIVE_UPDATES = os.environ.get('LIVE_UPDATES', 'true').lower() != 'false'
+LIVE_HUB = LiveHub(heartbeat_sec=float(os.environ.get('LIVE_HEARTBEAT_SEC', 15)), get_db=lambda: db)
+STREAM_TICKET_TTL = timedelta(seconds=60)
+
+# Import, reset and method deletion run as background jobs (see jobs.py),
+# at most JOBS_CONCURRENCY at a time per process
+JOBS = JobRunner(
+    lambda: db,
+    concurrency=int(os.environ.get('JOBS_CONCURRENCY', 1)),
+    lease_sec=float(os.environ.get('JOBS_LEASE_SEC', 60)),
+    poll_interval_sec=float(os.environ.get('JOBS_POLL_SEC', 5)),
+)
+
+# Token buckets per user (or IP) and route for write requests; see ratelimit.py
+# for the RATE_LIMIT_RULES format. RATE_LIMIT_BACKEND=mongo shares them
+# between workers.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT', 'true').lower() != 'false'
+RATE_LIMITER = TokenBucketLimiter(
+    parse_rules(os.environ.get('RATE_LIMIT_RULES', '')),
+    get_db=lambda: db,
+    backend=os.environ.get('RATE_LIMIT_BACKEND', 'memory').lower(),
+    max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', 10000)),
+)
+
+def mongo_client_options() -> dict:
+    """Client options set through the environment (unset ones keep the driver defaults)"""
+    options = {}
+    for env_name, option in MONGO_CLIENT_OPTIONS_ENV.items():
+        value = os.environ.get(env_name, '').strip()
+        if value:
+            options[option] = int(value)
+    return options
 
 # Security headers middleware
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -62,8 +169,99 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
         return response
 
+# ============== APP LIFESPAN ==============
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the Mongo client and warm it up before accepting traffic"""
+    global client, db, _index_task
+    if db is None:
+        options = mongo_client_options()
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[POOL_MONITOR, COMMAND_METRICS, TRACE_LISTENER], **options)
+        db = client[os.environ.get('DB_NAME', 'violin_study')]
+        logger.info(f"MongoDB client created with options {options or 'defaults'}")
+
+    if not await ensure_indexes():
+        _index_task = asyncio.create_task(retry_ensure_indexes())
+    await warm_up()
+    await run_migrations()
+    await INVALIDATION_BUS.start()
+    await LIVE_BUS.start()
+    await LIVE_HUB.start()
+    await reset_admin_password_if_requested()
+    LOOP_MONITOR.start()
+    WRITE_BEHIND.start()
+    HEARTBEATS.start()
+    await JOBS.start()
+    await RATE_LIMITER.prepare()
+    yield
+
+    if _index_task is not None:
+        _index_task.cancel()
+        _index_task = None
+    LIVE_HUB.close()
+    await LIVE_HUB.stop()
+    await JOBS.stop()
+    await HEARTBEATS.stop()
+    await WRITE_BEHIND.stop()
+    await LOOP_MONITOR.stop()
+    await INVALIDATION_BUS.stop()
+    await LIVE_BUS.stop()
+    if client is not None:
+        client.close()
+        client = None
+        db = None
+        INDEXES_READY.clear()
+
+# The unique indexes make retried sync operations, heartbeats and note writes
+# idempotent, so unlike the warm-up they are required: until they exist
+# /readyz answers 503 and their creation is retried every INDEX_RETRY_SEC.
+INDEX_RETRY_SEC = 5
+INDEXES_READY = asyncio.Event()
+_index_task = None
+
+async def ensure_indexes() -> bool:
+    """Create the collections' indexes; False (logged) when it failed"""
+    try:
+        await db.sync_ops.create_index([("username", 1), ("op_id", 1)], unique=True)
+        await db.sync_ops.create_index("received_at", expireAfterSeconds=SYNC_OP_RETENTION_SEC)
+        await db.timer_devices.create_index([("username", 1), ("device_id", 1)], unique=True)
+        await db.lesson_notes.create_index([("username", 1), ("session_type", 1), ("lesson_id", 1)], unique=True)
+        await db.stream_tickets.create_index("expires_at", expireAfterSeconds=0)
+        await db.practice_events.create_index([("username", 1), ("session_type", 1), ("lesson_id", 1), ("ts", -1)])
+        await ensure_session_time_collection()
+    except Exception as e:
+        logger.error(f"Index creation failed, retrying in {INDEX_RETRY_SEC} s: {e}")
+        return False
+    INDEXES_READY.set()
+    return True
+
+async def retry_ensure_indexes():
+    while True:
+        await asyncio.sleep(INDEX_RETRY_SEC)
+        if await ensure_indexes():
+            return
+
+async def warm_up():
+    """Open pool connections and preload in-process caches.
+
+    Failures are logged, not raised: the driver reconnects lazily and the
+    first requests simply pay the setup cost.
+    """
+    started = time.perf_counter()
+    try:
+        # One ping per minPoolSize connection so they are all open up front
+        pings = max(1, mongo_client_options().get("minPoolSize", 1))
+        await asyncio.gather(*(db.command("ping") for _ in range(pings)))
+        await get_app_settings()  # created lazily: start_date is the first admin login
+        await get_catalog()
+    except Exception as e:
+        logger.warning(f"Warm-up incomplete: {e}")
+        return
+    logger.info(f"Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 # Create the main app
-app = FastAPI(title="Violin Study Plan API", version="2.0")
+app = FastAPI(title="Violin Study Plan API", version="2.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -107,11 +305,11 @@ class SessionProgress(BaseModel):
     completed_lessons: List[int] = []
     practice_counts: Dict[int, int] = {}
     last_practiced: Dict[int, str] = {}
-    notes: Dict[int, str] = {}
 
 class PracticeLogRequest(BaseModel):
     session_type: str
     lesson_id: int
+    duration_sec: int = Field(0, ge=0, le=86400)
 
 class AdvanceLessonRequest(BaseModel):
     session_type: str
@@ -126,6 +324,26 @@ class WarmupCheckRequest(BaseModel):
     item_id: int
     completed: bool
 
+class HeartbeatRequest(BaseModel):
+    device_id: str = Field(..., min_length=1, max_length=64)
+    seq: int = Field(..., ge=0)  # increases with every heartbeat of the device
+    deltas: Dict[str, int] = Field(..., max_length=10)  # session type -> seconds since the last heartbeat
+
+class SyncOperation(BaseModel):
+    op_id: str = Field(..., min_length=1, max_length=100)
+    type: str = Field(..., max_length=30)  # practice, warmup_check, notes or advance
+    ts: Optional[datetime] = None  # when the action happened on the device
+    session_type: Optional[str] = Field(None, max_length=50)
+    lesson_id: Optional[int] = None
+    duration_sec: int = Field(0, ge=0, le=86400)
+    direction: Optional[str] = None
+    notes: Optional[str] = Field(None, max_length=5000)
+    item_id: Optional[int] = None
+    completed: Optional[bool] = None
+
+class SyncRequest(BaseModel):
+    operations: List[SyncOperation] = Field(..., max_length=1000)
+
 class DailyLogRequest(BaseModel):
     notes: Optional[str] = Field(None, max_length=5000)
 
@@ -176,6 +394,56 @@ class ExportDataResponse(BaseModel):
 class ImportDataRequest(BaseModel):
     data: Dict[str, Any]
 
+# What an import reads from a backup (the export format), checked before
+# anything is replaced. Extra fields are ignored, daily logs keep theirs.
+
+def check_date(value: str) -> str:
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("data deve estar no formato AAAA-MM-DD")
+    return value
+
+class BackupPracticeEvent(BaseModel):
+    session_type: str = Field(..., max_length=50)
+    lesson_id: int
+    date: str
+    ts: Optional[datetime] = None
+    duration_sec: Optional[int] = Field(0, ge=0, le=86400)
+
+    _check_date = field_validator("date")(check_date)
+
+class BackupChecklistItem(BaseModel):
+    id: int
+    completed: bool = False
+
+class BackupWarmup(BaseModel):
+    date: str
+    completed_ids: Optional[List[int]] = None
+    checklist: List[BackupChecklistItem] = []  # exports made before completed_ids
+
+    _check_date = field_validator("date")(check_date)
+
+class BackupLessonNote(BaseModel):
+    session_type: str = Field(..., max_length=50)
+    lesson_id: int
+    notes: Optional[str] = Field(None, max_length=5000)
+
+class BackupDailyLog(BaseModel, extra="allow"):
+    date: str
+    session_times: Dict[str, int] = {}
+    total_time_sec: int = 0
+
+    _check_date = field_validator("date")(check_date)
+
+class Backup(BaseModel):
+    progress: Optional[Dict[str, Any]] = None
+    warmups: Optional[List[BackupWarmup]] = None
+    daily_logs: Optional[List[BackupDailyLog]] = None
+    practice_events: List[BackupPracticeEvent] = []
+    lesson_notes: List[BackupLessonNote] = []
+    settings: Optional[Dict[str, Any]] = None
+
 class ImportPreviewResponse(BaseModel):
     valid: bool
     summary: Dict[str, Any]
@@ -184,10 +452,16 @@ class ImportPreviewResponse(BaseModel):
 # ============== HELPER FUNCTIONS ==============
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    metrics.BCRYPT_LATENCY.observe(time.perf_counter() - started, "hash")
+    return hashed
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    started = time.perf_counter()
+    valid = bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    metrics.BCRYPT_LATENCY.observe(time.perf_counter() - started, "verify")
+    return valid
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -205,6 +479,18 @@ def get_client_ip(request: Request) -> str:
         return forwarded.split(",")[0]
     return request.client.host if request.client else "unknown"
 
+def rate_limit_caller(request: Request) -> str:
+    """Rate limit key: the token's user, or the client IP without a valid token"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            username = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            username = None
+        if username:
+            return f"user:{username}"
+    return f"ip:{get_client_ip(request)}"
+
 def check_brute_force(ip: str) -> bool:
     """Returns True if request should be blocked"""
     now = time.time()
@@ -232,6 +518,19 @@ def record_login_attempt(ip: str, success: bool):
         if LOGIN_ATTEMPTS[ip]["count"] >= MAX_ATTEMPTS:
             LOGIN_ATTEMPTS[ip]["locked_until"] = now + LOCKOUT_DURATION
 
+async def gather_all(*aws):
+    """asyncio.gather for independent queries of one request: results in order,
+    and when one fails the others are cancelled before the error propagates"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled queries unwind so none outlives the request
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if not credentials:
         raise HTTPException(status_code=401, detail="Não autenticado")
@@ -243,77 +542,312 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido ou expirado")
     
+    with span("auth"):
+        user = await get_user_cached(username)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Usuário não encontrado")
+    return user
+
+# ============== USER CACHE ==============
+# Authenticated requests resolve the JWT subject to its user document; the
+# documents are cached briefly and dropped on every write to the user.
+
+USER_CACHE_TTL_SEC = float(os.environ.get('USER_CACHE_TTL_SEC', 60))
+USER_CACHE_MAX_ENTRIES = 1024
+_user_cache: Dict[str, tuple] = {}  # username -> (expires_at, user document)
+_users_generation = 0
+USER_CACHE_STATS = register_cache("users", lambda: len(_user_cache))
+
+def invalidate_user(username: Optional[str] = None):
+    """Drop one cached user (or all of them)"""
+    global _users_generation
+    _users_generation += 1
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username, None)
+
+async def get_user_cached(username: str) -> Optional[dict]:
+    """The user document (shared; don't mutate), from cache when fresh"""
+    entry = _user_cache.get(username)
+    now = time.monotonic()
+    if entry is not None and entry[0] > now:
+        USER_CACHE_STATS.hit()
+        return entry[1]
+    USER_CACHE_STATS.miss()
+    generation = _users_generation
     user = await db.users.find_one({"username": username})
+    # Only cache if no write to any user landed while we were reading
+    if user is not None and USER_CACHE_TTL_SEC > 0 and generation == _users_generation:
+        if len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[username] = (now + USER_CACHE_TTL_SEC, user)
+    return user
+
+def is_admin_token(token: str) -> bool:
+    """True for a valid, unexpired JWT issued to the admin"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("sub") == "admin"
+
+async def get_admin_user(user: dict = Depends(get_current_user)):
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Acesso restrito ao administrador")
+    return user
+
+async def get_stream_user(credentials: HTTPAuthorizationCredentials = Depends(security), ticket: Optional[str] = None):
+    """get_current_user that also accepts a ?ticket= from /api/events/ticket
+    (EventSource can't send headers, and a JWT in the URL ends up in access logs)"""
+    if credentials is not None or not ticket:
+        return await get_current_user(credentials)
+    issued = await db.stream_tickets.find_one_and_delete({"_id": ticket, "expires_at": {"$gt": datetime.utcnow()}})
+    if issued is None:
+        raise HTTPException(status_code=401, detail="Ticket inválido ou expirado")
+    user = await get_user_cached(issued["username"])
     if user is None:
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
     return user
 
+async def flush_user_buffers(username: str):
+    """Write the user's buffered write-behind updates and timer heartbeats"""
+    # Updates are matched by their filter, appended points by their meta
+    match = lambda collection, doc: doc.get("username", doc.get("meta", {}).get("username")) == username
+    await gather_all(*(buffer.flush(match) for buffer in (WRITE_BEHIND, HEARTBEATS) if len(buffer)))
+
+async def get_synced_user(user: dict = Depends(get_current_user)):
+    """get_current_user for handlers that read progress/daily logs back:
+    the user's write-behind updates and timer heartbeats are flushed first"""
+    await flush_user_buffers(user["username"])
+    return user
+
+# ============== CATALOG CACHE ==============
+# Handlers invalidate through INVALIDATION_BUS.publish(...) (defined after
+# the settings cache) so other workers drop their copies too.
+
+SEED_CATALOG = LessonCatalog(get_all_lessons(), METHODS)
+SEARCH_INDEX = LessonSearchIndex()
+for _key, _lesson in SEED_CATALOG.by_id.items():
+    SEARCH_INDEX.add(_key, _lesson)
+_catalog: Optional[LessonCatalog] = None
+_catalog_generation = 0
+_catalog_lock = asyncio.Lock()
+_custom_lesson_ids_ready = False
+_custom_lesson_ids_lock = asyncio.Lock()
+CATALOG_CACHE_STATS = register_cache(
+    "catalog", lambda: _catalog.total_lessons if _catalog is not None else 0
+)
+
+def invalidate_catalog():
+    """Drop the cached catalog after a write to custom methods/lessons"""
+    global _catalog, _catalog_generation
+    _catalog = None
+    _catalog_generation += 1
+
+async def get_catalog() -> LessonCatalog:
+    """Returns the merged seed + custom catalog, rebuilding it after invalidation"""
+    global _catalog
+    catalog = _catalog
+    if catalog is not None:
+        CATALOG_CACHE_STATS.hit()
+        return catalog
+    async with _catalog_lock:
+        if _catalog is not None:
+            CATALOG_CACHE_STATS.hit()
+            return _catalog
+        CATALOG_CACHE_STATS.miss()
+        await ensure_custom_lesson_ids()
+        generation = _catalog_generation
+        custom_lessons, custom_methods = await gather_all(
+            db.custom_lessons.find({}).sort([("order", 1), ("_id", 1)]).to_list(None),
+            db.custom_methods.find({}).to_list(None),
+        )
+        catalog = SEED_CATALOG.with_custom(custom_lessons, custom_methods)
+        SEARCH_INDEX.sync(catalog.custom, keep=lambda key: key in SEED_CATALOG.by_id)
+        # Only cache if no write landed while we were reading
+        if generation == _catalog_generation:
+            _catalog = catalog
+        return catalog
+
+async def allocate_custom_lesson_ids(session_type: str, count: int = 1) -> List[int]:
+    """Reserve `count` consecutive lesson IDs for custom lessons of a session"""
+    await ensure_custom_lesson_ids()
+    counter = await db.counters.find_one_and_update(
+        {"_id": f"custom_lessons:{session_type}"},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    last_id = CUSTOM_LESSON_ID_OFFSET + counter["seq"]
+    return list(range(last_id - count + 1, last_id + 1))
+
+async def ensure_custom_lesson_ids():
+    """Give legacy custom lessons (stored without lesson_id) a stable per-session ID.
+
+    Legacy lessons keep the `order + 10000` ID they were served under when it is
+    unique in their session; colliding ones get a fresh ID from the counter.
+    """
+    global _custom_lesson_ids_ready
+    if _custom_lesson_ids_ready:
+        return
+    async with _custom_lesson_ids_lock:
+        if _custom_lesson_ids_ready:
+            return
+        legacy = await db.custom_lessons.find(
+            {"lesson_id": {"$exists": False}}
+        ).sort([("order", 1), ("_id", 1)]).to_list(None)
+
+        by_session: Dict[str, list] = {}
+        for cl in legacy:
+            by_session.setdefault(cl.get("session_type"), []).append(cl)
+
+        for session_type, lessons in by_session.items():
+            used = set(await db.custom_lessons.distinct(
+                "lesson_id", {"session_type": session_type, "lesson_id": {"$exists": True}}
+            ))
+            assigned, pending = [], []
+            for cl in lessons:
+                candidate = cl.get("order", 0) + CUSTOM_LESSON_ID_OFFSET
+                if candidate > CUSTOM_LESSON_ID_OFFSET and candidate not in used:
+                    used.add(candidate)
+                    assigned.append((cl, candidate))
+                else:
+                    pending.append(cl)
+
+            counter_key = f"custom_lessons:{session_type}"
+            floor = max(used, default=CUSTOM_LESSON_ID_OFFSET) - CUSTOM_LESSON_ID_OFFSET
+            await db.counters.update_one({"_id": counter_key}, {"$max": {"seq": floor}}, upsert=True)
+            if pending:
+                counter = await db.counters.find_one_and_update(
+                    {"_id": counter_key},
+                    {"$inc": {"seq": len(pending)}},
+                    return_document=ReturnDocument.AFTER,
+                )
+                first_id = CUSTOM_LESSON_ID_OFFSET + counter["seq"] - len(pending) + 1
+                assigned.extend((cl, first_id + i) for i, cl in enumerate(pending))
+
+            await db.custom_lessons.bulk_write([
+                UpdateOne({"_id": cl["_id"], "lesson_id": {"$exists": False}}, {"$set": {"lesson_id": lesson_id}})
+                for cl, lesson_id in assigned
+            ])
+
+        if legacy:
+            logger.info(f"Assigned stable IDs to {len(legacy)} legacy custom lessons")
+        _custom_lesson_ids_ready = True
+
 async def get_all_lessons_merged():
-    """Returns all lessons organized by session type, merging seed + custom"""
-    import copy
-    seed_lessons = {k: list(v) for k, v in get_all_lessons().items()}
-    # Get custom lessons from DB
-    custom_lessons_cursor = db.custom_lessons.find({}).sort("order", 1)
-    custom_lessons = await custom_lessons_cursor.to_list(5000)
-
-    # Get custom methods for method info
-    custom_methods_cursor = db.custom_methods.find({})
-    custom_methods_list = await custom_methods_cursor.to_list(500)
-    custom_methods_map = {str(m["_id"]): m for m in custom_methods_list}
-
-    for cl in custom_lessons:
-        session_type = cl.get("session_type")
-        if session_type and session_type in seed_lessons:
-            # Assign an ID that doesn't collide with seed (offset by 10000)
-            lesson_entry = {
-                "id": cl.get("order", 0) + 10000,
-                "title": cl["title"],
-                "method_id": cl.get("custom_method_id"),
-                "subtitle": cl.get("subtitle", ""),
-                "instruction": cl.get("instruction", ""),
-                "level": cl.get("level", ""),
-                "tags": cl.get("tags", []),
-                "is_custom": True,
-                "custom_lesson_id": str(cl["_id"]),
-                "custom_method_id": cl.get("custom_method_id"),
-            }
-            seed_lessons[session_type].append(lesson_entry)
+    """Returns all lessons organized by session type, merging seed + custom.
 
-    return seed_lessons
+    The lists are shared with the catalog cache and must not be mutated.
+    """
+    catalog = await get_catalog()
+    return catalog.lessons
 
 async def get_all_methods_merged():
     """Returns all methods merging seed + custom"""
-    methods = [dict(m, is_seed=True) for m in METHODS]
-    custom_methods_cursor = db.custom_methods.find({})
-    custom_methods = await custom_methods_cursor.to_list(500)
-    for cm in custom_methods:
-        methods.append({
-            "id": str(cm["_id"]),
-            "name": cm["name"],
-            "author": cm["author"],
-            "category": cm.get("category", ""),
-            "session_type": cm.get("session_type", ""),
-            "is_seed": False,
-            "is_custom": True,
-        })
-    return methods
+    catalog = await get_catalog()
+    return catalog.methods
 
 async def get_total_lessons_merged():
     """Returns total count of all lessons including custom"""
     all_lessons = await get_all_lessons_merged()
     return sum(len(lessons) for lessons in all_lessons.values())
 
+# ============== SETTINGS CACHE ==============
+
+_settings_entry: Optional[tuple] = None  # (version, app_settings document or None)
+_settings_version = 0
+_settings_lock = asyncio.Lock()
+_session_views: Optional[tuple] = None  # (settings version, catalog, session types, timeline)
+SETTINGS_CACHE_STATS = register_cache("settings", lambda: 0 if _settings_entry is None else 1)
+
+def invalidate_settings():
+    """Drop the cached settings after a write to app_settings"""
+    global _settings_entry, _settings_version
+    _settings_entry = None
+    _settings_version += 1
+
+async def get_settings_entry() -> tuple:
+    """Returns (version, settings document), loading it after invalidation"""
+    global _settings_entry
+    entry = _settings_entry
+    if entry is not None:
+        SETTINGS_CACHE_STATS.hit()
+        return entry
+    async with _settings_lock:
+        if _settings_entry is not None:
+            SETTINGS_CACHE_STATS.hit()
+            return _settings_entry
+        SETTINGS_CACHE_STATS.miss()
+        version = _settings_version
+        entry = (version, await db.settings.find_one({"_id": "app_settings"}))
+        # Only cache if no write landed while we were reading
+        if version == _settings_version:
+            _settings_entry = entry
+        return entry
+
+async def get_app_settings() -> Optional[dict]:
+    """The cached app_settings document (shared; copy before mutating)"""
+    return (await get_settings_entry())[1]
+
+async def get_session_views() -> tuple:
+    """(session types, session timeline), rebuilt only when settings or the catalog change"""
+    global _session_views
+    version, settings = await get_settings_entry()
+    catalog = await get_catalog()
+    views = _session_views
+    if views is not None and views[0] == version and views[1] is catalog:
+        return views[2], views[3]
+
+    durations = settings.get("session_durations", {}) if settings else {}
+    session_types = []
+    for s in SESSION_TYPES:
+        session = s.copy()
+        session["duration_sec"] = durations.get(s["id"], s["default_duration_sec"])
+        session["total_lessons"] = len(catalog.lessons.get(s["id"], [])) if s["type"] == "progressive" else 0
+        session_types.append(session)
+    timeline = build_session_timeline(durations, catalog.lessons)
+    _session_views = (version, catalog, session_types, timeline)
+    return session_types, timeline
+
+# Cross-worker invalidation: publish() runs the handler here and in every
+# other process following the bus
+INVALIDATION_BUS = InvalidationBus(
+    lambda: db,
+    {
+        "catalog": lambda key: invalidate_catalog(),
+        "settings": lambda key: invalidate_settings(),
+        "users": invalidate_user,
+    },
+    enabled=os.environ.get('INVALIDATION_BUS', 'true').lower() != 'false',
+)
+# Live progress deltas follow their own capped collection
+LIVE_BUS = InvalidationBus(
+    lambda: db,
+    {"live": LIVE_HUB.dispatch},
+    enabled=LIVE_UPDATES and INVALIDATION_BUS.enabled,
+    collection="live_updates",
+    capped_size=8 << 20,
+)
+
+async def push_live(username: str, event: dict):
+    """Send a progress delta to the user's open /api/events streams, in any
+    worker (nothing is written when the user has none)"""
+    if LIVE_UPDATES and LIVE_HUB.wants(username):
+        await LIVE_BUS.publish("live", username, event)
+
 async def init_user_progress(username: str):
     """Initialize progress for a new user"""
     all_lessons = get_all_lessons()
     progress = {
         "username": username,
-        "scales": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
-        "bow": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
-        "speed": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
-        "positions": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
-        "studies": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
-        "repertoire": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}},
+        "scales": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
+        "bow": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
+        "speed": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
+        "positions": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
+        "studies": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
+        "repertoire": {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}},
         "practice_dates": [],
         "first_practice_date": None,
         "created_at": datetime.utcnow().isoformat(),
@@ -333,6 +867,7 @@ async def init_app_settings():
             "accent_color": "#d4a843",
         }
         await db.settings.insert_one(settings)
+        await INVALIDATION_BUS.publish("settings")
     return settings
 
 def get_today_string():
@@ -350,6 +885,423 @@ def calculate_level(studies_completed: int) -> dict:
             }
     return {"level": "Iniciante", "method_range": "Wohlfahrt", "completed": 0, "next_threshold": 60}
 
+def build_session_timeline(durations: dict, all_lessons: dict) -> list:
+    """Sessions of /session-info with their slot ("00:05–00:15") in the daily plan"""
+    sessions = []
+    start = 0  # seconds into the plan; sessions run back to back in order
+    for s in sorted(SESSION_TYPES, key=lambda st: st["order"]):
+        duration = durations.get(s["id"], s["default_duration_sec"])
+        sessions.append({
+            "id": s["id"],
+            "name": s["name"],
+            "icon": s["icon"],
+            "time": f"{start//60:02d}:00–{(start + duration)//60:02d}:00",
+            "duration": duration // 60,
+            "duration_sec": duration,
+            "lessons": len(all_lessons.get(s["id"], [])) if s["type"] == "progressive" else 0,
+            "type": s["type"]
+        })
+        start += duration
+    return sessions
+
+def completion_summary(progress: dict, all_lessons: dict) -> dict:
+    """Lesson totals and completed counts, overall and per session"""
+    total_lessons = sum(len(lessons) for lessons in all_lessons.values())
+    completed_lessons = 0
+    for session_type in all_lessons.keys():
+        session_data = progress.get(session_type, {})
+        completed_lessons += len(session_data.get("completed_lessons", []))
+    return {
+        "total_lessons": total_lessons,
+        "completed_lessons": completed_lessons,
+        "session_progress": {
+            session_type: {
+                "total": len(all_lessons[session_type]),
+                "completed": len(progress.get(session_type, {}).get("completed_lessons", [])),
+                "current": progress.get(session_type, {}).get("current_lesson", 1)
+            }
+            for session_type in all_lessons.keys()
+        },
+    }
+
+# ============== MIGRATIONS ==============
+# One-time data migrations run at startup, after warm-up. The marker in
+# `migrations` gets finished_at only after the migration succeeded; one that
+# failed or was cut short (crash, restart) runs again at the next startup,
+# or once its lease expires, so every migration must be resumable.
+
+MIGRATION_LEASE = timedelta(minutes=10)
+FINISHED_MIGRATIONS = set()  # known finished by this process
+
+async def run_migration(name: str, migrate):
+    """Run migrate(marker) unless it finished already or another worker holds it"""
+    now = datetime.utcnow()
+    try:
+        marker = await db.migrations.find_one_and_update(
+            {"_id": name, "finished_at": {"$exists": False},
+             "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]},
+            {"$set": {"lease_until": now + MIGRATION_LEASE}, "$setOnInsert": {"started_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Finished, or running in another worker
+        if (await db.migrations.find_one({"_id": name}) or {}).get("finished_at"):
+            FINISHED_MIGRATIONS.add(name)
+        return
+    try:
+        await migrate(marker)
+    except Exception as e:
+        logger.error(f"Migration {name} failed, it will resume at the next startup: {e}")
+        await db.migrations.update_one({"_id": name}, {"$unset": {"lease_until": ""}})
+        return
+    await db.migrations.update_one(
+        {"_id": name}, {"$set": {"finished_at": datetime.utcnow()}, "$unset": {"lease_until": ""}}
+    )
+    FINISHED_MIGRATIONS.add(name)
+    logger.info(f"Migration {name} finished")
+
+async def run_migrations():
+    """Each migration on its own, so one failing doesn't hold back the others"""
+    await run_migration("session_time_backfill", backfill_session_time)
+    await run_migration("warmup_completed_ids", migrate_warmup_checklists)
+    await run_migration("lesson_notes", migrate_lesson_notes)
+
+# ============== PRACTICE EVENTS ==============
+# Every "practiced" tap is appended to practice_events and never rewritten.
+# The practice counts, last-practiced dates and practice days in `progress`
+# and the daily log totals are projections of those events, applied
+# incrementally as each event is recorded. An undo is an event too, pointing
+# at the practice event it cancels.
+#
+# The projection runs in the request that records the event rather than in
+# an asynchronous projector: the tap answers with the new practice count and
+# the next reads must already see it, and with WRITE_BEHIND the progress and
+# daily log updates are coalesced in memory, so the tap costs the event
+# insert alone. There is no checkpoint to replay from: an event whose
+# projection was lost to a crash stays in the history without being counted,
+# and counts recorded before the log existed have no events to rebuild from.
+
+def practice_event_projection(event: dict) -> dict:
+    """Progress update operators that apply one practice event"""
+    lesson_key = str(event["lesson_id"])
+    return {
+        "$inc": {f"{event['session_type']}.practice_counts.{lesson_key}": 1},
+        "$set": {f"{event['session_type']}.last_practiced.{lesson_key}": event["date"]},
+        "$addToSet": {"practice_dates": event["date"]},
+    }
+
+async def record_practice_event(username: str, session_type: str, lesson_id: int, date: str, duration_sec: int = 0, ts: datetime = None) -> dict:
+    """Append one practice event"""
+    event = {
+        "username": username,
+        "kind": "practice",
+        "session_type": session_type,
+        "lesson_id": lesson_id,
+        "date": date,
+        "ts": ts or datetime.utcnow(),
+        "duration_sec": duration_sec,
+    }
+    await db.practice_events.insert_one(event)
+    return event
+
+async def open_practice_events(username: str, session_type: str, lesson_id: int, limit: int) -> list:
+    """Newest practice events of a lesson that haven't been undone"""
+    lesson_filter = {"username": username, "session_type": session_type, "lesson_id": lesson_id}
+    undone = set(await db.practice_events.distinct("undoes", {**lesson_filter, "kind": "undo"}))
+    events = []
+    cursor = db.practice_events.find({**lesson_filter, "kind": "practice"}).sort([("ts", -1), ("_id", -1)])
+    async for event in cursor:
+        if event["_id"] not in undone:
+            events.append(event)
+            if len(events) >= limit:
+                break
+    return events
+
+# ============== LESSON NOTES ==============
+# Notes live in lesson_notes, one document per (username, session_type,
+# lesson_id), so the progress document doesn't grow with them. Clients load
+# them through /progress/notes/... when a lesson is shown.
+
+def lesson_notes_write(username: str, session_type: str, lesson_id: int, notes: str):
+    """Upsert of a lesson's notes (empty notes delete the document)"""
+    key = {"username": username, "session_type": session_type, "lesson_id": lesson_id}
+    if not notes:
+        return DeleteOne(key)
+    return UpdateOne(key, {"$set": {"notes": notes, "updated_at": datetime.utcnow()}}, upsert=True)
+
+def split_lesson_notes(progress: dict) -> list:
+    """Remove the notes embedded in a progress document (older format) and
+    return them as lesson_notes documents"""
+    notes = []
+    for session_type, session_data in progress.items():
+        if not isinstance(session_data, dict) or "notes" not in session_data:
+            continue
+        for lesson_key, text in (session_data.pop("notes") or {}).items():
+            if text and str(lesson_key).isdigit():
+                notes.append({
+                    "username": progress["username"],
+                    "session_type": session_type,
+                    "lesson_id": int(lesson_key),
+                    "notes": text,
+                    "updated_at": datetime.utcnow(),
+                })
+    return notes
+
+async def move_lesson_notes(progress: dict):
+    """Move the notes embedded in one progress document to lesson_notes
+    (notes written since then are kept)"""
+    sessions = [key for key, value in progress.items() if isinstance(value, dict) and "notes" in value]
+    if not sessions:
+        return
+    notes = split_lesson_notes(progress)
+    if notes:
+        await db.lesson_notes.bulk_write([
+            UpdateOne({k: note[k] for k in ("username", "session_type", "lesson_id")}, {"$setOnInsert": note}, upsert=True)
+            for note in notes
+        ], ordered=False)
+    await db.progress.update_one(
+        {"_id": progress["_id"]},
+        {"$unset": {f"{session_type}.notes": "" for session_type in sessions}},
+    )
+
+async def migrate_lesson_notes(marker: dict):
+    """Move of the notes embedded in progress documents to lesson_notes
+    (moved documents have nothing left to move, so a rerun resumes)"""
+    async for progress in db.progress.find():
+        await move_lesson_notes(progress)
+
+async def ensure_lesson_notes_moved(username: str):
+    """Move the user's embedded notes before they are read, until the
+    migration has finished"""
+    if "lesson_notes" in FINISHED_MIGRATIONS:
+        return
+    progress = await db.progress.find_one({"username": username})
+    if progress:
+        await move_lesson_notes(progress)
+
+# ============== WARMUP STORAGE ==============
+# A warmup day stores only the ids of the completed items of the seed
+# WARMUP_CHECKLIST ({username, date, completed_ids}); the API still returns
+# the full checklist.
+
+WARMUP_ITEM_IDS = {item["id"] for item in WARMUP_CHECKLIST}
+
+def warmup_completed_ids(warmup: dict) -> set:
+    if "completed_ids" in warmup:
+        return set(warmup["completed_ids"])
+    # Days stored before the compact format kept the whole checklist
+    return {item["id"] for item in warmup.get("checklist", []) if item.get("completed")}
+
+def warmup_view(warmup: Optional[dict]) -> Optional[dict]:
+    """A stored warmup day in the checklist shape the API returns"""
+    if warmup is None:
+        return None
+    completed = warmup_completed_ids(warmup)
+    return {
+        "username": warmup["username"],
+        "date": warmup["date"],
+        "checklist": [{"id": item["id"], "text": item["text"], "completed": item["id"] in completed} for item in WARMUP_CHECKLIST],
+    }
+
+def warmup_toggle_updates(completed: Dict[int, bool]) -> list:
+    """Update documents setting the completed state of some items (one per operator)"""
+    checked = sorted(item_id for item_id, done in completed.items() if done)
+    unchecked = sorted(item_id for item_id, done in completed.items() if not done)
+    updates = []
+    if checked:
+        updates.append({"$addToSet": {"completed_ids": {"$each": checked}}})
+    if unchecked:
+        updates.append({"$pull": {"completed_ids": {"$in": unchecked}}})
+    return updates
+
+def warmup_conversion(warmup: dict) -> UpdateOne:
+    """Rewrite of a day stored with the whole checklist into completed_ids"""
+    return UpdateOne(
+        {"_id": warmup["_id"], "checklist": {"$exists": True}},
+        {"$set": {"completed_ids": sorted(warmup_completed_ids(warmup))}, "$unset": {"checklist": ""}},
+    )
+
+async def convert_warmup_checklists(username: str, dates: List[str]):
+    """Convert these days before toggling them, until the migration has finished
+    (adding to completed_ids of an old day would hide its earlier checks)"""
+    if "warmup_completed_ids" in FINISHED_MIGRATIONS:
+        return
+    old = await db.warmups.find({"username": username, "date": {"$in": dates}, "checklist": {"$exists": True}}).to_list(None)
+    if old:
+        await db.warmups.bulk_write([warmup_conversion(w) for w in old], ordered=False)
+
+async def migrate_warmup_checklists(marker: dict):
+    """Conversion of stored checklists to completed_ids (converted days drop
+    out of the query, so an interrupted run resumes where it stopped), then
+    the unique (username, date) index, merging days an upsert race duplicated"""
+    requests = []
+    async for warmup in db.warmups.find({"checklist": {"$exists": True}}):
+        requests.append(warmup_conversion(warmup))
+        if len(requests) >= 1000:
+            await db.warmups.bulk_write(requests, ordered=False)
+            requests = []
+    if requests:
+        await db.warmups.bulk_write(requests, ordered=False)
+    duplicated = db.warmups.aggregate([
+        {"$group": {"_id": {"username": "$username", "date": "$date"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    async for day in duplicated:
+        days = await db.warmups.find({"_id": {"$in": day["ids"]}}).to_list(None)
+        completed = set().union(*(warmup_completed_ids(w) for w in days))
+        await db.warmups.update_one({"_id": days[0]["_id"]}, {"$set": {"completed_ids": sorted(completed)}})
+        await db.warmups.delete_many({"_id": {"$in": [w["_id"] for w in days[1:]]}})
+    await db.warmups.create_index([("username", 1), ("date", 1)], unique=True)
+
+async def mark_practice_date(username: str, date: str):
+    """Add a practice day, and set the first practice date if unset, in one round trip"""
+    await db.progress.bulk_write([
+        UpdateOne({"username": username}, {"$addToSet": {"practice_dates": date}}),
+        UpdateOne({"username": username, "first_practice_date": None}, {"$set": {"first_practice_date": date}}),
+    ], ordered=False)
+
+# ============== SESSION TIME SERIES ==============
+# Practice time is also written as points {ts, meta: {username, session_type},
+# duration_sec} into a time-series collection, so trends over years are
+# bucketed by the database instead of unpacking every daily log.
+
+SESSION_TIME = "session_time"
+ANALYTICS_BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+
+async def ensure_session_time_collection():
+    """Create the time-series collection (MongoDB 5.0+), or a regular one where unsupported"""
+    if SESSION_TIME not in await db.list_collection_names():
+        try:
+            await db.create_collection(
+                SESSION_TIME,
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "minutes"},
+            )
+        except CollectionInvalid:
+            pass  # another worker created it first
+        except Exception as e:
+            logger.info(f"{SESSION_TIME} stored as a regular collection ({e})")
+    await db[SESSION_TIME].create_index([("meta.username", 1), ("ts", 1)])
+
+async def record_session_time(username: str, session_type: str, time_sec: int, ts: datetime = None):
+    """Add a point (buffered along with the daily log update under write-behind)"""
+    point = {
+        "ts": ts or datetime.utcnow(),
+        "meta": {"username": username, "session_type": session_type},
+        "duration_sec": time_sec,
+    }
+    if WRITE_BEHIND.enabled:
+        WRITE_BEHIND.append(SESSION_TIME, point)
+    else:
+        await db[SESSION_TIME].insert_one(point)
+
+def session_time_points(log: dict) -> list:
+    """Points for a daily log written before the time series existed.
+
+    Only the day is known, so they sit at noon UTC, which falls on the same
+    date in the timezones analytics group by, and are flagged to be left out
+    of time-of-day analytics."""
+    noon = datetime.strptime(log["date"], "%Y-%m-%d") + timedelta(hours=12)
+    return [
+        {
+            "ts": noon,
+            "meta": {"username": log["username"], "session_type": session_type},
+            "duration_sec": time_sec,
+            "backfilled": True,
+        }
+        for session_type, time_sec in (log.get("session_times") or {}).items()
+        if time_sec
+    ]
+
+BACKFILL_BATCH = 500
+
+async def backfill_session_time(marker: dict):
+    """Copy the daily log times recorded before the time series existed.
+
+    Logs are copied in _id order and the last copied one is kept in the
+    marker, so a resumed run continues where the last one stopped. Points
+    carry their log's _id, which lets the first batch after a restart skip
+    what an interrupted run already wrote. Days after the first run are
+    fully covered by live points; on that day itself only the time not yet
+    recorded live is copied."""
+    await ensure_session_time_collection()
+    cutoff_day = marker["started_at"].strftime("%Y-%m-%d")
+    query = {"session_times": {"$exists": True}, "date": {"$lte": cutoff_day}}
+    if marker.get("checkpoint") is not None:
+        query["_id"] = {"$gt": marker["checkpoint"]}
+
+    async def copy(logs: list, skip_written: bool):
+        points = []
+        for log in logs:
+            live = await live_session_seconds(log["username"], log["date"]) if log["date"] == cutoff_day else {}
+            for point in session_time_points(log):
+                point["duration_sec"] -= live.get(point["meta"]["session_type"], 0)
+                if point["duration_sec"] > 0:
+                    point["log_id"] = log["_id"]
+                    points.append(point)
+        if skip_written:
+            written = {
+                (p["log_id"], p["meta"]["session_type"])
+                async for p in db[SESSION_TIME].find({"log_id": {"$in": [log["_id"] for log in logs]}}, {"log_id": 1, "meta": 1})
+            }
+            points = [p for p in points if (p["log_id"], p["meta"]["session_type"]) not in written]
+        if points:
+            await db[SESSION_TIME].insert_many(points)
+        await db.migrations.update_one({"_id": marker["_id"]}, {"$set": {
+            "checkpoint": logs[-1]["_id"], "lease_until": datetime.utcnow() + MIGRATION_LEASE,
+        }})
+
+    batch, first = [], True
+    async for log in db.daily_logs.find(query).sort("_id", 1):
+        batch.append(log)
+        if len(batch) >= BACKFILL_BATCH:
+            await copy(batch, first)
+            batch, first = [], False
+    if batch:
+        await copy(batch, first)
+
+async def live_session_seconds(username: str, date: str) -> dict:
+    """Seconds per session already recorded as live points on one day"""
+    day = datetime.strptime(date, "%Y-%m-%d")
+    pipeline = [
+        {"$match": {"meta.username": username, "ts": {"$gte": day, "$lt": day + timedelta(days=1)}, "backfilled": {"$ne": True}}},
+        {"$group": {"_id": "$meta.session_type", "total": {"$sum": "$duration_sec"}}},
+    ]
+    return {row["_id"]: row["total"] async for row in db[SESSION_TIME].aggregate(pipeline)}
+
+def analytics_match(username: str, start: Optional[str], end: Optional[str], session_type: Optional[str], tz: ZoneInfo) -> dict:
+    """$match for one user's points between the local dates start and end (inclusive)"""
+    match = {"meta.username": username}
+    if session_type:
+        match["meta.session_type"] = session_type
+    ts = {}
+    try:
+        if start:
+            ts["$gte"] = local_midnight_utc(start, tz)
+        if end:
+            ts["$lt"] = local_midnight_utc(end, tz) + timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida")
+    if ts:
+        match["ts"] = ts
+    return match
+
+def local_midnight_utc(date: str, tz: ZoneInfo) -> datetime:
+    local = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=tz)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Fuso horário inválido")
+
+def date_part(operator: str, tz_name: str, **options) -> dict:
+    """Date aggregation operator in the requested timezone (UTC needs no option)"""
+    if tz_name != "UTC":
+        options["timezone"] = tz_name
+    return {operator: {"date": "$ts", **options} if options else "$ts"}
+
 # ============== ROUTES ==============
 
 @api_router.get("/")
@@ -407,6 +1359,7 @@ async def login(request: LoginRequest, req: Request):
             {"username": request.username},
             {"$set": {"first_login_at": datetime.utcnow()}}
         )
+        await INVALIDATION_BUS.publish("users", request.username)
     
     access_token = create_access_token(data={"sub": request.username})
     return TokenResponse(
@@ -442,6 +1395,7 @@ async def change_password(request: ChangePasswordRequest, user: dict = Depends(g
             "must_change_password": False
         }}
     )
+    await INVALIDATION_BUS.publish("users", user["username"])
     return {"message": "Senha alterada com sucesso"}
 
 @api_router.post("/auth/first-login-password")
@@ -462,6 +1416,7 @@ async def first_login_password(request: FirstLoginPasswordRequest, user: dict =
             "must_change_password": False
         }}
     )
+    await INVALIDATION_BUS.publish("users", user["username"])
     return {"message": "Senha definida com sucesso"}
 
 @api_router.get("/auth/verify")
@@ -478,40 +1433,15 @@ async def verify_token(user: dict = Depends(get_current_user)):
 @api_router.get("/session-types")
 async def get_session_types():
     """Get all session types with their configuration"""
-    settings = await db.settings.find_one({"_id": "app_settings"})
-    durations = settings.get("session_durations", {}) if settings else {}
-
-    all_lessons = await get_all_lessons_merged()
-    sessions = []
-    for s in SESSION_TYPES:
-        session = s.copy()
-        session["duration_sec"] = durations.get(s["id"], s["default_duration_sec"])
-        session["total_lessons"] = len(all_lessons.get(s["id"], [])) if s["type"] == "progressive" else 0
-        sessions.append(session)
-
+    sessions, _ = await get_session_views()
     return {"sessions": sessions, "total_time_sec": 3600}
 
 @api_router.get("/session-info")
 async def get_session_info():
     """Get info about all sessions (legacy endpoint)"""
-    settings = await db.settings.find_one({"_id": "app_settings"})
-    durations = settings.get("session_durations", {}) if settings else {}
+    _, sessions = await get_session_views()
     all_lessons = await get_all_lessons_merged()
 
-    sessions = []
-    for s in SESSION_TYPES:
-        duration = durations.get(s["id"], s["default_duration_sec"])
-        sessions.append({
-            "id": s["id"],
-            "name": s["name"],
-            "icon": s["icon"],
-            "time": f"{sum(durations.get(st['id'], st['default_duration_sec']) for st in SESSION_TYPES[:s['order']-1])//60:02d}:00–{(sum(durations.get(st['id'], st['default_duration_sec']) for st in SESSION_TYPES[:s['order']-1]) + duration)//60:02d}:00",
-            "duration": duration // 60,
-            "duration_sec": duration,
-            "lessons": len(all_lessons.get(s["id"], [])) if s["type"] == "progressive" else 0,
-            "type": s["type"]
-        })
-
     tips = {s["id"]: s["tip"] for s in SESSION_TYPES}
     total = sum(len(lessons) for lessons in all_lessons.values())
 
@@ -522,29 +1452,20 @@ async def get_session_info():
     }
 
 @api_router.get("/lessons/{session_type}")
-async def get_lessons(session_type: str):
-    """Get all lessons for a session type"""
-    all_lessons = await get_all_lessons_merged()
-    if session_type not in all_lessons:
+async def get_lessons(session_type: str, tag: Optional[str] = None):
+    """Get all lessons for a session type, optionally only those with a tag"""
+    catalog = await get_catalog()
+    if session_type not in catalog.views:
         raise HTTPException(status_code=404, detail="Tipo de sessão não encontrado")
 
     session = next((s for s in SESSION_TYPES if s["id"] == session_type), None)
     tip = session["tip"] if session else ""
 
-    # Get all methods (seed + custom) for method info
-    all_methods = await get_all_methods_merged()
-    methods_map = {m["id"]: m for m in all_methods}
-
-    # Add method info to lessons
-    lessons = []
-    for lesson in all_lessons[session_type]:
-        lesson_copy = lesson.copy()
-        method_id = lesson_copy.get("method_id") or lesson_copy.get("custom_method_id")
-        if method_id and method_id in methods_map:
-            method = methods_map[method_id]
-            lesson_copy["method"] = method["name"]
-            lesson_copy["method_author"] = method["author"]
-        lessons.append(lesson_copy)
+    # Lessons already carry method info; they are shared with the catalog cache
+    if tag:
+        lessons = catalog.lessons_with_tag(session_type, tag)
+    else:
+        lessons = catalog.views[session_type]
 
     return {
         "session_type": session_type,
@@ -553,6 +1474,42 @@ async def get_lessons(session_type: str):
         "tip": tip
     }
 
+@api_router.get("/lessons/{session_type}/{lesson_id}")
+async def get_lesson(session_type: str, lesson_id: int):
+    """Get a single lesson (seed or custom) with its method info"""
+    catalog = await get_catalog()
+    if session_type not in catalog.lessons:
+        raise HTTPException(status_code=404, detail="Tipo de sessão não encontrado")
+
+    lesson = catalog.get_lesson(session_type, lesson_id)
+    if lesson is None:
+        raise HTTPException(status_code=404, detail="Lição não encontrada")
+
+    session = next((s for s in SESSION_TYPES if s["id"] == session_type), None)
+    return {
+        "session_type": session_type,
+        "lesson": lesson,
+        "tip": session["tip"] if session else ""
+    }
+
+@api_router.get("/search")
+async def search_lessons(
+    q: str = Query(..., max_length=200),
+    session_type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Full-text search over lesson titles, instructions, tags and methods"""
+    await get_catalog()  # brings custom lessons in the index up to date
+    total, results = SEARCH_INDEX.search(q, session_type=session_type, limit=limit)
+    return {
+        "query": q,
+        "results": [
+            {"session_type": key[0], "score": score, "lesson": lesson}
+            for score, key, lesson in results
+        ],
+        "total": total,
+    }
+
 @api_router.get("/methods")
 async def get_methods():
     """Get all methods/authors (seed + custom)"""
@@ -575,84 +1532,107 @@ async def get_warmup_checklist():
 
 # ============== PROGRESS ROUTES ==============
 
-@api_router.get("/progress")
-async def get_progress(user: dict = Depends(get_current_user)):
-    """Get user progress"""
-    progress = await db.progress.find_one({"username": user["username"]})
+async def progress_state(username: str) -> dict:
+    """The user's progress as returned by GET /progress"""
+    progress, warmup = await gather_all(
+        db.progress.find_one({"username": username}),
+        db.warmups.find_one({"username": username, "date": get_today_string()}),
+    )
     if not progress:
-        progress = await init_user_progress(user["username"])
-    
-    today = get_today_string()
-    warmup = await db.warmups.find_one({"username": user["username"], "date": today})
+        progress = await init_user_progress(username)
+    warmup = warmup_view(warmup)
     
     return {
-        "scales": progress.get("scales", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
-        "bow": progress.get("bow", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
-        "speed": progress.get("speed", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
-        "positions": progress.get("positions", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
-        "studies": progress.get("studies", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
-        "repertoire": progress.get("repertoire", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}, "notes": {}}),
+        "scales": progress.get("scales", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
+        "bow": progress.get("bow", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
+        "speed": progress.get("speed", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
+        "positions": progress.get("positions", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
+        "studies": progress.get("studies", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
+        "repertoire": progress.get("repertoire", {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}),
         "warmup_today": warmup,
         "practice_dates": progress.get("practice_dates", []),
         "first_practice_date": progress.get("first_practice_date"),
     }
 
+@api_router.get("/progress")
+async def get_progress(user: dict = Depends(get_synced_user)):
+    """Get user progress"""
+    return await progress_state(user["username"])
+
 @api_router.post("/progress/practice")
 async def log_practice(request: PracticeLogRequest, user: dict = Depends(get_current_user)):
     """Log a practice session for a lesson"""
-    all_lessons = await get_all_lessons_merged()
+    with span("catalog"):
+        all_lessons = await get_all_lessons_merged()
     if request.session_type not in all_lessons:
         raise HTTPException(status_code=400, detail="Tipo de sessão inválido")
     
     today = get_today_string()
-    progress = await db.progress.find_one({"username": user["username"]})
-    
-    if not progress:
-        progress = await init_user_progress(user["username"])
-    
-    session_data = progress.get(request.session_type, {
-        "current_lesson": 1,
-        "completed_lessons": [],
-        "practice_counts": {},
-        "last_practiced": {},
-        "notes": {}
-    })
-    
+    username = user["username"]
     lesson_key = str(request.lesson_id)
-    session_data["practice_counts"][lesson_key] = session_data.get("practice_counts", {}).get(lesson_key, 0) + 1
-    session_data["last_practiced"][lesson_key] = today
-    
-    # Add today to practice dates if not already there
-    practice_dates = progress.get("practice_dates", [])
-    if today not in practice_dates:
-        practice_dates.append(today)
-    
-    # Set first practice date if not set
-    first_practice_date = progress.get("first_practice_date")
-    if not first_practice_date:
-        first_practice_date = today
-    
-    await db.progress.update_one(
-        {"username": user["username"]},
-        {"$set": {
-            request.session_type: session_data,
-            "practice_dates": practice_dates,
-            "first_practice_date": first_practice_date
-        }}
-    )
+    count_field = f"{request.session_type}.practice_counts.{lesson_key}"
+    with span("event"):
+        event = await record_practice_event(username, request.session_type, request.lesson_id, today, request.duration_sec)
+    # Atomic operators instead of rewriting the session, so concurrent taps
+    # don't overwrite each other and the updates can be coalesced
+    progress_update = practice_event_projection(event)
+    projection = {count_field: 1, "first_practice_date": 1}
+    
+    if WRITE_BEHIND.enabled:
+        with span("progress_read"):
+            progress, pending = await WRITE_BEHIND.read_with_pending(
+                lambda: db.progress.find_one({"username": username}, projection),
+                "progress", {"username": username}, count_field,
+            )
+            if not progress:
+                progress = await init_user_progress(username)
+        if not progress.get("first_practice_date"):
+            progress_update["$set"]["first_practice_date"] = today
+        WRITE_BEHIND.add("progress", {"username": username}, progress_update)
+        stored = progress.get(request.session_type, {}).get("practice_counts", {}).get(lesson_key, 0)
+        practice_count = stored + pending + progress_update["$inc"][count_field]
+    else:
+        with span("progress_write"):
+            progress = await db.progress.find_one_and_update(
+                {"username": username}, progress_update,
+                projection=projection, return_document=ReturnDocument.AFTER,
+            )
+            if not progress:
+                await init_user_progress(username)
+                progress = await db.progress.find_one_and_update(
+                    {"username": username}, progress_update,
+                    projection=projection, return_document=ReturnDocument.AFTER,
+                )
+            # Set first practice date if not set
+            if not progress.get("first_practice_date"):
+                await db.progress.update_one(
+                    {"username": username, "first_practice_date": None},
+                    {"$set": {"first_practice_date": today}},
+                )
+        practice_count = progress[request.session_type]["practice_counts"][lesson_key]
     
     # Update daily log
-    await update_daily_log(user["username"], today, request.session_type)
+    with span("daily_log"):
+        await update_daily_log(username, today, request.session_type, request.duration_sec)
+    
+    await push_live(username, {
+        "type": "practice",
+        "session_type": request.session_type,
+        "lesson_id": request.lesson_id,
+        "practice_count": practice_count,
+        "date": today,
+        "duration_sec": request.duration_sec,
+    })
     
     return {
         "message": "Prática registrada",
         "lesson_id": request.lesson_id,
-        "practice_count": session_data["practice_counts"][lesson_key],
+        "practice_count": practice_count,
         "date": today
     }
 
 @api_router.post("/progress/undo-practice")
-async def undo_practice(request: PracticeLogRequest, user: dict = Depends(get_current_user)):
+async def undo_practice(request: PracticeLogRequest, user: dict = Depends(get_synced_user)):
     """Undo the last practice log for a lesson (decrements count, floor at 0)."""
     all_lessons = await get_all_lessons_merged()
     if request.session_type not in all_lessons:
@@ -662,39 +1642,73 @@ async def undo_practice(request: PracticeLogRequest, user: dict = Depends(get_cu
     if not progress:
         raise HTTPException(status_code=404, detail="Progresso não encontrado")
 
-    session_data = progress.get(request.session_type, {
-        "current_lesson": 1,
-        "completed_lessons": [],
-        "practice_counts": {},
-        "last_practiced": {},
-        "notes": {},
-    })
-
     lesson_key = str(request.lesson_id)
-    current_count = session_data.get("practice_counts", {}).get(lesson_key, 0)
+    count_field = f"{request.session_type}.practice_counts.{lesson_key}"
+    last_field = f"{request.session_type}.last_practiced.{lesson_key}"
+    current_count = progress.get(request.session_type, {}).get("practice_counts", {}).get(lesson_key, 0)
 
     if current_count <= 0:
         raise HTTPException(status_code=400, detail="Não há prática para desfazer")
 
-    new_count = current_count - 1
-    session_data["practice_counts"][lesson_key] = new_count
-
-    if new_count == 0:
-        session_data.get("last_practiced", {}).pop(lesson_key, None)
-
-    await db.progress.update_one(
-        {"username": user["username"]},
-        {"$set": {request.session_type: session_data}},
+    # Counts recorded before the event log existed have no events; those are
+    # only decremented
+    events = await open_practice_events(user["username"], request.session_type, request.lesson_id, limit=2)
+    update = {"$inc": {count_field: -1}}
+    if current_count == 1:
+        update["$unset"] = {last_field: ""}
+    elif len(events) > 1:
+        update["$set"] = {last_field: events[1]["date"]}
+
+    progress = await db.progress.find_one_and_update(
+        {"username": user["username"], count_field: {"$gt": 0}},
+        update,
+        projection={count_field: 1},
+        return_document=ReturnDocument.AFTER,
     )
+    if not progress:
+        raise HTTPException(status_code=400, detail="Não há prática para desfazer")
+    if events:
+        await db.practice_events.insert_one({
+            "username": user["username"],
+            "kind": "undo",
+            "session_type": request.session_type,
+            "lesson_id": request.lesson_id,
+            "undoes": events[0]["_id"],
+            "ts": datetime.utcnow(),
+        })
+
+    practice_count = progress[request.session_type]["practice_counts"][lesson_key]
+    await push_live(user["username"], {
+        "type": "practice",
+        "session_type": request.session_type,
+        "lesson_id": request.lesson_id,
+        "practice_count": practice_count,
+    })
 
     return {
         "message": "Prática desfeita",
         "lesson_id": request.lesson_id,
-        "practice_count": new_count,
+        "practice_count": practice_count,
+    }
+
+@api_router.get("/progress/history/{session_type}/{lesson_id}")
+async def get_lesson_history(session_type: str, lesson_id: int, user: dict = Depends(get_current_user), limit: int = Query(100, ge=1, le=1000)):
+    """Practice history of one lesson, newest first"""
+    all_lessons = await get_all_lessons_merged()
+    if session_type not in all_lessons:
+        raise HTTPException(status_code=400, detail="Tipo de sessão inválido")
+    events = await open_practice_events(user["username"], session_type, lesson_id, limit)
+    return {
+        "session_type": session_type,
+        "lesson_id": lesson_id,
+        "events": [
+            {"date": e["date"], "ts": e["ts"].isoformat(), "duration_sec": e.get("duration_sec", 0)}
+            for e in events
+        ],
     }
 
 @api_router.post("/progress/advance")
-async def advance_lesson(request: AdvanceLessonRequest, user: dict = Depends(get_current_user)):
+async def advance_lesson(request: AdvanceLessonRequest, user: dict = Depends(get_synced_user)):
     """Advance to next or previous lesson"""
     all_lessons = await get_all_lessons_merged()
     if request.session_type not in all_lessons:
@@ -711,7 +1725,6 @@ async def advance_lesson(request: AdvanceLessonRequest, user: dict = Depends(get
         "completed_lessons": [],
         "practice_counts": {},
         "last_practiced": {},
-        "notes": {}
     })
     
     current = session_data.get("current_lesson", 1)
@@ -734,6 +1747,13 @@ async def advance_lesson(request: AdvanceLessonRequest, user: dict = Depends(get
         {"$set": {request.session_type: session_data}}
     )
     
+    await push_live(user["username"], {
+        "type": "lesson",
+        "session_type": request.session_type,
+        "current_lesson": current,
+        "completed_lessons": completed,
+    })
+    
     return {
         "message": f"Agora na lição {current}",
         "current_lesson": current,
@@ -742,7 +1762,7 @@ async def advance_lesson(request: AdvanceLessonRequest, user: dict = Depends(get
     }
 
 @api_router.post("/progress/jump")
-async def jump_to_lesson(session_type: str, lesson_id: int, user: dict = Depends(get_current_user)):
+async def jump_to_lesson(session_type: str, lesson_id: int, user: dict = Depends(get_synced_user)):
     """Jump to a specific lesson"""
     all_lessons = await get_all_lessons_merged()
     if session_type not in all_lessons:
@@ -762,7 +1782,6 @@ async def jump_to_lesson(session_type: str, lesson_id: int, user: dict = Depends
         "completed_lessons": [],
         "practice_counts": {},
         "last_practiced": {},
-        "notes": {}
     })
     
     session_data["current_lesson"] = lesson_id
@@ -781,6 +1800,8 @@ async def jump_to_lesson(session_type: str, lesson_id: int, user: dict = Depends
         "timestamp": datetime.utcnow()
     })
     
+    await push_live(user["username"], {"type": "lesson", "session_type": session_type, "current_lesson": lesson_id})
+    
     return {
         "message": f"Pulou para lição {lesson_id}",
         "current_lesson": lesson_id
@@ -793,129 +1814,112 @@ async def update_notes(request: UpdateNotesRequest, user: dict = Depends(get_cur
     if request.session_type not in all_lessons:
         raise HTTPException(status_code=400, detail="Tipo de sessão inválido")
     
-    progress = await db.progress.find_one({"username": user["username"]})
-    
-    if not progress:
-        progress = await init_user_progress(user["username"])
+    # An embedded note moved later would overwrite this write
+    await ensure_lesson_notes_moved(user["username"])
+    await db.lesson_notes.bulk_write([
+        lesson_notes_write(user["username"], request.session_type, request.lesson_id, request.notes)
+    ])
     
-    session_data = progress.get(request.session_type, {
-        "current_lesson": 1,
-        "completed_lessons": [],
-        "practice_counts": {},
-        "last_practiced": {},
-        "notes": {}
+    await push_live(user["username"], {
+        "type": "notes",
+        "session_type": request.session_type,
+        "lesson_id": request.lesson_id,
+        "notes": request.notes,
     })
     
-    notes = session_data.get("notes", {})
-    notes[str(request.lesson_id)] = request.notes
-    session_data["notes"] = notes
-    
-    await db.progress.update_one(
-        {"username": user["username"]},
-        {"$set": {request.session_type: session_data}}
-    )
-    
     return {"message": "Anotações salvas"}
 
+@api_router.get("/progress/notes/{session_type}")
+async def get_session_notes(session_type: str, user: dict = Depends(get_current_user)):
+    """Notes of every lesson of a session that has them"""
+    await ensure_lesson_notes_moved(user["username"])
+    cursor = db.lesson_notes.find(
+        {"username": user["username"], "session_type": session_type},
+        {"_id": 0, "lesson_id": 1, "notes": 1},
+    )
+    return {"notes": {str(note["lesson_id"]): note["notes"] async for note in cursor}}
+
+@api_router.get("/progress/notes/{session_type}/{lesson_id}")
+async def get_lesson_notes(session_type: str, lesson_id: int, user: dict = Depends(get_current_user)):
+    """Notes of one lesson ("" when there are none)"""
+    await ensure_lesson_notes_moved(user["username"])
+    note = await db.lesson_notes.find_one(
+        {"username": user["username"], "session_type": session_type, "lesson_id": lesson_id},
+        {"_id": 0, "notes": 1},
+    )
+    return {"session_type": session_type, "lesson_id": lesson_id, "notes": note["notes"] if note else ""}
+
 # ============== WARMUP ROUTES ==============
 
+async def toggle_warmup(username: str, date: str, toggle: dict) -> dict:
+    """Apply a toggle to the day, creating it if needed"""
+    day = {"username": username, "date": date}
+    try:
+        return await db.warmups.find_one_and_update(day, toggle, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # A concurrent toggle created the day first
+        return await db.warmups.find_one_and_update(day, toggle, return_document=ReturnDocument.AFTER)
+
 @api_router.post("/warmup/check")
 async def update_warmup_check(request: WarmupCheckRequest, user: dict = Depends(get_current_user)):
     """Update warmup checklist item"""
+    if request.item_id not in WARMUP_ITEM_IDS:
+        raise HTTPException(status_code=400, detail="Item inválido")
     today = get_today_string()
-    warmup = await db.warmups.find_one({"username": user["username"], "date": today})
-    
-    if not warmup:
-        warmup = {
-            "username": user["username"],
-            "date": today,
-            "checklist": [{"id": item["id"], "text": item["text"], "completed": False} for item in WARMUP_CHECKLIST]
-        }
-        await db.warmups.insert_one(warmup)
-    
-    checklist = warmup["checklist"]
-    for item in checklist:
-        if item["id"] == request.item_id:
-            item["completed"] = request.completed
-            break
-    
-    await db.warmups.update_one(
-        {"username": user["username"], "date": today},
-        {"$set": {"checklist": checklist}}
+    username = user["username"]
+    toggle = warmup_toggle_updates({request.item_id: request.completed})[0]
+    await convert_warmup_checklists(username, [today])
+    
+    # The toggle, the practice day and the daily log are independent writes
+    warmup, _, _ = await gather_all(
+        toggle_warmup(username, today, toggle),
+        mark_practice_date(username, today),
+        update_daily_log(username, today, "warmup"),
     )
+    checklist = warmup_view(warmup)["checklist"]
     
-    # Update practice dates
-    progress = await db.progress.find_one({"username": user["username"]})
-    if progress:
-        practice_dates = progress.get("practice_dates", [])
-        if today not in practice_dates:
-            practice_dates.append(today)
-            first_practice_date = progress.get("first_practice_date") or today
-            await db.progress.update_one(
-                {"username": user["username"]},
-                {"$set": {"practice_dates": practice_dates, "first_practice_date": first_practice_date}}
-            )
-    
-    # Update daily log
-    await update_daily_log(user["username"], today, "warmup")
+    await push_live(username, {"type": "warmup", "date": today, "checklist": checklist})
     
     return {"message": "Checklist atualizado", "checklist": checklist}
 
 # ============== DAILY LOG ROUTES ==============
 
 async def update_daily_log(username: str, date: str, session_type: str, time_sec: int = 0):
-    """Update or create daily log"""
-    log = await db.daily_logs.find_one({"username": username, "date": date})
-    
-    if not log:
-        log = {
-            "username": username,
-            "date": date,
-            "studied": True,
-            "total_time_sec": 0,
-            "session_times": {},
-            "sessions_practiced": [],
-            "created_at": datetime.utcnow()
-        }
-        await db.daily_logs.insert_one(log)
-    
-    sessions_practiced = log.get("sessions_practiced", [])
-    if session_type not in sessions_practiced:
-        sessions_practiced.append(session_type)
-    
-    session_times = log.get("session_times", {})
-    session_times[session_type] = session_times.get(session_type, 0) + time_sec
-    
-    await db.daily_logs.update_one(
-        {"username": username, "date": date},
-        {"$set": {
-            "studied": True,
-            "sessions_practiced": sessions_practiced,
-            "session_times": session_times,
-            "total_time_sec": sum(session_times.values())
-        }}
-    )
+    """Update or create daily log (one upsert, or buffered with write-behind)"""
+    log_filter = {"username": username, "date": date}
+    update = {
+        "$set": {"studied": True},
+        "$addToSet": {"sessions_practiced": session_type},
+        "$inc": {f"session_times.{session_type}": time_sec, "total_time_sec": time_sec},
+        "$setOnInsert": {"created_at": datetime.utcnow()},
+    }
+    if WRITE_BEHIND.enabled:
+        WRITE_BEHIND.add("daily_logs", log_filter, update, upsert=True)
+    else:
+        await db.daily_logs.update_one(log_filter, update, upsert=True)
+    if time_sec:
+        await record_session_time(username, session_type, time_sec)
 
 @api_router.get("/daily-logs")
-async def get_daily_logs(user: dict = Depends(get_current_user), limit: int = 365):
+async def get_daily_logs(user: dict = Depends(get_synced_user), limit: int = 365):
     """Get daily practice logs"""
     logs = await db.daily_logs.find(
-        {"username": user["username"]}
+        {"username": user["username"]}, {"sync_pending_ops": 0}
     ).sort("date", -1).limit(limit).to_list(limit)
     
     return {"logs": [{k: v for k, v in log.items() if k != "_id"} for log in logs]}
 
 @api_router.get("/daily-logs/{date}")
-async def get_daily_log(date: str, user: dict = Depends(get_current_user)):
+async def get_daily_log(date: str, user: dict = Depends(get_synced_user)):
     """Get specific daily log"""
-    log = await db.daily_logs.find_one({"username": user["username"], "date": date})
+    log = await db.daily_logs.find_one({"username": user["username"], "date": date}, {"sync_pending_ops": 0})
     if not log:
         return {"log": None}
     log.pop("_id", None)
     return {"log": log}
 
 @api_router.post("/daily-logs/{date}/notes")
-async def update_daily_notes(date: str, request: DailyLogRequest, user: dict = Depends(get_current_user)):
+async def update_daily_notes(date: str, request: DailyLogRequest, user: dict = Depends(get_synced_user)):
     """Update daily notes"""
     log = await db.daily_logs.find_one({"username": user["username"], "date": date})
     
@@ -937,6 +1941,8 @@ async def update_daily_notes(date: str, request: DailyLogRequest, user: dict = D
             {"$set": {"notes": request.notes}}
         )
     
+    await push_live(user["username"], {"type": "daily_notes", "date": date, "notes": request.notes})
+    
     return {"message": "Notas salvas"}
 
 @api_router.post("/daily-logs/log-time")
@@ -944,25 +1950,188 @@ async def log_session_time(session_type: str, time_sec: int, user: dict = Depend
     """Log time for a session"""
     today = get_today_string()
     await update_daily_log(user["username"], today, session_type, time_sec)
+    await push_live(user["username"], {"type": "daily_log", "date": today, "session_type": session_type, "time_sec": time_sec})
     return {"message": "Tempo registrado"}
 
+# ============== TIMER HEARTBEAT ROUTES ==============
+# Timers report elapsed time every few seconds. A heartbeat is deduplicated
+# by its per-device sequence number (a retry resends the same seq): the
+# device's document in timer_devices keeps the recent seqs it acknowledged,
+# updated atomically, so a retry is refused by any worker and a heartbeat
+# retried after a later one is still counted once. The time itself is only
+# accumulated in HEARTBEATS.
+
+HEARTBEAT_MAX_DELTA_SEC = 600
+HEARTBEAT_SEQ_WINDOW = 64  # acknowledged seqs kept per device; older ones are refused
+
+async def accept_heartbeat_seq(username: str, device_id: str, seq: int) -> bool:
+    """Acknowledge `seq` for this device; False when it was seen already (or is
+    too far behind the newest one to tell)"""
+    device = {"username": username, "device_id": device_id}
+    update = {
+        "$push": {"acked": {"$each": [seq], "$slice": -HEARTBEAT_SEQ_WINDOW}},
+        "$max": {"seq": seq},
+        "$set": {"last_seen": datetime.utcnow()},
+    }
+    for upsert in (True, False):
+        try:
+            result = await db.timer_devices.update_one(
+                {**device, "acked": {"$ne": seq}, "seq": {"$not": {"$gte": seq + HEARTBEAT_SEQ_WINDOW}}},
+                update,
+                upsert=upsert,
+            )
+        except DuplicateKeyError:
+            # The device document exists but didn't match, or was just created
+            # by a concurrent heartbeat: check again without inserting
+            continue
+        return bool(result.matched_count or result.upserted_id)
+    return False
+
+@api_router.post("/timer/heartbeat")
+async def timer_heartbeat(request: HeartbeatRequest, user: dict = Depends(get_current_user)):
+    """Accumulate practice timer deltas (written to the daily log in the background)"""
+    session_ids = {s["id"] for s in SESSION_TYPES}
+    for session_type, time_sec in request.deltas.items():
+        if session_type not in session_ids:
+            raise HTTPException(status_code=400, detail="Tipo de sessão inválido")
+        if time_sec < 0 or time_sec > HEARTBEAT_MAX_DELTA_SEC:
+            raise HTTPException(status_code=400, detail="Intervalo de tempo inválido")
+    
+    username = user["username"]
+    if not await accept_heartbeat_seq(username, request.device_id, request.seq):
+        return {"accepted": False, "seq": request.seq}
+    
+    now = datetime.utcnow()
+    deltas = {session_type: time_sec for session_type, time_sec in request.deltas.items() if time_sec}
+    if deltas:
+        HEARTBEATS.add("daily_logs", {"username": username, "date": get_today_string()}, {
+            "$set": {"studied": True},
+            "$addToSet": {"sessions_practiced": {"$each": list(deltas)}},
+            "$inc": {
+                **{f"session_times.{session_type}": time_sec for session_type, time_sec in deltas.items()},
+                "total_time_sec": sum(deltas.values()),
+            },
+            "$setOnInsert": {"created_at": now},
+        }, upsert=True)
+        for session_type, time_sec in deltas.items():
+            HEARTBEATS.append(SESSION_TIME, {
+                "ts": now,
+                "meta": {"username": username, "session_type": session_type},
+                "duration_sec": time_sec,
+            })
+    return {"accepted": True, "seq": request.seq}
+
+# ============== LIVE UPDATE ROUTES ==============
+
+@api_router.post("/events/ticket")
+async def create_stream_ticket(user: dict = Depends(get_current_user)):
+    """Single-use ticket, valid for a minute, that opens /api/events?ticket="""
+    if not LIVE_UPDATES:
+        raise HTTPException(status_code=404, detail="Atualizações ao vivo desativadas")
+    ticket = secrets.token_urlsafe(32)
+    await db.stream_tickets.insert_one({
+        "_id": ticket,
+        "username": user["username"],
+        "expires_at": datetime.utcnow() + STREAM_TICKET_TTL,
+    })
+    return {"ticket": ticket, "expires_in": int(STREAM_TICKET_TTL.total_seconds())}
+
+@api_router.get("/events")
+async def live_events(user: dict = Depends(get_stream_user)):
+    """Server-Sent Events stream of the user's progress deltas"""
+    if not LIVE_UPDATES:
+        raise HTTPException(status_code=404, detail="Atualizações ao vivo desativadas")
+    queue = LIVE_HUB.subscribe(user["username"])
+    return StreamingResponse(
+        LIVE_HUB.stream(user["username"], queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ============== ANALYTICS ROUTES ==============
+
+@api_router.get("/analytics/session-time")
+async def get_session_time_analytics(
+    user: dict = Depends(get_synced_user),
+    bucket: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    session_type: Optional[str] = None,
+    tz: str = "UTC",
+):
+    """Practice time per day/week/month, per session type"""
+    if bucket not in ANALYTICS_BUCKET_FORMATS:
+        raise HTTPException(status_code=400, detail="Agrupamento inválido")
+    zone = parse_timezone(tz)
+    pipeline = [
+        {"$match": analytics_match(user["username"], start, end, session_type, zone)},
+        {"$group": {
+            "_id": {
+                "bucket": date_part("$dateToString", tz, format=ANALYTICS_BUCKET_FORMATS[bucket]),
+                "session_type": "$meta.session_type",
+            },
+            "total_sec": {"$sum": "$duration_sec"},
+        }},
+    ]
+    buckets = {}
+    async for row in db[SESSION_TIME].aggregate(pipeline):
+        entry = buckets.setdefault(row["_id"]["bucket"], {"bucket": row["_id"]["bucket"], "total_sec": 0, "sessions": {}})
+        entry["total_sec"] += row["total_sec"]
+        entry["sessions"][row["_id"]["session_type"]] = row["total_sec"]
+    rows = [buckets[key] for key in sorted(buckets)]
+    return {
+        "bucket": bucket,
+        "tz": tz,
+        "buckets": rows,
+        "total_sec": sum(row["total_sec"] for row in rows),
+    }
+
+@api_router.get("/analytics/time-of-day")
+async def get_time_of_day_analytics(
+    user: dict = Depends(get_synced_user),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    session_type: Optional[str] = None,
+    tz: str = "UTC",
+):
+    """Practice time by hour of the day"""
+    zone = parse_timezone(tz)
+    match = analytics_match(user["username"], start, end, session_type, zone)
+    match["backfilled"] = {"$ne": True}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": date_part("$hour", tz),
+            "total_sec": {"$sum": "$duration_sec"},
+            "count": {"$sum": 1},
+        }},
+    ]
+    hours = {row["_id"]: row async for row in db[SESSION_TIME].aggregate(pipeline)}
+    return {
+        "tz": tz,
+        "hours": [
+            {"hour": hour, "total_sec": hours.get(hour, {}).get("total_sec", 0), "count": hours.get(hour, {}).get("count", 0)}
+            for hour in range(24)
+        ],
+    }
+
 # ============== STATS ROUTES ==============
 
 @api_router.get("/stats")
-async def get_stats(user: dict = Depends(get_current_user)):
+async def get_stats(user: dict = Depends(get_synced_user)):
     """Get user statistics"""
-    progress = await db.progress.find_one({"username": user["username"]})
+    progress, all_lessons, logs = await gather_all(
+        db.progress.find_one({"username": user["username"]}),
+        get_all_lessons_merged(),
+        db.daily_logs.find({"username": user["username"]}, {"total_time_sec": 1}).to_list(1000),
+    )
     
     if not progress:
         progress = await init_user_progress(user["username"])
     
-    all_lessons = await get_all_lessons_merged()
-    total_lessons = sum(len(lessons) for lessons in all_lessons.values())
-    completed_lessons = 0
-    
-    for session_type in all_lessons.keys():
-        session_data = progress.get(session_type, {})
-        completed_lessons += len(session_data.get("completed_lessons", []))
+    completion = completion_summary(progress, all_lessons)
+    total_lessons = completion["total_lessons"]
+    completed_lessons = completion["completed_lessons"]
     
     # Calculate level based on Studies progress
     studies_completed = len(progress.get("studies", {}).get("completed_lessons", []))
@@ -971,10 +2140,7 @@ async def get_stats(user: dict = Depends(get_current_user)):
     practice_dates = progress.get("practice_dates", [])
     
     # Calculate total practice time
-    total_time = 0
-    logs = await db.daily_logs.find({"username": user["username"]}).to_list(1000)
-    for log in logs:
-        total_time += log.get("total_time_sec", 0)
+    total_time = sum(log.get("total_time_sec", 0) for log in logs)
     
     return {
         "total_lessons": total_lessons,
@@ -986,24 +2152,18 @@ async def get_stats(user: dict = Depends(get_current_user)):
         "practice_days": len(practice_dates),
         "total_practice_time_sec": total_time,
         "first_practice_date": progress.get("first_practice_date"),
-        "session_progress": {
-            session_type: {
-                "total": len(all_lessons[session_type]),
-                "completed": len(progress.get(session_type, {}).get("completed_lessons", [])),
-                "current": progress.get(session_type, {}).get("current_lesson", 1)
-            }
-            for session_type in all_lessons.keys()
-        }
+        "session_progress": completion["session_progress"]
     }
 
 @api_router.get("/calendar")
-async def get_calendar(user: dict = Depends(get_current_user), year: int = None, month: int = None):
+async def get_calendar(user: dict = Depends(get_synced_user), year: int = None, month: int = None):
     """Get calendar data for practice history"""
-    progress = await db.progress.find_one({"username": user["username"]})
+    # Daily logs add the detail for each practice date
+    progress, logs = await gather_all(
+        db.progress.find_one({"username": user["username"]}),
+        db.daily_logs.find({"username": user["username"]}).to_list(1000),
+    )
     practice_dates = progress.get("practice_dates", []) if progress else []
-    
-    # Get daily logs for more detail
-    logs = await db.daily_logs.find({"username": user["username"]}).to_list(1000)
     logs_by_date = {log["date"]: log for log in logs}
     
     calendar_data = []
@@ -1041,6 +2201,7 @@ async def create_method(request: CreateMethodRequest, user: dict = Depends(get_c
     }
     result = await db.custom_methods.insert_one(method)
     method["_id"] = str(result.inserted_id)
+    await INVALIDATION_BUS.publish("catalog")
 
     return {
         "message": "Método criado com sucesso",
@@ -1082,9 +2243,10 @@ async def update_method(method_id: str, request: UpdateMethodRequest, user: dict
         raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
 
     await db.custom_methods.update_one({"_id": oid}, {"$set": update_data})
+    await INVALIDATION_BUS.publish("catalog")
     return {"message": "Método atualizado com sucesso"}
 
-@api_router.delete("/methods/{method_id}")
+@api_router.delete("/methods/{method_id}", status_code=202)
 async def delete_method(method_id: str, user: dict = Depends(get_current_user)):
     """Delete a custom method and its lessons"""
     try:
@@ -1099,11 +2261,22 @@ async def delete_method(method_id: str, user: dict = Depends(get_current_user)):
     if method.get("created_by") and method["created_by"] != user["username"]:
         raise HTTPException(status_code=403, detail="Você não tem permissão para deletar este método")
 
-    # Delete all custom lessons belonging to this method
-    await db.custom_lessons.delete_many({"custom_method_id": method_id})
-    await db.custom_methods.delete_one({"_id": oid})
+    job = await JOBS.submit("delete_method", user["username"], {"method_id": method_id}, key=method_id)
+    return {"message": "Exclusão do método iniciada", "job_id": job["_id"], "status": job["status"]}
+
+METHOD_DELETE_BATCH = 500
 
-    return {"message": "Método e suas lições deletados com sucesso"}
+async def delete_method_job(job: dict, report) -> dict:
+    """Delete a custom method's lessons in batches, then the method itself"""
+    method_id = job["params"]["method_id"]
+    lesson_ids = [cl["_id"] for cl in await db.custom_lessons.find({"custom_method_id": method_id}, {"_id": 1}).to_list(None)]
+    for start in range(0, len(lesson_ids), METHOD_DELETE_BATCH):
+        await db.custom_lessons.delete_many({"_id": {"$in": lesson_ids[start:start + METHOD_DELETE_BATCH]}})
+        await report(min(start + METHOD_DELETE_BATCH, len(lesson_ids)), len(lesson_ids), "lessons")
+    # Lessons are gone before the method, so a failure never leaves orphans
+    await db.custom_methods.delete_one({"_id": ObjectId(method_id)})
+    await INVALIDATION_BUS.publish("catalog")
+    return {"message": "Método e suas lições deletados com sucesso", "deleted_lessons": len(lesson_ids)}
 
 @api_router.post("/methods/{method_id}/lessons")
 async def create_lesson(method_id: str, request: CreateLessonRequest, user: dict = Depends(get_current_user)):
@@ -1123,8 +2296,10 @@ async def create_lesson(method_id: str, request: CreateLessonRequest, user: dict
         sort=[("order", -1)]
     )
     next_order = (last_lesson["order"] + 1) if last_lesson else 1
+    [lesson_id] = await allocate_custom_lesson_ids(method["session_type"])
 
     lesson = {
+        "lesson_id": lesson_id,
         "title": request.title,
         "custom_method_id": method_id,
         "session_type": method["session_type"],
@@ -1137,11 +2312,13 @@ async def create_lesson(method_id: str, request: CreateLessonRequest, user: dict
         "created_at": datetime.utcnow(),
     }
     result = await db.custom_lessons.insert_one(lesson)
+    await INVALIDATION_BUS.publish("catalog")
 
     return {
         "message": "Lição criada com sucesso",
         "lesson": {
             "id": str(result.inserted_id),
+            "lesson_id": lesson_id,
             "title": request.title,
             "order": next_order,
         }
@@ -1165,10 +2342,12 @@ async def create_lessons_batch(method_id: str, request: BatchLessonRequest, user
         sort=[("order", -1)]
     )
     start_order = (last_lesson["order"] + 1) if last_lesson else 1
+    lesson_ids = await allocate_custom_lesson_ids(method["session_type"], request.count)
 
     lessons = []
     for i in range(1, request.count + 1):
         lessons.append({
+            "lesson_id": lesson_ids[i - 1],
             "title": f"{request.title_prefix} {i}",
             "custom_method_id": method_id,
             "session_type": method["session_type"],
@@ -1183,6 +2362,7 @@ async def create_lessons_batch(method_id: str, request: BatchLessonRequest, user
 
     if lessons:
         await db.custom_lessons.insert_many(lessons)
+        await INVALIDATION_BUS.publish("catalog")
 
     return {
         "message": f"{request.count} lições criadas com sucesso",
@@ -1220,6 +2400,7 @@ async def update_lesson(lesson_id: str, request: UpdateLessonRequest, user: dict
         raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
 
     await db.custom_lessons.update_one({"_id": oid}, {"$set": update_data})
+    await INVALIDATION_BUS.publish("catalog")
     return {"message": "Lição atualizada com sucesso"}
 
 @api_router.delete("/lessons/{lesson_id}")
@@ -1238,6 +2419,7 @@ async def delete_lesson(lesson_id: str, user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Você não tem permissão para deletar esta lição")
 
     await db.custom_lessons.delete_one({"_id": oid})
+    await INVALIDATION_BUS.publish("catalog")
     return {"message": "Lição deletada com sucesso"}
 
 @api_router.put("/methods/{method_id}/lessons/reorder")
@@ -1258,67 +2440,33 @@ async def reorder_lessons(method_id: str, request: ReorderLessonsRequest, user:
         except Exception:
             continue
 
+    await INVALIDATION_BUS.publish("catalog")
     return {"message": "Lições reordenadas com sucesso"}
 
 # Add endpoint to get lessons of a specific custom method
 @api_router.get("/methods/{method_id}/lessons")
 async def get_method_lessons(method_id: str, user: dict = Depends(get_current_user)):
-    """Get all lessons of a specific custom method"""
-    from bson import ObjectId
-
-    # Check if it's a seed method
-    seed_method = next((m for m in METHODS if m["id"] == method_id), None)
-    if seed_method:
-        # Return seed lessons for this method
-        all_lessons = get_all_lessons()
-        lessons = []
-        for session_type, session_lessons in all_lessons.items():
-            for lesson in session_lessons:
-                if lesson.get("method_id") == method_id:
-                    lesson_copy = lesson.copy()
-                    lesson_copy["is_seed"] = True
-                    lesson_copy["session_type"] = session_type
-                    lessons.append(lesson_copy)
-        return {"lessons": lessons, "total": len(lessons)}
-
-    # Custom method
-    try:
-        oid = ObjectId(method_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="ID de método inválido")
-
-    method = await db.custom_methods.find_one({"_id": oid})
-    if not method:
+    """Get all lessons of a specific method (seed or custom)"""
+    catalog = await get_catalog()
+    lessons = catalog.method_lessons.get(method_id)
+    if lessons is None:
+        try:
+            ObjectId(method_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="ID de método inválido")
         raise HTTPException(status_code=404, detail="Método não encontrado")
 
-    lessons_cursor = db.custom_lessons.find({"custom_method_id": method_id}).sort("order", 1)
-    lessons = await lessons_cursor.to_list(5000)
-    result = []
-    for l in lessons:
-        result.append({
-            "id": str(l["_id"]),
-            "title": l["title"],
-            "subtitle": l.get("subtitle", ""),
-            "instruction": l.get("instruction", ""),
-            "level": l.get("level", ""),
-            "tags": l.get("tags", []),
-            "order": l.get("order", 0),
-            "is_seed": False,
-            "is_custom": True,
-            "session_type": l.get("session_type", ""),
-        })
-
-    return {"lessons": result, "total": len(result)}
+    return {"lessons": lessons, "total": len(lessons)}
 
 # ============== SETTINGS ROUTES ==============
 
 @api_router.get("/settings")
 async def get_settings(user: dict = Depends(get_current_user)):
     """Get app settings"""
-    settings = await db.settings.find_one({"_id": "app_settings"})
+    settings = await get_app_settings()
     if not settings:
         settings = await init_app_settings()
-    settings.pop("_id", None)
+    settings = {k: v for k, v in settings.items() if k != "_id"}
     return {"settings": settings}
 
 @api_router.put("/settings/session-durations")
@@ -1337,33 +2485,292 @@ async def update_session_durations(request: UpdateSessionDurationsRequest, user:
         {"$set": {"session_durations": request.durations}},
         upsert=True
     )
+    await INVALIDATION_BUS.publish("settings")
     return {"message": "Durações atualizadas"}
 
+# ============== SYNC ROUTES ==============
+# Offline-first clients queue their actions and upload them in one ordered
+# batch. Each operation carries a client-generated op_id; sync_ops (unique on
+# username + op_id) makes a retried upload apply every operation once.
+#
+# A claim counts as done only once its applied_at is set, after the writes.
+# Until then it holds a short lease; a claim whose attempt died is taken over
+# by the next upload of the same op_id, and the writes it already made are
+# recognised by the op_ids recorded alongside them (on the practice events,
+# the session time points, and in sync_pending_ops of the progress document
+# and of the daily logs), so they are not applied twice. sync_pending_ops is
+# written in the same update as the change it marks and emptied once the
+# claim is applied, so it only holds the op_ids of unfinished attempts.
+
+SYNC_MAX_CLOCK_SKEW = timedelta(minutes=5)
+# A client retrying a batch older than this would apply it again
+SYNC_OP_RETENTION_SEC = 30 * 24 * 3600
+SYNC_CLAIM_LEASE = timedelta(seconds=60)
+
+def sync_op_time(op: SyncOperation, now: datetime) -> datetime:
+    """Client timestamp in naive UTC, or now when missing or in the future"""
+    if op.ts is None:
+        return now
+    ts = op.ts.astimezone(timezone.utc).replace(tzinfo=None) if op.ts.tzinfo else op.ts
+    return now if ts > now + SYNC_MAX_CLOCK_SKEW else ts
+
+async def claim_sync_ops(username: str, operations: List[SyncOperation]) -> tuple:
+    """Claim the batch's op_ids; returns (operations to apply, duplicate op_ids,
+    op_ids taken over from an interrupted attempt). 409 when another upload
+    is applying some of them right now."""
+    unique, duplicates, seen = [], [], set()
+    for op in operations:
+        if op.op_id in seen:
+            duplicates.append(op.op_id)
+        else:
+            seen.add(op.op_id)
+            unique.append(op)
+    if not unique:
+        return [], duplicates, set()
+    now = datetime.utcnow()
+    claim_id = uuid.uuid4().hex
+    docs = [
+        {"username": username, "op_id": op.op_id, "type": op.type, "received_at": now,
+         "claim_id": claim_id, "lease_until": now + SYNC_CLAIM_LEASE}
+        for op in unique
+    ]
+    try:
+        await db.sync_ops.insert_many(docs, ordered=False)
+        return unique, duplicates, set()
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        taken = [docs[err["index"]]["op_id"] for err in errors if err.get("code") == 11000]
+        if len(taken) < len(errors):
+            raise
+    await db.sync_ops.update_many(
+        {"username": username, "op_id": {"$in": taken}, "applied_at": {"$exists": False}, "lease_until": {"$lt": now}},
+        {"$set": {"claim_id": claim_id, "lease_until": now + SYNC_CLAIM_LEASE}},
+    )
+    claims = await db.sync_ops.find(
+        {"username": username, "op_id": {"$in": taken}}, {"op_id": 1, "claim_id": 1, "applied_at": 1}
+    ).to_list(None)
+    resumed = {c["op_id"] for c in claims if c.get("claim_id") == claim_id}
+    applied = {c["op_id"] for c in claims if c.get("applied_at")}
+    if len(resumed) + len(applied) < len(taken):
+        await release_sync_ops(username, [op.op_id for op in unique if op.op_id not in applied])
+        raise HTTPException(status_code=409, detail="Sincronização em andamento, tente novamente")
+    return [op for op in unique if op.op_id not in applied], duplicates + sorted(applied), resumed
+
+async def release_sync_ops(username: str, op_ids: List[str]):
+    """Let the next upload take over claims that weren't applied"""
+    await db.sync_ops.update_many(
+        {"username": username, "op_id": {"$in": op_ids}, "applied_at": {"$exists": False}},
+        {"$set": {"lease_until": datetime.utcnow()}},
+    )
+
+@api_router.post("/sync")
+async def sync_operations(request: SyncRequest, user: dict = Depends(get_synced_user)):
+    """Apply a batch of offline operations in order and return the resulting progress"""
+    username = user["username"]
+    all_lessons = await get_all_lessons_merged()
+    operations, duplicates, resumed = await claim_sync_ops(username, request.operations)
+    try:
+        applied, rejected = await apply_sync_operations(username, operations, all_lessons, resumed)
+    except Exception:
+        # Some writes may have gone through: the retry finishes the rest
+        await release_sync_ops(username, [op.op_id for op in operations])
+        raise
+    if applied:
+        # Too many changes for a delta: clients refetch
+        await push_live(username, {"type": "resync"})
+    return {
+        "applied": applied,
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "progress": await progress_state(username),
+    }
+
+async def apply_sync_operations(username: str, operations: List[SyncOperation], all_lessons: dict,
+                                resumed: set = frozenset()) -> tuple:
+    """Fold the operations into grouped writes (one per document) and apply them;
+    writes an interrupted attempt already made for `resumed` op_ids are skipped"""
+    if not operations:
+        return [], []
+    progress = await db.progress.find_one({"username": username})
+    if not progress:
+        progress = await init_user_progress(username)
+    now = datetime.utcnow()
+    events_done, points_done, daily_done = set(), set(), set()
+    if resumed:
+        resumed_filter = {"$in": sorted(resumed)}
+        events_done, points_done, daily_logs = await gather_all(
+            db.practice_events.distinct("op_id", {"username": username, "op_id": resumed_filter}),
+            db[SESSION_TIME].distinct("op_id", {"meta.username": username, "op_id": resumed_filter}),
+            db.daily_logs.find({"username": username, "sync_pending_ops": resumed_filter}, {"sync_pending_ops": 1}).to_list(None),
+        )
+        events_done, points_done = set(events_done), set(points_done)
+        daily_done = {op_id for log in daily_logs for op_id in log["sync_pending_ops"]} & resumed
+    progress_done = set(progress.get("sync_pending_ops", [])) & resumed
+    
+    progress_updates, progress_ops, daily_updates, events, points = [], [], {}, [], []
+    advanced, warmups = {}, {}  # warmups: date -> {item_id: completed}
+    notes = {}  # (session_type, lesson_id) -> text
+    practice_dates = set(progress.get("practice_dates", []))
+    first_practice_date = progress.get("first_practice_date")
+    applied, rejected = [], []
+    
+    def practiced_on(date: str, session_type: str, op_id: str, time_sec: int = 0):
+        nonlocal first_practice_date
+        if op_id not in daily_done:
+            daily_updates.setdefault(date, []).append({
+                "$set": {"studied": True},
+                "$addToSet": {"sessions_practiced": session_type, "sync_pending_ops": op_id},
+                "$inc": {f"session_times.{session_type}": time_sec, "total_time_sec": time_sec},
+                "$setOnInsert": {"created_at": now},
+            })
+        practice_dates.add(date)
+        if not first_practice_date or date < first_practice_date:
+            first_practice_date = date
+    
+    for op in operations:
+        ts = sync_op_time(op, now)
+        date = ts.strftime("%Y-%m-%d")
+        if op.type in ("practice", "notes", "advance") and op.session_type not in all_lessons:
+            rejected.append({"op_id": op.op_id, "detail": "Tipo de sessão inválido"})
+            continue
+        if op.type == "practice" and op.lesson_id is not None:
+            event = {
+                "username": username,
+                "kind": "practice",
+                "session_type": op.session_type,
+                "lesson_id": op.lesson_id,
+                "date": date,
+                "ts": ts,
+                "duration_sec": op.duration_sec,
+                "op_id": op.op_id,
+            }
+            if op.op_id not in events_done:
+                events.append(event)
+            if op.op_id not in progress_done:
+                progress_updates.append(practice_event_projection(event))
+                progress_ops.append(op.op_id)
+            practiced_on(date, op.session_type, op.op_id, op.duration_sec)
+            if op.duration_sec and op.op_id not in points_done:
+                points.append({"ts": ts, "meta": {"username": username, "session_type": op.session_type},
+                               "duration_sec": op.duration_sec, "op_id": op.op_id})
+        elif op.type == "notes" and op.lesson_id is not None and op.notes is not None:
+            notes[(op.session_type, op.lesson_id)] = op.notes
+        elif op.type == "advance" and op.direction in ("next", "previous") and op.op_id in progress_done:
+            pass
+        elif op.type == "advance" and op.direction in ("next", "previous"):
+            progress_ops.append(op.op_id)
+            session_data = progress.get(op.session_type, {})
+            current, completed = advanced.get(op.session_type, (
+                session_data.get("current_lesson", 1), list(session_data.get("completed_lessons", []))
+            ))
+            if op.direction == "next" and current < len(all_lessons[op.session_type]):
+                if current not in completed:
+                    completed.append(current)
+                current += 1
+            elif op.direction == "previous" and current > 1:
+                current -= 1
+            advanced[op.session_type] = (current, completed)
+        elif op.type == "warmup_check" and op.item_id in WARMUP_ITEM_IDS and op.completed is not None:
+            warmups.setdefault(date, {})[op.item_id] = op.completed
+            practiced_on(date, "warmup", op.op_id)
+        else:
+            rejected.append({"op_id": op.op_id, "detail": "Operação inválida"})
+            continue
+        applied.append(op.op_id)
+    
+    for session_type, (current, completed) in advanced.items():
+        progress_updates.append({"$set": {
+            f"{session_type}.current_lesson": current,
+            f"{session_type}.completed_lessons": completed,
+        }})
+    new_dates = practice_dates - set(progress.get("practice_dates", []))
+    if new_dates:
+        progress_updates.append({"$addToSet": {"practice_dates": {"$each": sorted(new_dates)}}})
+    if first_practice_date != progress.get("first_practice_date"):
+        progress_updates.append({"$set": {"first_practice_date": first_practice_date}})
+    
+    if events:
+        await db.practice_events.insert_many(events)
+    if progress_updates:
+        update = coalesce(progress_updates)
+        if progress_ops:
+            update["$push"] = {"sync_pending_ops": {"$each": progress_ops}}
+        await db.progress.update_one({"username": username}, update)
+    if daily_updates:
+        await db.daily_logs.bulk_write([
+            UpdateOne({"username": username, "date": date}, coalesce(updates), upsert=True)
+            for date, updates in daily_updates.items()
+        ], ordered=False)
+    if warmups:
+        await convert_warmup_checklists(username, sorted(warmups))
+        await db.warmups.bulk_write([
+            UpdateOne({"username": username, "date": date}, update, upsert=True)
+            for date, completed in sorted(warmups.items())
+            for update in warmup_toggle_updates(completed)
+        ])
+    if points:
+        await db[SESSION_TIME].insert_many(points)
+    if notes:
+        await ensure_lesson_notes_moved(username)
+        await db.lesson_notes.bulk_write([
+            lesson_notes_write(username, session_type, lesson_id, text)
+            for (session_type, lesson_id), text in notes.items()
+        ], ordered=False)
+    await db.sync_ops.update_many(
+        {"username": username, "op_id": {"$in": applied + [r["op_id"] for r in rejected]}},
+        {"$set": {"applied_at": now}, "$unset": {"lease_until": ""}},
+    )
+    # Applied claims are never resumed: their markers can go
+    pending = {"$pull": {"sync_pending_ops": {"$in": applied}}}
+    cleanups = []
+    if progress_ops or progress_done:
+        cleanups.append(db.progress.update_one({"username": username}, pending))
+    if daily_updates or daily_done:
+        cleanups.append(db.daily_logs.update_many({"username": username, "sync_pending_ops": {"$in": applied}}, pending))
+    await gather_all(*cleanups)
+    return applied, rejected
+
 # ============== EXPORT/IMPORT ROUTES ==============
 
 @api_router.get("/export")
-async def export_data(user: dict = Depends(get_current_user)):
+async def export_data(user: dict = Depends(get_synced_user)):
     """Export all user data as JSON"""
-    progress = await db.progress.find_one({"username": user["username"]})
-    warmups = await db.warmups.find({"username": user["username"]}).to_list(1000)
-    daily_logs = await db.daily_logs.find({"username": user["username"]}).to_list(1000)
-    settings = await db.settings.find_one({"_id": "app_settings"})
+    username = user["username"]
+    await ensure_lesson_notes_moved(username)
+    progress, warmups, daily_logs, undone, events, lesson_notes, settings = await gather_all(
+        db.progress.find_one({"username": username}, {"sync_pending_ops": 0}),
+        db.warmups.find({"username": username}).to_list(1000),
+        db.daily_logs.find({"username": username}, {"sync_pending_ops": 0}).to_list(1000),
+        db.practice_events.distinct("undoes", {"username": username, "kind": "undo"}),
+        db.practice_events.find({"username": username, "kind": "practice"}).sort("ts", 1).to_list(None),
+        db.lesson_notes.find(
+            {"username": username}, {"_id": 0, "session_type": 1, "lesson_id": 1, "notes": 1}
+        ).to_list(None),
+        get_app_settings(),
+    )
+    warmups = [warmup_view(w) for w in warmups]
+    undone = set(undone)
+    practice_events = [
+        {k: e.get(k) for k in ("session_type", "lesson_id", "date", "ts", "duration_sec")}
+        for e in events
+        if e["_id"] not in undone
+    ]
     
     # Remove MongoDB _id fields
     if progress:
         progress.pop("_id", None)
-    for w in warmups:
-        w.pop("_id", None)
     for d in daily_logs:
         d.pop("_id", None)
     if settings:
-        settings.pop("_id", None)
+        settings = {k: v for k, v in settings.items() if k != "_id"}
     
     return {
         "data": {
             "progress": progress,
             "warmups": warmups,
             "daily_logs": daily_logs,
+            "practice_events": practice_events,
+            "lesson_notes": lesson_notes,
             "settings": settings,
             "user": {
                 "username": user["username"],
@@ -1376,7 +2783,7 @@ async def export_data(user: dict = Depends(get_current_user)):
     }
 
 @api_router.post("/import/preview")
-async def preview_import(request: ImportDataRequest, user: dict = Depends(get_current_user)):
+async def preview_import(request: ImportDataRequest, user: dict = Depends(get_synced_user)):
     """Preview import data before applying"""
     data = request.data
     warnings = []
@@ -1384,16 +2791,18 @@ async def preview_import(request: ImportDataRequest, user: dict = Depends(get_cu
     # Validate structure
     if "progress" not in data and "data" not in data:
         return ImportPreviewResponse(valid=False, summary={}, warnings=["Formato de dados inválido"])
-    
-    # Handle nested data structure
-    if "data" in data:
-        data = data["data"]
+    try:
+        backup = parse_backup(data)
+    except HTTPException as e:
+        return ImportPreviewResponse(valid=False, summary={}, warnings=[e.detail])
     
     summary = {
-        "has_progress": "progress" in data and data["progress"] is not None,
-        "warmups_count": len(data.get("warmups", [])),
-        "daily_logs_count": len(data.get("daily_logs", [])),
-        "has_settings": "settings" in data and data["settings"] is not None,
+        "has_progress": backup.progress is not None,
+        "warmups_count": len(backup.warmups or []),
+        "daily_logs_count": len(backup.daily_logs or []),
+        "practice_events_count": len(backup.practice_events),
+        "lesson_notes_count": len(backup.lesson_notes),
+        "has_settings": backup.settings is not None,
     }
     
     # Check for potential data loss
@@ -1408,55 +2817,281 @@ async def preview_import(request: ImportDataRequest, user: dict = Depends(get_cu
     
     return ImportPreviewResponse(valid=True, summary=summary, warnings=warnings)
 
-@api_router.post("/import")
-async def import_data(request: ImportDataRequest, user: dict = Depends(get_current_user)):
-    """Import user data from JSON backup"""
-    data = request.data
-    
+def parse_backup(data: dict) -> Backup:
+    """The backup inside an import request (400 with the first problem found)"""
     # Handle nested data structure
     if "data" in data:
         data = data["data"]
-    
-    if "progress" in data and data["progress"]:
-        progress_data = data["progress"]
-        progress_data["username"] = user["username"]
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Backup inválido: formato de dados inválido")
+    try:
+        return Backup.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        where = ".".join(str(part) for part in error["loc"])
+        raise HTTPException(status_code=400, detail=f"Backup inválido em {where}: {error['msg']}")
+
+@api_router.post("/import", status_code=202)
+async def import_data(request: ImportDataRequest, user: dict = Depends(get_current_user)):
+    """Import user data from JSON backup (as a background job)"""
+    backup = parse_backup(request.data)
+    job = await JOBS.submit("import", user["username"], payload=backup.model_dump_json().encode())
+    return {"message": "Importação iniciada", "job_id": job["_id"], "status": job["status"]}
+
+async def import_job(job: dict, report) -> dict:
+    """Replace the user's data with a JSON backup; safe to run again"""
+    username = job["username"]
+    # Checked again here: nothing is deleted unless the whole backup is valid
+    backup = parse_backup(json.loads(await JOBS.load_payload(job)))
+    await flush_user_buffers(username)
+    
+    await report(0, 4, "progress")
+    embedded_notes = []
+    if backup.progress:
+        progress_data = dict(backup.progress)
+        progress_data["username"] = username
         progress_data.pop("_id", None)
+        # Backups made before lesson_notes carry the notes inside the progress
+        embedded_notes = split_lesson_notes(progress_data)
         
-        await db.progress.delete_one({"username": user["username"]})
+        await db.progress.delete_one({"username": username})
         await db.progress.insert_one(progress_data)
-    
-    if "warmups" in data and data["warmups"]:
-        await db.warmups.delete_many({"username": user["username"]})
-        for warmup in data["warmups"]:
-            warmup["username"] = user["username"]
-            warmup.pop("_id", None)
-            await db.warmups.insert_one(warmup)
-    
-    if "daily_logs" in data and data["daily_logs"]:
-        await db.daily_logs.delete_many({"username": user["username"]})
-        for log in data["daily_logs"]:
-            log["username"] = user["username"]
+        
+        # The history must match the imported counters: replace it as well
+        await db.practice_events.delete_many({"username": username})
+        events = [
+            {
+                "username": username,
+                "kind": "practice",
+                "session_type": e.session_type,
+                "lesson_id": e.lesson_id,
+                "date": e.date,
+                "ts": e.ts or datetime.utcnow(),
+                "duration_sec": e.duration_sec or 0,
+            }
+            for e in backup.practice_events
+        ]
+        if events:
+            await db.practice_events.insert_many(events)
+    
+    if backup.progress or backup.lesson_notes:
+        await ensure_lesson_notes_moved(username)
+        await db.lesson_notes.delete_many({"username": username})
+        notes = embedded_notes + [
+            {
+                "username": username,
+                "session_type": note.session_type,
+                "lesson_id": note.lesson_id,
+                "notes": note.notes,
+                "updated_at": datetime.utcnow(),
+            }
+            for note in backup.lesson_notes
+            if note.notes
+        ]
+        if notes:
+            await db.lesson_notes.bulk_write([
+                UpdateOne({k: note[k] for k in ("username", "session_type", "lesson_id")}, {"$set": note}, upsert=True)
+                for note in notes
+            ], ordered=False)
+    
+    await report(1, 4, "warmups")
+    if backup.warmups:
+        await db.warmups.delete_many({"username": username})
+        await db.warmups.insert_many([
+            {"username": username, "date": warmup.date,
+             "completed_ids": sorted(warmup_completed_ids(warmup.model_dump(exclude_none=True)))}
+            for warmup in backup.warmups
+        ])
+    
+    await report(2, 4, "daily_logs")
+    if backup.daily_logs:
+        await db.daily_logs.delete_many({"username": username})
+        await db[SESSION_TIME].delete_many({"meta.username": username})
+        logs = []
+        points = []
+        for log in backup.daily_logs:
+            log = log.model_dump()
+            log["username"] = username
             log.pop("_id", None)
-            await db.daily_logs.insert_one(log)
-    
-    if "settings" in data and data["settings"]:
-        settings = data["settings"]
+            logs.append(log)
+            points.extend(session_time_points(log))
+        await db.daily_logs.insert_many(logs)
+        if points:
+            await db[SESSION_TIME].insert_many(points)
+    
+    await report(3, 4, "settings")
+    if backup.settings:
+        settings = dict(backup.settings)
         settings["_id"] = "app_settings"
         await db.settings.replace_one({"_id": "app_settings"}, settings, upsert=True)
+        await INVALIDATION_BUS.publish("settings")
+    
+    await push_live(username, {"type": "resync"})
     
     return {"message": "Dados importados com sucesso"}
 
-@api_router.post("/reset")
+@api_router.post("/reset", status_code=202)
 async def reset_progress(user: dict = Depends(get_current_user)):
-    """Reset all user progress"""
-    await db.progress.delete_one({"username": user["username"]})
-    await db.warmups.delete_many({"username": user["username"]})
-    await db.daily_logs.delete_many({"username": user["username"]})
-    await db.activity_log.delete_many({"username": user["username"]})
-    await init_user_progress(user["username"])
+    """Reset all user progress (as a background job)"""
+    job = await JOBS.submit("reset", user["username"], key="reset")
+    return {"message": "Reset iniciado", "job_id": job["_id"], "status": job["status"]}
+
+async def reset_job(job: dict, report) -> dict:
+    """Delete all of the user's progress and start over; safe to run again"""
+    username = job["username"]
+    await flush_user_buffers(username)
+    await gather_all(
+        db.progress.delete_one({"username": username}),
+        db.warmups.delete_many({"username": username}),
+        db.daily_logs.delete_many({"username": username}),
+        db.activity_log.delete_many({"username": username}),
+        db.practice_events.delete_many({"username": username}),
+        db[SESSION_TIME].delete_many({"meta.username": username}),
+        db.lesson_notes.delete_many({"username": username}),
+    )
+    await report(1, 2, "progress")
+    await init_user_progress(username)
+    
+    await push_live(username, {"type": "resync"})
     
     return {"message": "Progresso resetado com sucesso"}
 
+# ============== JOB ROUTES ==============
+
+JOBS.register("import", import_job)
+JOBS.register("reset", reset_job)
+JOBS.register("delete_method", delete_method_job)
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Status, progress and result of one of the user's background jobs"""
+    job = await JOBS.get(job_id, user["username"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return job_view(job)
+
+# ============== HEALTH ROUTES ==============
+# Outside /api and registered before the SPA catch-all, so probes never hit
+# the frontend or need a token.
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: Mongo answers a ping in time and the instance is not saturated"""
+    problems = []
+    if db is None:
+        problems.append("database not configured")
+    else:
+        try:
+            await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            problems.append(f"mongo ping exceeded {READINESS_TIMEOUT_MS} ms")
+        except Exception as e:
+            logger.warning(f"Readiness ping failed: {e}")
+            problems.append("mongo ping failed")
+        if not INDEXES_READY.is_set():
+            problems.append("indexes not created yet")
+
+    if READINESS_MAX_LOOP_LAG_MS and LOOP_MONITOR.last_ms > READINESS_MAX_LOOP_LAG_MS:
+        problems.append(f"event loop lag {LOOP_MONITOR.last_ms:.0f} ms")
+    waiting = POOL_MONITOR.snapshot()["waiting"]
+    if READINESS_MAX_POOL_WAITING and waiting > READINESS_MAX_POOL_WAITING:
+        problems.append(f"{waiting} requests waiting for a mongo connection")
+
+    if problems:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "problems": problems})
+    return {"status": "ready"}
+
+# Gauges read from the runtime monitors at scrape time
+def _pool_connection_states():
+    pool = POOL_MONITOR.snapshot()
+    return {(state,): pool[state] for state in ("open_connections", "checked_out", "waiting")}
+
+def _pool_checkout_outcomes():
+    pool = POOL_MONITOR.snapshot()
+    return {("ok",): pool["checkouts"], ("failed",): pool["checkout_failures"], ("slow",): pool["slow_waits"]}
+
+def _cache_lookups():
+    lookups = {}
+    for name, stats in CACHES.items():
+        lookups[(name, "hit")] = stats.hits
+        lookups[(name, "miss")] = stats.misses
+    return lookups
+
+metrics.CallbackMetric(
+    "gauge", "mongo_pool_connections", "MongoDB pool connections by state", ("state",),
+    _pool_connection_states,
+)
+metrics.CallbackMetric(
+    "counter", "mongo_pool_checkouts_total", "MongoDB pool checkouts by outcome", ("outcome",),
+    _pool_checkout_outcomes,
+)
+metrics.CallbackMetric(
+    "counter", "cache_lookups_total", "In-process cache lookups by cache and result", ("cache", "result"),
+    _cache_lookups,
+)
+metrics.CallbackMetric(
+    "gauge", "live_update_streams", "Open /api/events streams", (),
+    lambda: {(): LIVE_HUB.snapshot()["streams"]},
+)
+metrics.CallbackMetric(
+    "gauge", "write_behind_pending_documents", "Documents with buffered write-behind updates", (),
+    lambda: {(): len(WRITE_BEHIND)},
+)
+metrics.CallbackMetric(
+    "counter", "write_behind_flushed_updates_total", "Buffered updates written by write-behind flushes", (),
+    lambda: {(): WRITE_BEHIND.flushed_updates},
+)
+
+# Optional bearer token for scrapers; /metrics is open when unset
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+@app.get("/metrics")
+async def metrics_endpoint(request: Request):
+    """Prometheus metrics of this instance"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/internal/status")
+async def internal_status(user: dict = Depends(get_admin_user)):
+    """Pool usage, cache hit rates and event-loop lag of this instance (admin only)"""
+    return {
+        "uptime_sec": int(time.time() - STARTED_AT),
+        "pid": os.getpid(),
+        "mongo_pool": POOL_MONITOR.snapshot(),
+        "mongo_client_options": mongo_client_options(),
+        "caches": caches_snapshot(),
+        "event_loop": LOOP_MONITOR.snapshot(),
+        "invalidation_bus": INVALIDATION_BUS.snapshot(),
+        "write_behind": WRITE_BEHIND.snapshot(),
+        "heartbeats": HEARTBEATS.snapshot(),
+        "live_updates": LIVE_HUB.snapshot(),
+        "live_bus": LIVE_BUS.snapshot(),
+        "jobs": JOBS.snapshot(),
+        "rate_limits": RATE_LIMITER.snapshot(),
+    }
+
+@api_router.get("/internal/profiles")
+async def list_profiles(user: dict = Depends(get_admin_user)):
+    """Collapsed-stack profiles recorded on this instance, newest first (admin only)"""
+    if not os.path.isdir(PROFILE_DIR):
+        return {"profiles": []}
+    names = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith(".collapsed")), reverse=True)
+    return {"profiles": names}
+
+@api_router.get("/internal/profiles/{name}")
+async def get_profile(name: str, user: dict = Depends(get_admin_user)):
+    """Download one collapsed-stack profile (admin only)"""
+    path = Path(PROFILE_DIR) / name
+    if not name.endswith(".collapsed") or path.name != name or not path.is_file():
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(str(path), media_type="text/plain", filename=name)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1464,6 +3099,14 @@ app.include_router(api_router)
 _allowed_origins_str = os.environ.get('ALLOWED_ORIGINS', '')
 _allowed_origins = [o.strip() for o in _allowed_origins_str.split(',') if o.strip()] if _allowed_origins_str else ["*"]
 
+# Inside CORS, so 429 responses still carry the CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=RATE_LIMITER,
+    identify=rate_limit_caller,
+    enabled=RATE_LIMIT_ENABLED,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1473,6 +3116,19 @@ app.add_middleware(
 )
 
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(
+    tracing.TracingMiddleware,
+    slow_ms=TRACE_SLOW_MS,
+    sample_rate=TRACE_SAMPLE_RATE,
+    trace_file=TRACE_FILE,
+)
+app.add_middleware(
+    profiling.ProfilingMiddleware,
+    is_admin_token=is_admin_token,
+    profile_dir=PROFILE_DIR,
+    interval_ms=PROFILE_INTERVAL_MS,
+)
 
 # Serve frontend static files (built with: npx expo export --platform web)
 FRONTEND_DIR = ROOT_DIR / "static"
@@ -1504,8 +3160,7 @@ else:
             "api": "/api/"
         }
 
-@app.on_event("startup")
-async def startup_reset_admin():
+async def reset_admin_password_if_requested():
     """Reset admin password if RESET_ADMIN env var is set"""
     if os.environ.get('RESET_ADMIN', '').lower() == 'true':
         user = await db.users.find_one({"username": "admin"})
@@ -1519,10 +3174,7 @@ async def startup_reset_admin():
                     "password_changed": False,
                 }}
             )
+            await INVALIDATION_BUS.publish("users", "admin")
             logger.info("Admin password reset to default (violino2024). Remove RESET_ADMIN env var after login.")
         else:
             logger.info("No admin user found, will be created on first login.")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
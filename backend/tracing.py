@@ -0,0 +1,180 @@
+# ============== REQUEST TRACING ==============
+# Lightweight per-request traces: handler phases (`with span("name"):`) and
+# every MongoDB command are recorded as spans on the request's trace, which
+# lives in a context variable. Motor runs driver calls with a copy of the
+# caller's context, so the command listener sees the right trace even on
+# executor threads. Each response carries X-DB-Ops and Server-Timing
+# headers; slow requests are sampled to a JSONL file.
+
+import asyncio
+import json
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from pymongo import monitoring as mongo_monitoring
+
+import metrics
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+MONGO_OPS = metrics.Histogram(
+    "http_request_mongo_ops", "MongoDB round trips per request by route template",
+    ("method", "route"), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+
+
+class Trace:
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (name, start_ms, duration_ms, is_db). Commands finish on executor
+        # threads; list.append is atomic, so spans need no lock.
+        self.spans = []
+
+    def elapsed_ms(self, now: float = None) -> float:
+        return ((now or time.perf_counter()) - self.started) * 1000
+
+    def add_span(self, name: str, start_ms: float, duration_ms: float, is_db: bool = False):
+        self.spans.append((name, round(start_ms, 3), round(duration_ms, 3), is_db))
+
+    @property
+    def db_ops(self) -> int:
+        return sum(1 for s in self.spans if s[3])
+
+    @property
+    def db_ms(self) -> float:
+        return sum(s[2] for s in self.spans if s[3])
+
+    def phases(self) -> dict:
+        """Total time per handler phase (Mongo command spans excluded)"""
+        totals = {}
+        for name, _, duration, is_db in self.spans:
+            if not is_db:
+                totals[name] = totals.get(name, 0) + duration
+        return totals
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+class span:
+    """Records the enclosed block as a phase of the current request's trace (no-op outside a request)"""
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            now = time.perf_counter()
+            self.trace.add_span(self.name, self.trace.elapsed_ms(self.started), (now - self.started) * 1000)
+        return False
+
+
+class TraceCommandListener(mongo_monitoring.CommandListener):
+    """Adds one span per MongoDB command to the trace of the request that issued it"""
+
+    def __init__(self):
+        self._pending = {}  # (connection, request_id) -> (trace, collection)
+
+    def started(self, event):
+        trace = _current.get()
+        if trace is not None:
+            self._pending[(event.connection_id, event.request_id)] = (
+                trace, metrics.command_collection(event.command_name, event.command)
+            )
+
+    def _finished(self, event, suffix: str = ""):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        trace, collection = pending
+        duration_ms = event.duration_micros / 1000
+        name = f"mongo {event.command_name} {collection}".rstrip() + suffix
+        trace.add_span(name, trace.elapsed_ms() - duration_ms, duration_ms, is_db=True)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event, " (failed)")
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening a trace per HTTP request"""
+
+    def __init__(self, app, slow_ms: float, sample_rate: float, trace_file: str):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.trace_file = trace_file
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current.set(trace)
+        status = 500
+        streaming = False
+
+        async def send_with_timing(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                # Event streams stay open by design; they aren't slow requests
+                streaming = (b"content-type", b"text/event-stream") in [
+                    (k.lower(), v.split(b";")[0]) for k, v in headers
+                ]
+                headers.append((b"x-db-ops", str(trace.db_ops).encode()))
+                headers.append((b"server-timing", server_timing(trace).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            duration_ms = trace.elapsed_ms()
+            route = metrics.route_template(scope)
+            MONGO_OPS.observe(trace.db_ops, scope["method"], route)
+            if self.trace_file and not streaming and duration_ms >= self.slow_ms and random.random() < self.sample_rate:
+                record = {
+                    "ts": datetime.utcnow().isoformat(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(duration_ms, 3),
+                    "db_ops": trace.db_ops,
+                    "db_ms": round(trace.db_ms, 3),
+                    "spans": [{"name": n, "start_ms": s, "duration_ms": d} for n, s, d, _ in trace.spans],
+                }
+                asyncio.get_running_loop().run_in_executor(None, self._append, json.dumps(record))
+
+    def _append(self, line: str):
+        with open(self.trace_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def server_timing(trace: Trace) -> str:
+    """Server-Timing header value: Mongo time, each handler phase and the total so far"""
+    parts = [f'db;dur={trace.db_ms:.1f};desc="{trace.db_ops} ops"']
+    for name, duration in trace.phases().items():
+        parts.append(f"{name};dur={duration:.1f}")
+    parts.append(f"app;dur={trace.elapsed_ms():.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,247 @@
+# ============== WRITE-BEHIND BUFFER ==============
+# Coalesces update operators aimed at the same document in memory and flushes
+# them as one unordered bulk_write per collection, on an interval, when too
+# many documents are pending, on demand and at shutdown. Ten "practiced" taps
+# on a lesson become a single {"$inc": {...: 10}}. Appended documents (which
+# can't be coalesced) ride along in the same flushes.
+#
+# Durability trade-off: updates buffered since the last flush are lost if
+# the process dies. A flush that fails with a connection error is retried,
+# so an update may be applied twice if the server applied it but the reply
+# was lost. The buffer belongs to its process: a flush on one worker doesn't
+# write what another worker holds.
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+def _merge(pending: dict, update: dict):
+    """Fold `update` (update operators) into the pending operators of one document"""
+    for op, fields in update.items():
+        target = pending.setdefault(op, {})
+        for field, value in fields.items():
+            if op == "$inc":
+                target[field] = target.get(field, 0) + value
+            elif op == "$set":
+                target[field] = value
+            elif op == "$setOnInsert":
+                target.setdefault(field, value)
+            elif op == "$addToSet":
+                values = target.setdefault(field, [])
+                for item in (value["$each"] if isinstance(value, dict) and "$each" in value else [value]):
+                    if item not in values:
+                        values.append(item)
+            elif op == "$max":
+                target[field] = max(target[field], value) if field in target else value
+            elif op == "$min":
+                target[field] = min(target[field], value) if field in target else value
+            else:
+                raise ValueError(f"Operator {op} cannot be coalesced")
+
+
+def _to_update(pending: dict) -> dict:
+    update = {}
+    for op, fields in pending.items():
+        if op == "$addToSet":
+            update[op] = {field: {"$each": values} for field, values in fields.items()}
+        else:
+            update[op] = dict(fields)
+    return update
+
+
+def coalesce(updates: list) -> dict:
+    """Combine update documents, applied in order, into one"""
+    pending = {}
+    for update in updates:
+        _merge(pending, update)
+    return _to_update(pending)
+
+
+class CoalescingBuffer:
+    """Per-document coalescing of update operators, flushed with bulk_write"""
+
+    def __init__(self, get_db: Callable, enabled: bool = False, flush_interval_ms: float = 1000,
+                 max_pending: int = 500):
+        self.get_db = get_db
+        self.enabled = enabled
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.flushed_documents = 0  # bulk_write operations sent
+        self.flushed_updates = 0  # buffered updates coalesced into them
+        # (collection, filter items) -> {"filter", "ops", "upsert", "updates"}
+        self._pending: Dict[tuple, dict] = {}
+        self._inflight: Dict[tuple, dict] = {}
+        self._inserts: Dict[str, list] = {}  # collection -> documents to insert
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._flushes = 0  # flushes that started writing updates
+
+    def __len__(self):
+        return len(self._pending) + sum(len(docs) for docs in self._inserts.values())
+
+    @staticmethod
+    def _key(collection: str, filter: dict) -> tuple:
+        return collection, tuple(sorted(filter.items()))
+
+    def add(self, collection: str, filter: dict, update: dict, upsert: bool = False):
+        """Buffer `update` for the document matching `filter` (an equality filter)"""
+        key = self._key(collection, filter)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = {"filter": dict(filter), "ops": {}, "upsert": False, "updates": 0}
+        _merge(entry["ops"], update)
+        entry["upsert"] = entry["upsert"] or upsert
+        entry["updates"] += 1
+        self._flush_if_full()
+
+    def append(self, collection: str, document: dict):
+        """Buffer an insert (written by full flushes, or when match(collection, document) is true)"""
+        self._inserts.setdefault(collection, []).append(document)
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        if len(self) >= self.max_pending and self._task is not None and (
+                self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    def pending_inc(self, collection: str, filter: dict, field: str):
+        """Increment of `field` not yet applied in the database (buffered or being flushed)"""
+        key = self._key(collection, filter)
+        total = 0
+        for entries in (self._pending, self._inflight):
+            entry = entries.get(key)
+            if entry is not None:
+                total += entry["ops"].get("$inc", {}).get(field, 0)
+        return total
+
+    async def read_with_pending(self, read: Callable[[], Awaitable], collection: str, filter: dict, field: str):
+        """(await read(), pending_inc(...)) with no flush writing during the read,
+        so a buffered increment is counted once: in the document or as pending"""
+        while True:
+            if self._inflight:
+                async with self._flush_lock:
+                    pass
+                continue
+            flushes = self._flushes
+            document = await read()
+            if flushes == self._flushes and not self._inflight:
+                return document, self.pending_inc(collection, filter, field)
+
+    async def flush(self, match: Optional[Callable[[str, dict], bool]] = None) -> int:
+        """Write pending updates and inserts (only those for which
+        match(collection, filter or document) is true)"""
+        if not self._pending and not self._inserts:
+            return 0
+        async with self._flush_lock:
+            keys = [k for k, e in self._pending.items() if match is None or match(k[0], e["filter"])]
+            inserts = {}
+            if match is None:
+                inserts, self._inserts = self._inserts, {}
+            else:
+                for collection, documents in list(self._inserts.items()):
+                    chosen = [d for d in documents if match(collection, d)]
+                    if not chosen:
+                        continue
+                    inserts[collection] = chosen
+                    rest = [d for d in documents if not match(collection, d)]
+                    if rest:
+                        self._inserts[collection] = rest
+                    else:
+                        del self._inserts[collection]
+            if not keys and not inserts:
+                return 0
+            batch = {k: self._pending.pop(k) for k in keys}
+            self._inflight.update(batch)
+            if batch:
+                self._flushes += 1
+            written = 0
+            try:
+                by_collection = {}
+                for (collection, _), entry in batch.items():
+                    by_collection.setdefault(collection, []).append(entry)
+                for collection in by_collection.keys() | inserts.keys():
+                    entries = by_collection.get(collection, [])
+                    applied = await self._write(collection, entries, inserts.get(collection, []))
+                    written += len(applied)
+                    self.flushed_updates += sum(e["updates"] for e in applied)
+            finally:
+                for k in keys:
+                    self._inflight.pop(k, None)
+            self.flushed_documents += written
+            return written
+
+    async def _write(self, collection: str, entries: list, documents: list = ()) -> list:
+        """bulk_write one collection's updates and inserts; the entries applied
+        (none when they were requeued)"""
+        requests = [UpdateOne(e["filter"], _to_update(e["ops"]), upsert=e["upsert"]) for e in entries]
+        requests += [InsertOne(document) for document in documents]
+        try:
+            await self.get_db()[collection].bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Rejected writes (e.g. a type conflict) would fail again; drop them
+            errors = e.details.get("writeErrors", [])
+            logger.error(f"Write-behind flush to {collection}: {len(errors)} writes rejected: {errors}")
+            rejected = {error["index"] for error in errors}
+            return [entry for i, entry in enumerate(entries) if i not in rejected]
+        except PyMongoError as e:
+            logger.warning(f"Write-behind flush to {collection} failed, will retry: {e}")
+            for entry in entries:
+                self._requeue(collection, entry)
+            if documents:
+                self._inserts.setdefault(collection, []).extend(documents)
+            return []
+        return entries
+
+    def _requeue(self, collection: str, entry: dict):
+        key = self._key(collection, entry["filter"])
+        current = self._pending.get(key)
+        if current is None:
+            self._pending[key] = entry
+            return
+        # Newer buffered updates go on top of the failed ones
+        _merge(entry["ops"], _to_update(current["ops"]))
+        entry["upsert"] = entry["upsert"] or current["upsert"]
+        entry["updates"] += current["updates"]
+        self._pending[key] = entry
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending_documents": len(self._pending),
+            "pending_updates": sum(e["updates"] for e in self._pending.values()),
+            "pending_inserts": sum(len(docs) for docs in self._inserts.values()),
+            "flush_interval_ms": self.flush_interval * 1000,
+            "max_pending": self.max_pending,
+            "flushed_documents": self.flushed_documents,
+            "flushed_updates": self.flushed_updates,
+        }
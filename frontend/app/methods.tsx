@@ -11,7 +11,7 @@ import {
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
-import { api } from '../src/services/api';
+import { api, waitForJob } from '../src/services/api';
 import MethodForm from '../src/components/MethodForm';
 import LessonForm from '../src/components/LessonForm';
 import BatchLessonForm from '../src/components/BatchLessonForm';
@@ -149,7 +149,8 @@ export default function MethodsScreen() {
           style: 'destructive',
           onPress: async () => {
             try {
-              await api.delete(`/api/methods/${method.id}`);
+              const res = await api.delete(`/api/methods/${method.id}`);
+              await waitForJob(res.data.job_id);
               setMethodLessons(prev => {
                 const copy = { ...prev };
                 delete copy[method.id];
@@ -159,7 +160,7 @@ export default function MethodsScreen() {
               await loadMethods();
               showAlert('Sucesso', 'Método deletado');
             } catch (error: any) {
-              showAlert('Erro', error.response?.data?.detail || 'Erro ao deletar');
+              showAlert('Erro', error.response?.data?.detail || error.message || 'Erro ao deletar');
             }
           },
         },
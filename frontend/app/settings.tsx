@@ -14,7 +14,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
 import { useAuth } from '../src/context/AuthContext';
-import { api } from '../src/services/api';
+import { api, waitForJob } from '../src/services/api';
 import * as Clipboard from 'expo-clipboard';
 import { showAlert, showPrompt } from '../src/utils/alert';
 import ResponsiveContainer from '../src/components/ResponsiveContainer';
@@ -120,6 +120,10 @@ export default function SettingsScreen() {
         const data = JSON.parse(text);
         // Preview first
         const preview = await api.post('/api/import/preview', { data });
+        if (!preview.data.valid) {
+          showAlert('Erro', preview.data.warnings.join('\n'));
+          return;
+        }
         if (preview.data.warnings?.length > 0) {
           showAlert(
             'Aviso',
@@ -129,20 +133,26 @@ export default function SettingsScreen() {
               {
                 text: 'Importar',
                 onPress: async () => {
-                  await api.post('/api/import', { data });
-                  showAlert('Sucesso', 'Dados importados com sucesso');
-                  loadStats();
+                  try {
+                    const res = await api.post('/api/import', { data });
+                    await waitForJob(res.data.job_id);
+                    showAlert('Sucesso', 'Dados importados com sucesso');
+                    loadStats();
+                  } catch (error: any) {
+                    showAlert('Erro', error.response?.data?.detail || error.message || 'Erro ao importar');
+                  }
                 },
               },
             ]
           );
         } else {
-          await api.post('/api/import', { data });
+          const res = await api.post('/api/import', { data });
+          await waitForJob(res.data.job_id);
           showAlert('Sucesso', 'Dados importados com sucesso');
           loadStats();
         }
-      } catch (error) {
-        showAlert('Erro', 'JSON inválido ou erro ao importar');
+      } catch (error: any) {
+        showAlert('Erro', error.response?.data?.detail || (error instanceof SyntaxError ? 'JSON inválido' : error.message) || 'Erro ao importar');
       }
     });
   };
@@ -167,10 +177,11 @@ export default function SettingsScreen() {
                   style: 'destructive',
                   onPress: async () => {
                     try {
-                      await api.post('/api/reset');
+                      const res = await api.post('/api/reset');
+                      await waitForJob(res.data.job_id);
                       showAlert('Pronto', 'Progresso resetado');
-                    } catch (error) {
-                      showAlert('Erro', 'Erro ao resetar');
+                    } catch (error: any) {
+                      showAlert('Erro', error.response?.data?.detail || error.message || 'Erro ao resetar');
                     }
                   },
                 },
@@ -38,7 +38,7 @@ export default function SessionCard({
   onToggle,
   onRefresh,
 }: SessionCardProps) {
-  const [lessons, setLessons] = useState<any[]>([]);
+  const [currentLessonData, setCurrentLessonData] = useState<any | null>(null);
   const [loading, setLoading] = useState(false);
   const [notes, setNotes] = useState('');
   const [warmupChecklist, setWarmupChecklist] = useState<any[]>([]);
@@ -50,7 +50,6 @@ export default function SessionCard({
     completed_lessons: [],
     practice_counts: {},
     last_practiced: {},
-    notes: {},
   };
 
   const currentLesson = sessionProgress.current_lesson || 1;
@@ -60,33 +59,47 @@ export default function SessionCard({
   const practicedToday = lastPracticed === todayStr;
 
   useEffect(() => {
-    if (expanded && session.type === 'progressive') {
-      loadLessons();
-    } else if (expanded && session.type === 'checklist') {
+    if (expanded && session.type === 'checklist') {
       loadWarmup();
     }
   }, [expanded]);
 
   useEffect(() => {
-    if (lessons.length > 0) {
-      const lessonNotes = sessionProgress.notes?.[String(currentLesson)] || '';
-      setNotes(lessonNotes);
+    if (expanded && session.type === 'progressive') {
+      loadLesson();
+    }
+  }, [expanded, currentLesson]);
+
+  useEffect(() => {
+    if (currentLessonData) {
+      loadNotes();
     }
-  }, [currentLesson, lessons]);
+  }, [currentLesson, currentLessonData]);
 
-  const loadLessons = async () => {
+  const loadLesson = async () => {
     setLoading(true);
     try {
-      const res = await api.get(`/api/lessons/${session.id}`);
-      setLessons(res.data.lessons);
+      const res = await api.get(`/api/lessons/${session.id}/${currentLesson}`);
+      setCurrentLessonData(res.data.lesson);
       setSessionTip(res.data.tip);
     } catch (error) {
-      console.error('Error loading lessons:', error);
+      setCurrentLessonData(null);
+      console.error('Error loading lesson:', error);
     } finally {
       setLoading(false);
     }
   };
 
+  const loadNotes = async () => {
+    try {
+      const res = await api.get(`/api/progress/notes/${session.id}/${currentLesson}`);
+      setNotes(res.data.notes || '');
+    } catch (error) {
+      setNotes('');
+      console.error('Error loading notes:', error);
+    }
+  };
+
   const loadWarmup = async () => {
     setLoading(true);
     try {
@@ -118,7 +131,6 @@ export default function SessionCard({
   };
 
   const handlePractice = () => {
-    const currentLessonData = lessons.find((l) => l.id === currentLesson);
     const lessonName = currentLessonData?.title ?? `Lição ${currentLesson}`;
 
     showAlert(
@@ -189,7 +201,6 @@ export default function SessionCard({
               direction,
             });
             onRefresh();
-            loadLessons();
           } catch {
             showAlert('Erro', 'Não foi possível mudar de lição. Tente novamente.');
           }
@@ -210,8 +221,6 @@ export default function SessionCard({
     }
   };
 
-  const currentLessonData = lessons.find((l) => l.id === currentLesson);
-
   return (
     <View style={[styles.container, practicedToday && styles.containerDone]}>
       <TouchableOpacity style={styles.header} onPress={onToggle}>
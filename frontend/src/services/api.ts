@@ -45,3 +45,19 @@ api.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+
+// Heavy operations (import, reset, deleting a method) answer 202 with a job
+// id; poll it until the job finishes and return its result. Gives up after
+// timeoutMs (the job may still finish later on the server).
+export async function waitForJob(jobId: string, intervalMs = 1000, timeoutMs = 5 * 60 * 1000) {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const res = await api.get(`/api/jobs/${jobId}`);
+    if (res.data.status === 'done') return res.data.result;
+    if (res.data.status === 'failed') throw new Error(res.data.error || 'Tarefa falhou');
+    if (Date.now() >= deadline) {
+      throw new Error('A tarefa está demorando mais que o esperado. Verifique novamente em alguns minutos.');
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
@@ -0,0 +1,54 @@
+"""Fixtures for the pytest suite: the backend app against mongomock.
+
+Run from the repository root (pip install -r backend/requirements-dev.txt):
+
+    python -m pytest -q
+"""
+
+import uuid
+
+import pytest
+
+from tests.loadtest import import_server, in_process_db
+
+ADMIN = {"username": "admin", "password": "violino2024"}
+
+
+@pytest.fixture
+def server():
+    """The backend module, with process-wide caches and buffers reset"""
+    server = import_server()
+    server.invalidate_user()
+    server.invalidate_catalog()
+    server.invalidate_settings()
+    server._custom_lesson_ids_ready = False
+    server.FINISHED_MIGRATIONS.clear()
+    server.LOGIN_ATTEMPTS.clear()
+    server.WRITE_BEHIND.enabled = False
+    yield server
+    server.db = None
+
+
+@pytest.fixture
+def db(server):
+    """A fresh in-memory database, used by the app"""
+    server.db = in_process_db(None, f"violin_test_{uuid.uuid4().hex[:8]}")
+    return server.db
+
+
+@pytest.fixture
+def client(server, db):
+    """A TestClient inside the app lifespan, logged in as admin"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        response = client.post("/api/auth/login", json=ADMIN)
+        assert response.status_code == 200, response.text
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield client
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the app's event loop"""
+    return client.portal.call
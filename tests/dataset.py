@@ -0,0 +1,335 @@
+"""Synthetic practice histories and data-size scaling benchmarks.
+
+`generate` fills a database with N users x Y years of practice: daily logs
+with per-session times, warmup checklists, progress with practice counts,
+completed lessons, lesson notes, plus custom methods/lessons shaped like those
+created by the batch endpoint. Practice days follow streaks (a practiced day
+makes the next one more likely) and session times vary around the
+configured durations.
+
+`bench` sweeps dataset sizes in-process and reports how the history-heavy
+endpoints (/api/stats, /api/calendar, /api/export, /api/lessons/*) scale,
+as a table, an ASCII chart and optionally CSV/JSON.
+
+Run from the repository root:
+
+    # fill a local database (users loaded0..N-1, password "loadtest-password")
+    python -m tests.dataset generate --mongo-url mongodb://localhost:27017 --db-name violin_dataset \\
+        --users 5 --years 3 --custom-lessons 2000
+
+    # sweep history length and custom catalog size (mongomock unless --mongo-url is given)
+    python -m tests.dataset bench --years 0.5 1 2 4 --custom-lessons 0 2000 --csv scaling.csv
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from tests.loadtest import LOADTEST_PASSWORD, import_server, in_process_db, latency_summary
+
+BENCH_USER = "bench"
+BENCH_DB = "violin_scalebench"
+
+NOTE_SNIPPETS = [
+    "Cuidado com a afinação do 3º dedo",
+    "Arco mais perto do cavalete",
+    "Metrônomo a 72, subir para 80 amanhã",
+    "Relaxar o polegar esquerdo",
+    "Mudança de posição ainda audível",
+    "Som mais cheio na corda Sol",
+]
+
+
+# ============== GENERATOR ==============
+
+def practice_days(rnd: random.Random, years: float, end: date) -> list:
+    """Dates practiced in the last `years`, with streaks"""
+    days = []
+    practiced = False
+    start = end - timedelta(days=int(365 * years) - 1)
+    current = start
+    while current <= end:
+        practiced = rnd.random() < (0.8 if practiced else 0.35)
+        if practiced:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def generate_user(server, username: str, years: float, rnd: random.Random, end: date = None) -> dict:
+    """Documents for one user: {"progress": doc, "daily_logs": [...], "warmups": [...], "lesson_notes": [...]}"""
+    end = end or date.today()
+    all_lessons = server.get_all_lessons()
+    durations = {s["id"]: s["default_duration_sec"] for s in server.SESSION_TYPES}
+    sessions = {
+        session_type: {"current_lesson": 1, "completed_lessons": [], "practice_counts": {}, "last_practiced": {}}
+        for session_type in all_lessons
+    }
+    daily_logs, warmups, notes = [], [], {}
+    dates = practice_days(rnd, years, end)
+
+    for day in dates:
+        day_str = day.isoformat()
+        practiced = ["warmup"] + rnd.sample(list(all_lessons), rnd.randint(1, len(all_lessons)))
+        session_times = {}
+        for session_type in practiced:
+            # Sessions run around their configured duration, sometimes much longer
+            session_times[session_type] = int(durations[session_type] * rnd.lognormvariate(0, 0.35))
+            if session_type == "warmup":
+                continue
+            data = sessions[session_type]
+            key = str(data["current_lesson"])
+            data["practice_counts"][key] = data["practice_counts"].get(key, 0) + rnd.randint(1, 4)
+            data["last_practiced"][key] = day_str
+            if rnd.random() < 0.05:
+                notes[(session_type, data["current_lesson"])] = rnd.choice(NOTE_SNIPPETS)
+            if rnd.random() < 0.3 and data["current_lesson"] < len(all_lessons[session_type]):
+                if data["current_lesson"] not in data["completed_lessons"]:
+                    data["completed_lessons"].append(data["current_lesson"])
+                data["current_lesson"] += 1
+
+        log = {
+            "username": username,
+            "date": day_str,
+            "studied": True,
+            "total_time_sec": sum(session_times.values()),
+            "session_times": session_times,
+            "sessions_practiced": practiced,
+            "created_at": datetime.combine(day, datetime.min.time()),
+        }
+        if rnd.random() < 0.1:
+            log["notes"] = rnd.choice(NOTE_SNIPPETS)
+        daily_logs.append(log)
+        warmups.append({
+            "username": username,
+            "date": day_str,
+            "completed_ids": [item["id"] for item in server.WARMUP_CHECKLIST if rnd.random() < 0.85],
+        })
+
+    progress = dict(sessions)
+    progress.update({
+        "username": username,
+        "practice_dates": [d.isoformat() for d in dates],
+        "first_practice_date": dates[0].isoformat() if dates else None,
+        "created_at": (end - timedelta(days=int(365 * years))).isoformat(),
+    })
+    lesson_notes = [
+        {"username": username, "session_type": session_type, "lesson_id": lesson_id, "notes": text}
+        for (session_type, lesson_id), text in notes.items()
+    ]
+    return {"progress": progress, "daily_logs": daily_logs, "warmups": warmups, "lesson_notes": lesson_notes}
+
+
+def generate_custom_catalog(server, count: int, rnd: random.Random, lessons_per_method: int = 60) -> dict:
+    """Custom methods with `count` lessons in total, like repeated batch creations"""
+    methods, lessons, next_ids = [], [], {}
+    session_types = list(server.get_all_lessons())
+    for m in range(0, count, lessons_per_method):
+        session_type = rnd.choice(session_types)
+        method = {
+            "name": f"Método sintético {len(methods) + 1}",
+            "author": f"Autor {len(methods) + 1}",
+            "category": "Estudos",
+            "session_type": session_type,
+            "created_by": "admin",
+            "created_at": datetime.utcnow(),
+        }
+        methods.append(method)
+        for order in range(1, min(lessons_per_method, count - m) + 1):
+            seq = next_ids.get(session_type, 0) + 1
+            next_ids[session_type] = seq
+            lessons.append({
+                "_method": method,
+                "lesson_id": server.CUSTOM_LESSON_ID_OFFSET + seq,
+                "title": f"{method['name']} {order}",
+                "session_type": session_type,
+                "subtitle": "",
+                "instruction": "",
+                "level": "",
+                "tags": rnd.sample(["sintético", "détaché", "spiccato", "legato", "posições"], 2),
+                "order": order,
+                "created_by": "admin",
+                "created_at": datetime.utcnow(),
+            })
+    return {"methods": methods, "lessons": lessons, "counters": next_ids}
+
+
+async def insert_dataset(server, users: int, years: float, custom_lessons: int, seed: int,
+                         username_prefix: str = "loaded") -> list:
+    """Generate and insert users + custom catalog into server.db; returns the usernames"""
+    rnd = random.Random(seed)
+    db = server.db
+    password_hash = server.hash_password(LOADTEST_PASSWORD)
+    usernames = [username_prefix if users == 1 else f"{username_prefix}{i}" for i in range(users)]
+
+    for username in usernames:
+        docs = generate_user(server, username, years, rnd)
+        await db.users.insert_one({
+            "username": username,
+            "password_hash": password_hash,
+            "created_at": datetime.utcnow(),
+            "first_login_at": datetime.utcnow(),
+            "must_change_password": False,
+            "password_changed": True,
+        })
+        await db.progress.insert_one(docs["progress"])
+        if docs["daily_logs"]:
+            await db.daily_logs.insert_many(docs["daily_logs"])
+            await db.warmups.insert_many(docs["warmups"])
+        if docs["lesson_notes"]:
+            await db.lesson_notes.insert_many(docs["lesson_notes"])
+
+    catalog = generate_custom_catalog(server, custom_lessons, rnd)
+    if catalog["methods"]:
+        result = await db.custom_methods.insert_many(catalog["methods"])
+        method_ids = {id(m): str(oid) for m, oid in zip(catalog["methods"], result.inserted_ids)}
+        for lesson in catalog["lessons"]:
+            lesson["custom_method_id"] = method_ids[id(lesson.pop("_method"))]
+        await db.custom_lessons.insert_many(catalog["lessons"])
+        for session_type, seq in catalog["counters"].items():
+            await db.counters.update_one(
+                {"_id": f"custom_lessons:{session_type}"}, {"$max": {"seq": seq}}, upsert=True
+            )
+    server.invalidate_catalog()
+    return usernames
+
+
+# ============== BENCHMARK ==============
+
+BENCH_ENDPOINTS = ["/api/stats", "/api/calendar", "/api/export", "/api/lessons/*"]
+
+
+async def bench_step(server, args, years: float, custom_lessons: int) -> dict:
+    """Latency summary per endpoint for one dataset size"""
+    server.db = in_process_db(args.mongo_url, BENCH_DB)
+    if args.mongo_url:
+        await server.db.client.drop_database(BENCH_DB)
+    await insert_dataset(server, 1, years, custom_lessons, args.seed, BENCH_USER)
+
+    samples = {endpoint: [] for endpoint in BENCH_ENDPOINTS}
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+            response = await http.post("/api/auth/login",
+                                       json={"username": BENCH_USER, "password": LOADTEST_PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            for _ in range(args.repeat):
+                for endpoint in BENCH_ENDPOINTS:
+                    paths = ([f"/api/lessons/{s}" for s in server.get_all_lessons()]
+                             if endpoint == "/api/lessons/*" else [endpoint])
+                    for path in paths:
+                        started = time.perf_counter()
+                        response = await http.get(path, headers=headers)
+                        samples[endpoint].append((time.perf_counter() - started) * 1000)
+                        response.raise_for_status()
+
+    if args.mongo_url:
+        await server.db.client.drop_database(BENCH_DB)
+        server.db.client.close()
+    server.db = None
+    return {endpoint: latency_summary(values) for endpoint, values in samples.items()}
+
+
+def ascii_chart(steps: list, endpoint: str, width: int = 50) -> str:
+    """Horizontal bars of p50 latency per dataset size for one endpoint"""
+    peak = max(step["endpoints"][endpoint]["p50_ms"] for step in steps) or 1
+    lines = [endpoint]
+    for step in steps:
+        p50 = step["endpoints"][endpoint]["p50_ms"]
+        bar = "#" * max(1, round(p50 / peak * width))
+        lines.append(f"  {step['label']:>22} | {bar} {p50:.1f} ms")
+    return "\n".join(lines)
+
+
+def write_csv(steps: list, path: str):
+    rows = ["years,custom_lessons,daily_logs,endpoint,p50_ms,p95_ms,p99_ms,mean_ms"]
+    for step in steps:
+        for endpoint, s in step["endpoints"].items():
+            rows.append(f"{step['years']},{step['custom_lessons']},{step['daily_logs']},{endpoint},"
+                        f"{s['p50_ms']},{s['p95_ms']},{s['p99_ms']},{s['mean_ms']}")
+    Path(path).write_text("\n".join(rows) + "\n")
+
+
+async def run_bench(args) -> list:
+    server = import_server()
+    steps = []
+    for custom_lessons in args.custom_lessons:
+        for years in args.years:
+            endpoints = await bench_step(server, args, years, custom_lessons)
+            daily_logs = len(practice_days(random.Random(args.seed), years, date.today()))
+            steps.append({
+                "label": f"{years}y/{daily_logs}d/{custom_lessons}cl",
+                "years": years,
+                "custom_lessons": custom_lessons,
+                "daily_logs": daily_logs,
+                "endpoints": endpoints,
+            })
+            print(f"{steps[-1]['label']:>22}: " + ", ".join(
+                f"{e} p50 {s['p50_ms']:.1f} ms" for e, s in endpoints.items()
+            ))
+    return steps
+
+
+async def run_generate(args):
+    if not args.mongo_url:
+        sys.exit("generate needs --mongo-url (the database to fill)")
+    server = import_server()
+    server.db = in_process_db(args.mongo_url, args.db_name)
+    usernames = await insert_dataset(server, args.users, args.years, args.custom_lessons, args.seed)
+    server.db.client.close()
+    print(f"Generated {len(usernames)} users x {args.years} years and {args.custom_lessons} custom lessons "
+          f"in {args.db_name} (password: {LOADTEST_PASSWORD})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="fill a database with synthetic users")
+    generate.add_argument("--mongo-url", required=True)
+    generate.add_argument("--db-name", default="violin_dataset")
+    generate.add_argument("--users", type=int, default=5)
+    generate.add_argument("--years", type=float, default=2)
+    generate.add_argument("--custom-lessons", type=int, default=500)
+    generate.add_argument("--seed", type=int, default=1)
+
+    bench = commands.add_parser("bench", help="sweep dataset sizes and chart endpoint latency")
+    bench.add_argument("--mongo-url", help="benchmark against this mongod instead of mongomock")
+    bench.add_argument("--years", type=float, nargs="+", default=[0.5, 1, 2, 4])
+    bench.add_argument("--custom-lessons", type=int, nargs="+", default=[0])
+    bench.add_argument("--repeat", type=int, default=10, help="requests per endpoint and size")
+    bench.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--csv", help="also write the sweep as CSV")
+    bench.add_argument("--output", help="also write the sweep as JSON")
+
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.command == "generate":
+        asyncio.run(run_generate(args))
+        return
+
+    steps = asyncio.run(run_bench(args))
+    print()
+    for endpoint in BENCH_ENDPOINTS:
+        print(ascii_chart(steps, endpoint) + "\n")
+    if args.csv:
+        write_csv(steps, args.csv)
+        print(f"CSV saved to {args.csv}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(steps, indent=2))
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
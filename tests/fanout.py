@@ -0,0 +1,236 @@
+"""Checks that handlers issue their independent Mongo queries concurrently.
+
+Every database call is delayed by a fixed round trip (--delay-ms) through a
+thin proxy over the in-process database, and each handler is timed directly.
+A handler whose reads run concurrently takes about one round trip per
+dependent step (its slowest chain of queries), not one per query; the report
+shows both and the run fails (exit code 1) when a handler needs more
+sequential round trips than its budget. It also checks that gather_all
+cancels the sibling queries when one of them fails.
+
+Run from the repository root:
+
+    python -m tests.fanout                                  # mongomock
+    python -m tests.fanout --mongo-url mongodb://localhost:27017 --delay-ms 20
+
+tests/test_fanout.py runs the same checks under pytest.
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import sys
+import time
+from datetime import datetime
+
+from tests.loadtest import import_server, in_process_db
+
+FANOUT_DB = "violin_fanout"
+FANOUT_USER = "fanout"
+
+# handler -> sequential round trips it may take
+BUDGETS = {
+    "progress": 1,
+    "stats": 1,
+    "calendar": 1,
+    "export": 1,
+    "lessons (cold catalog)": 1,
+    "reset (job)": 2,  # the deletes, then the fresh progress document
+}
+
+
+# ============== LATENCY PROXY ==============
+
+class Counter:
+    def __init__(self):
+        self.queries = 0
+
+
+class SlowCursor:
+    """Cursor whose to_list costs one round trip"""
+
+    def __init__(self, cursor, delay: float, counter: Counter):
+        self._cursor = cursor
+        self._delay = delay
+        self._counter = counter
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor = self._cursor.limit(*args, **kwargs)
+        return self
+
+    async def to_list(self, *args, **kwargs):
+        self._counter.queries += 1
+        await asyncio.sleep(self._delay)
+        return await self._cursor.to_list(*args, **kwargs)
+
+
+class SlowCollection:
+    """Collection whose coroutine methods each cost one round trip"""
+
+    def __init__(self, collection, delay: float, counter: Counter):
+        self._collection = collection
+        self._delay = delay
+        self._counter = counter
+
+    def find(self, *args, **kwargs):
+        return SlowCursor(self._collection.find(*args, **kwargs), self._delay, self._counter)
+
+    def aggregate(self, *args, **kwargs):
+        return SlowCursor(self._collection.aggregate(*args, **kwargs), self._delay, self._counter)
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def delayed(*args, **kwargs):
+            self._counter.queries += 1
+            await asyncio.sleep(self._delay)
+            return await attr(*args, **kwargs)
+        return delayed
+
+
+class SlowDatabase:
+    def __init__(self, database, delay: float):
+        self._database = database
+        self._delay = delay
+        self.counter = Counter()
+
+    def __getitem__(self, name):
+        return SlowCollection(self._database[name], self._delay, self.counter)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._database, name)
+        if inspect.iscoroutinefunction(attr):
+            return attr
+        return SlowCollection(attr, self._delay, self.counter)
+
+
+# ============== CHECKS ==============
+
+async def seed(server, username: str):
+    await server.db.users.insert_one({"username": username, "created_at": datetime.utcnow()})
+    await server.init_user_progress(username)
+    today = server.get_today_string()
+    await server.db.daily_logs.insert_one({"username": username, "date": today, "total_time_sec": 600})
+    await server.db.warmups.insert_one({"username": username, "date": today, "completed_ids": []})
+
+
+async def measure(server, slow: SlowDatabase, user: dict) -> list:
+    """[(handler, queries, elapsed seconds)]"""
+    def cold_catalog():
+        server.invalidate_catalog()
+
+    async def no_report(done, total=None, stage=None):
+        pass
+
+    cases = [
+        ("progress", None, lambda: server.get_progress(user)),
+        ("stats", None, lambda: server.get_stats(user)),
+        ("calendar", None, lambda: server.get_calendar(user)),
+        ("export", None, lambda: server.export_data(user)),
+        ("lessons (cold catalog)", cold_catalog, lambda: server.get_lessons("scales")),
+        ("reset (job)", None, lambda: server.reset_job(user, no_report)),
+    ]
+    rows = []
+    for name, prepare, call in cases:
+        if prepare:
+            prepare()
+        before = slow.counter.queries
+        started = time.perf_counter()
+        await call()
+        rows.append((name, slow.counter.queries - before, time.perf_counter() - started))
+        await server.get_catalog()  # later cases measure their own queries only
+    return rows
+
+
+async def check_cancellation(server, delay: float) -> bool:
+    """A failing query cancels its still-running siblings before the error surfaces"""
+    sibling = {"cancelled": False}
+
+    async def slow_query():
+        try:
+            await asyncio.sleep(delay * 10)
+        except asyncio.CancelledError:
+            sibling["cancelled"] = True
+            raise
+
+    async def failing_query():
+        await asyncio.sleep(delay)
+        raise RuntimeError("query failed")
+
+    try:
+        await server.gather_all(slow_query(), failing_query())
+    except RuntimeError:
+        return sibling["cancelled"]
+    return False
+
+
+def over_budget(rows: list, delay: float) -> dict:
+    """handler -> sequential round trips, for the handlers over their budget"""
+    return {name: elapsed / delay for name, _, elapsed in rows if elapsed / delay >= BUDGETS[name] + 0.5}
+
+
+async def measure_handlers(server, database, delay: float) -> list:
+    """Seed `database` as at startup, then measure() every handler through the proxy"""
+    server.db = database
+    await seed(server, FANOUT_USER)
+    await server.run_migrations()  # as at startup: no per-request fallbacks afterwards
+    await server.init_app_settings()
+    await server.get_app_settings()
+    await server.get_catalog()
+    server.WRITE_BEHIND.enabled = False
+
+    slow = SlowDatabase(database, delay)
+    server.db = slow
+    user = {"username": FANOUT_USER, "created_at": datetime.utcnow()}
+    try:
+        return await measure(server, slow, user)
+    finally:
+        server.db = None
+
+
+async def run(args) -> bool:
+    server = import_server()
+    database = in_process_db(args.mongo_url, FANOUT_DB)
+    if args.mongo_url:
+        await database.client.drop_database(FANOUT_DB)
+    delay = args.delay_ms / 1000
+    try:
+        rows = await measure_handlers(server, database, delay)
+        cancelled = await check_cancellation(server, delay)
+    finally:
+        if args.mongo_url:
+            await database.client.drop_database(FANOUT_DB)
+            database.client.close()
+
+    over = over_budget(rows, delay)
+    print(f"round trip {args.delay_ms:.0f} ms\n")
+    print(f"{'handler':<24}{'queries':>8}{'sequential':>12}{'measured':>10}{'trips':>7}{'budget':>8}")
+    for name, queries, elapsed in rows:
+        flag = "  <- over budget" if name in over else ""
+        print(f"{name:<24}{queries:>8}{queries * args.delay_ms:>10.0f}ms{elapsed * 1000:>8.0f}ms"
+              f"{elapsed / delay:>7.1f}{BUDGETS[name]:>8}{flag}")
+    print(f"\nsibling queries cancelled on error: {'yes' if cancelled else 'NO'}")
+    return not over and cancelled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--mongo-url", help="against this mongod instead of mongomock")
+    parser.add_argument("--delay-ms", type=float, default=50, help="added latency per database call")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
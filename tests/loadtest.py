@@ -0,0 +1,328 @@
+"""HTTP load test driving the API through realistic user journeys.
+
+Each virtual user repeatedly runs: login, the dashboard trio (session-info,
+stats and progress fetched together), a few practice taps, advance, warmup
+checks and, now and then, an export. Throughput, p50/p95/p99 per endpoint and
+errors are printed and saved as JSON; pass --baseline to compare with an
+earlier run.
+
+Run from the repository root:
+
+    # in-process app + in-memory Mongo stand-in (pip install -r backend/requirements-dev.txt)
+    python -m tests.loadtest --users 20 --concurrency 20 --duration 30
+
+    # in-process app against a local mongod (uses and drops the `violin_loadtest` database)
+    python -m tests.loadtest --mongo-url mongodb://localhost:27017
+
+    # a running deployment (single account)
+    python -m tests.loadtest --base-url http://localhost:8001 --username admin --password ...
+
+    # compare with a stored run; exits 1 when p95 or throughput regress past --threshold
+    python -m tests.loadtest --output run.json --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+LOADTEST_DB = "violin_loadtest"
+LOADTEST_PASSWORD = "loadtest-password"
+
+SESSION_TYPES = ["scales", "bow", "speed", "positions", "studies", "repertoire"]
+
+
+# ============== TARGETS ==============
+
+def import_server():
+    """Import the backend app module (requires MONGO_URL only to be set, not reachable)"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    # A few accounts replay journeys back to back: per-user rate limits would
+    # turn the measurement into 429s
+    os.environ.setdefault("RATE_LIMIT", "false")
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def in_process_db(mongo_url: str = None, db_name: str = LOADTEST_DB):
+    """A local mongod database, or an in-memory stand-in when no URL is given"""
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(mongo_url)[db_name]
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed: pip install -r backend/requirements-dev.txt "
+                 "or pass --mongo-url")
+    return AsyncMongoMockClient()[db_name]
+
+
+async def seed_users(server, count: int) -> list:
+    """Create `count` ready-to-use accounts directly in the database"""
+    password_hash = server.hash_password(LOADTEST_PASSWORD)
+    usernames = [f"loadtest{i}" for i in range(count)]
+    for username in usernames:
+        await server.db.users.insert_one({
+            "username": username,
+            "password_hash": password_hash,
+            "created_at": datetime.utcnow(),
+            "first_login_at": datetime.utcnow(),
+            "must_change_password": False,
+            "password_changed": True,
+        })
+        await server.init_user_progress(username)
+    return [(username, LOADTEST_PASSWORD) for username in usernames]
+
+
+@asynccontextmanager
+async def open_target(args, accounts: int = None):
+    """Yields (httpx client, [(username, password)]) for the selected target"""
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as http:
+            yield http, [(args.username, args.password)]
+        return
+
+    server = import_server()
+    server.db = in_process_db(args.mongo_url)
+    if args.mongo_url:
+        await server.db.client.drop_database(LOADTEST_DB)
+    async with server.lifespan(server.app):
+        users = await seed_users(server, accounts or args.users)
+        transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as http:
+            yield http, users
+    if args.mongo_url:
+        await server.db.client.drop_database(LOADTEST_DB)
+        server.db.client.close()
+    server.db = None
+
+
+# ============== RECORDING ==============
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # endpoint -> [latency_ms]
+        self.errors = {}  # endpoint -> {status or exception name: count}
+
+    async def call(self, http: httpx.AsyncClient, method: str, endpoint: str, url: str = None, **kwargs):
+        """Issue one request, recording latency under `endpoint` (the route template)"""
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url or endpoint, **kwargs)
+        except httpx.HTTPError as e:
+            self._error(endpoint, type(e).__name__)
+            return None
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.samples.setdefault(endpoint, []).append(latency_ms)
+        if response.status_code >= 400:
+            self._error(endpoint, str(response.status_code))
+            return None
+        return response
+
+    def _error(self, endpoint: str, kind: str):
+        errors = self.errors.setdefault(endpoint, {})
+        errors[kind] = errors.get(kind, 0) + 1
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(latencies: list) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+def summarize(recorder: Recorder, elapsed_sec: float) -> dict:
+    endpoints = {}
+    for endpoint in sorted(set(recorder.samples) | set(recorder.errors)):
+        summary = latency_summary(recorder.samples.get(endpoint, []))
+        summary["rps"] = round(summary["count"] / elapsed_sec, 2)
+        summary["errors"] = recorder.errors.get(endpoint, {})
+        endpoints[endpoint] = summary
+    requests = sum(len(v) for v in recorder.samples.values())
+    errors = sum(sum(e.values()) for e in recorder.errors.values())
+    return {
+        "elapsed_sec": round(elapsed_sec, 3),
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed_sec, 2),
+        "endpoints": endpoints,
+    }
+
+
+# ============== JOURNEYS ==============
+
+async def user_journey(http: httpx.AsyncClient, rec: Recorder, username: str, password: str,
+                       rnd: random.Random, export_probability: float):
+    """One visit of the app: login, dashboard, practice, advance, warmup, maybe export"""
+    response = await rec.call(http, "POST", "/api/auth/login",
+                              json={"username": username, "password": password})
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # Dashboard loads its three calls in parallel
+    _, _, progress = await asyncio.gather(
+        rec.call(http, "GET", "/api/session-info", headers=headers),
+        rec.call(http, "GET", "/api/stats", headers=headers),
+        rec.call(http, "GET", "/api/progress", headers=headers),
+    )
+    progress = progress.json() if progress is not None else {}
+
+    session_type = rnd.choice(SESSION_TYPES)
+    lesson_id = progress.get(session_type, {}).get("current_lesson", 1)
+    await rec.call(http, "GET", "/api/lessons/{session_type}/{lesson_id}",
+                   f"/api/lessons/{session_type}/{lesson_id}", headers=headers)
+
+    for _ in range(rnd.randint(1, 4)):
+        await rec.call(http, "POST", "/api/progress/practice", headers=headers,
+                       json={"session_type": session_type, "lesson_id": lesson_id})
+
+    if rnd.random() < 0.5:
+        await rec.call(http, "POST", "/api/progress/advance", headers=headers,
+                       json={"session_type": session_type, "direction": "next"})
+
+    for item_id in rnd.sample(range(1, 6), rnd.randint(1, 3)):
+        await rec.call(http, "POST", "/api/warmup/check", headers=headers,
+                       json={"item_id": item_id, "completed": True})
+
+    if rnd.random() < export_probability:
+        await rec.call(http, "GET", "/api/export", headers=headers)
+
+
+async def run_load(http: httpx.AsyncClient, users: list, args) -> dict:
+    rec = Recorder()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    started = time.perf_counter()
+
+    async def virtual_user(index: int):
+        rnd = random.Random(args.seed + index)
+        username, password = users[index % len(users)]
+        journeys = 0
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if deadline is None and journeys >= args.journeys:
+                return
+            await user_journey(http, rec, username, password, rnd, args.export_probability)
+            journeys += 1
+
+    await asyncio.gather(*(virtual_user(i) for i in range(args.concurrency)))
+    return summarize(rec, time.perf_counter() - started)
+
+
+# ============== REPORTING ==============
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=BACKEND_DIR.parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_metadata(args) -> dict:
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "target": args.base_url or ("mongod " + args.mongo_url if args.mongo_url else "in-process mongomock"),
+        "options": {k: v for k, v in vars(args).items() if k not in ("password", "baseline", "output")},
+    }
+
+
+def print_report(results: dict):
+    print(f"\n{results['requests']} requests in {results['elapsed_sec']:.1f}s "
+          f"({results['rps']:.1f} req/s), {results['errors']} errors\n")
+    print(f"{'endpoint':44} {'count':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for endpoint, s in results["endpoints"].items():
+        errors = sum(s["errors"].values())
+        print(f"{endpoint:44} {s['count']:7d} {s['rps']:8.1f} {s['p50_ms']:8.1f}ms "
+              f"{s['p95_ms']:8.1f}ms {s['p99_ms']:8.1f}ms {errors:7d}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Regressions vs. the baseline: p95 up or throughput down by more than `threshold`"""
+    regressions = []
+    if baseline["rps"] and results["rps"] < baseline["rps"] * (1 - threshold):
+        regressions.append(f"throughput {baseline['rps']:.1f} -> {results['rps']:.1f} req/s")
+    print(f"\n{'endpoint':44} {'p95 base':>10} {'p95 now':>10} {'change':>8}")
+    for endpoint, now in results["endpoints"].items():
+        base = baseline["endpoints"].get(endpoint)
+        if not base or not base["p95_ms"]:
+            continue
+        change = now["p95_ms"] / base["p95_ms"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{endpoint:44} {base['p95_ms']:9.1f}ms {now['p95_ms']:9.1f}ms {change:+7.0%}{flag}")
+        if flag:
+            regressions.append(f"{endpoint} p95 {base['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+    return regressions
+
+
+def add_target_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--base-url", help="run against a deployed server instead of in-process")
+    parser.add_argument("--username", default="admin", help="account used with --base-url")
+    parser.add_argument("--password", default="", help="password used with --base-url")
+    parser.add_argument("--mongo-url", help="in-process app against this mongod instead of mongomock")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    add_target_arguments(parser)
+    parser.add_argument("--users", type=int, default=10, help="accounts seeded for in-process runs")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run (0: use --journeys)")
+    parser.add_argument("--journeys", type=int, default=5, help="journeys per virtual user when --duration is 0")
+    parser.add_argument("--export-probability", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async def run():
+        async with open_target(args) as (http, users):
+            return await run_load(http, users, args)
+
+    results = asyncio.run(run())
+    results["meta"] = run_metadata(args)
+    print_report(results)
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
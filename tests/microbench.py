@@ -0,0 +1,122 @@
+"""Micro-benchmarks for the pure-Python hot paths of the backend.
+
+Covers merging custom lessons into the catalog, the method info join done
+for lesson lists, calculate_level, the /session-info timeline and the
+/api/stats completion counting. Each benchmark is timed like timeit (auto
+range, best of several repeats) and compared with the stored baseline in
+tests/microbench_baselines.json; a benchmark slower than the baseline by
+more than --threshold is reported as a regression (exit code 1).
+
+Baselines depend on the machine. Record your own before optimizing:
+
+    python -m tests.microbench --save          # (re)write the baselines
+    python -m tests.microbench                 # compare with them
+    python -m tests.microbench -k catalog      # only benchmarks whose name contains "catalog"
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+from pathlib import Path
+
+from bson import ObjectId
+
+from tests.dataset import generate_custom_catalog, generate_user
+from tests.loadtest import import_server
+
+BASELINES_FILE = Path(__file__).resolve().parent / "microbench_baselines.json"
+REPEATS = 7
+
+
+def custom_catalog_docs(server, count: int) -> tuple:
+    """Custom method/lesson documents as they come back from Mongo"""
+    catalog = generate_custom_catalog(server, count, random.Random(count))
+    for method in catalog["methods"]:
+        method["_id"] = ObjectId()
+    for lesson in catalog["lessons"]:
+        lesson["_id"] = ObjectId()
+        lesson["custom_method_id"] = str(lesson.pop("_method")["_id"])
+    return catalog["lessons"], catalog["methods"]
+
+
+def benchmarks(server) -> dict:
+    """name -> zero-argument callable"""
+    benches = {}
+
+    for count in (0, 100, 1000, 5000):
+        lessons, methods = custom_catalog_docs(server, count)
+        benches[f"catalog_merge[{count}]"] = (
+            lambda lessons=lessons, methods=methods: server.SEED_CATALOG.with_custom(lessons, methods)
+        )
+
+    catalog = server.SEED_CATALOG.with_custom(*custom_catalog_docs(server, 1000))
+    studies = catalog.lessons["studies"]
+    benches["method_join[studies]"] = lambda: [catalog.with_method_info(lesson) for lesson in studies]
+
+    levels = range(0, 320)
+    benches["calculate_level[0..319]"] = lambda: [server.calculate_level(n) for n in levels]
+
+    durations = {s["id"]: s["default_duration_sec"] for s in server.SESSION_TYPES}
+    benches["session_timeline"] = lambda: server.build_session_timeline(durations, catalog.lessons)
+
+    progress = generate_user(server, "bench", 4, random.Random(1))["progress"]
+    benches["stats_completion[4y]"] = lambda: server.completion_summary(progress, catalog.lessons)
+    return benches
+
+
+def time_call(fn) -> float:
+    """Best time per call in microseconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEATS, number)) / number * 1e6
+
+
+def machine() -> str:
+    return f"{platform.machine()} {platform.processor() or platform.system()} / Python {platform.python_version()}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--baseline", default=str(BASELINES_FILE))
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    server = import_server()
+    stored = json.loads(Path(args.baseline).read_text()) if Path(args.baseline).exists() else {}
+    baselines = stored.get("benchmarks", {})
+    if stored and stored.get("machine") != machine():
+        print(f"Note: baselines were recorded on {stored.get('machine')}, this is {machine()}\n")
+
+    results, regressions = {}, []
+    print(f"{'benchmark':28} {'per call':>12} {'baseline':>12} {'change':>8}")
+    for name, fn in benchmarks(server).items():
+        if args.filter not in name:
+            continue
+        us = time_call(fn)
+        results[name] = round(us, 3)
+        base = baselines.get(name)
+        if base:
+            change = us / base - 1
+            flag = "  REGRESSION" if change > args.threshold else ""
+            print(f"{name:28} {us:10.1f}us {base:10.1f}us {change:+7.0%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:28} {us:10.1f}us {'-':>12}")
+
+    if args.save:
+        baselines.update(results)
+        Path(args.baseline).write_text(json.dumps({"machine": machine(), "benchmarks": baselines}, indent=2) + "\n")
+        print(f"\nBaselines saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Handlers issue their independent queries concurrently (see tests/fanout.py)."""
+
+import asyncio
+
+from tests import fanout
+from tests.loadtest import in_process_db
+
+DELAY_SEC = 0.05
+
+
+def test_handlers_stay_within_their_round_trip_budget(server):
+    database = in_process_db(None, fanout.FANOUT_DB)
+    rows = asyncio.run(fanout.measure_handlers(server, database, DELAY_SEC))
+    assert {name for name, _, _ in rows} == set(fanout.BUDGETS)
+    assert fanout.over_budget(rows, DELAY_SEC) == {}
+
+
+def test_gather_all_cancels_siblings_when_one_query_fails(server):
+    assert asyncio.run(fanout.check_cancellation(server, 0.01))
+
+
+def test_gather_all_returns_results_in_order(server):
+    async def after(delay, value):
+        await asyncio.sleep(delay)
+        return value
+
+    assert asyncio.run(server.gather_all(after(0.02, "a"), after(0, "b"))) == ["a", "b"]
@@ -0,0 +1,57 @@
+"""Practice timer heartbeats are counted once per device and seq (POST /api/timer/heartbeat)."""
+
+
+def heartbeat(client, seq: int, deltas: dict, device_id: str = "phone"):
+    response = client.post("/api/timer/heartbeat", json={"device_id": device_id, "seq": seq, "deltas": deltas})
+    assert response.status_code == 200, response.text
+    return response.json()["accepted"]
+
+
+def today_times(server, client, run) -> dict:
+    run(server.HEARTBEATS.flush)
+    log = client.get(f"/api/daily-logs/{server.get_today_string()}").json()["log"]
+    return log["session_times"] if log else {}
+
+
+def test_retried_heartbeat_is_counted_once(server, client, run):
+    assert heartbeat(client, 1, {"scales": 30}) is True
+    assert heartbeat(client, 1, {"scales": 30}) is False
+    assert heartbeat(client, 2, {"scales": 30, "bow": 15}) is True
+    assert today_times(server, client, run) == {"scales": 60, "bow": 15}
+    # acknowledged in timer_devices, not in the buffer that was just flushed
+    assert heartbeat(client, 2, {"scales": 30, "bow": 15}) is False
+    assert today_times(server, client, run) == {"scales": 60, "bow": 15}
+
+
+def test_heartbeat_retried_after_a_later_one_is_counted_once(server, client, run):
+    assert heartbeat(client, 5, {"scales": 10}) is True
+    assert heartbeat(client, 4, {"scales": 10}) is True
+    assert heartbeat(client, 4, {"scales": 10}) is False
+    assert heartbeat(client, 5, {"scales": 10}) is False
+    assert today_times(server, client, run) == {"scales": 20}
+
+
+def test_heartbeat_too_far_behind_the_newest_is_refused(server, client):
+    assert heartbeat(client, 200, {"scales": 10}) is True
+    assert heartbeat(client, 200 - server.HEARTBEAT_SEQ_WINDOW, {"scales": 10}) is False
+    assert heartbeat(client, 201 - server.HEARTBEAT_SEQ_WINDOW, {"scales": 10}) is True
+
+
+def test_devices_are_acknowledged_separately(server, client, run):
+    assert heartbeat(client, 1, {"scales": 10}, "phone") is True
+    assert heartbeat(client, 1, {"scales": 10}, "tablet") is True
+    assert today_times(server, client, run) == {"scales": 20}
+
+    async def devices():
+        return await server.db.timer_devices.find({}, {"_id": 0, "device_id": 1, "seq": 1, "acked": 1}).to_list(None)
+    assert sorted(run(devices), key=lambda d: d["device_id"]) == [
+        {"device_id": "phone", "seq": 1, "acked": [1]},
+        {"device_id": "tablet", "seq": 1, "acked": [1]},
+    ]
+
+
+def test_invalid_deltas_are_refused(client):
+    for deltas in ({"nope": 1}, {"bow": 100000}, {"bow": -1}):
+        response = client.post("/api/timer/heartbeat", json={"device_id": "phone", "seq": 1, "deltas": deltas})
+        assert response.status_code == 400
+    assert heartbeat(client, 1, {"bow": 5}) is True
@@ -0,0 +1,83 @@
+"""Cache invalidations published by one process reach the others (backend/invalidation.py)."""
+
+import asyncio
+
+from tests.loadtest import import_server, in_process_db
+
+import_server()  # puts backend/ on sys.path
+from invalidation import InvalidationBus  # noqa: E402
+
+
+def recording_bus(database, received: list, **options) -> InvalidationBus:
+    return InvalidationBus(lambda: database, {
+        "catalog": lambda key: received.append(("catalog", key)),
+        "live": lambda key, data: received.append(("live", key, data)),
+    }, **options)
+
+
+async def wait_for(condition, timeout: float = 2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_publish_reaches_the_other_processes_once():
+    async def scenario():
+        database = in_process_db(None, "violin_test_bus")
+        mine, theirs = [], []
+        bus, other = recording_bus(database, mine), recording_bus(database, theirs)
+        await bus.start()
+        await other.start()
+        try:
+            await wait_for(lambda: bus.mode and other.mode)
+            await bus.publish("catalog", "kreutzer")
+            await bus.publish("live", "ana", {"type": "practice"})
+            await wait_for(lambda: len(theirs) == 2)
+            await asyncio.sleep(0.3)  # nothing else arrives, nothing comes back
+            return mine, theirs, bus.received, other.received
+        finally:
+            await bus.stop()
+            await other.stop()
+
+    mine, theirs, bus_received, other_received = asyncio.run(scenario())
+    expected = [("catalog", "kreutzer"), ("live", "ana", {"type": "practice"})]
+    assert mine == expected  # dispatched locally, not again from the collection
+    assert theirs == expected
+    assert (bus_received, other_received) == (0, 2)
+
+
+def test_restarted_bus_follows_again():
+    async def scenario():
+        database = in_process_db(None, "violin_test_restart")
+        received = []
+        bus = recording_bus(database, received)
+        other = recording_bus(database, [])
+        modes = []
+        for _ in range(2):
+            await bus.start()
+            await wait_for(lambda: bus.mode)
+            modes.append(bus.mode)
+            await other.publish("catalog")
+            await wait_for(lambda: len(received) == len(modes))
+            await bus.stop()
+            assert bus.mode is None
+        return modes, received
+
+    modes, received = asyncio.run(scenario())
+    assert modes[0] == modes[1]
+    assert received == [("catalog", None), ("catalog", None)]
+
+
+def test_disabled_bus_only_invalidates_this_process():
+    async def scenario():
+        database = in_process_db(None, "violin_test_disabled")
+        received = []
+        bus = recording_bus(database, received, enabled=False)
+        await bus.start()
+        await bus.publish("catalog")
+        return received, bus.published, await database.list_collection_names()
+
+    received, published, collections = asyncio.run(scenario())
+    assert received == [("catalog", None)]
+    assert published == 0 and "cache_invalidations" not in collections
@@ -0,0 +1,102 @@
+"""Offline sync batches are applied once, even when retried or interrupted (POST /api/sync)."""
+
+from datetime import datetime, timedelta
+
+from pymongo.errors import PyMongoError
+
+OPS = [
+    {"op_id": "p1", "type": "practice", "session_type": "scales", "lesson_id": 5, "duration_sec": 30,
+     "ts": "2026-02-10T10:00:00Z"},
+    {"op_id": "a1", "type": "advance", "session_type": "speed", "direction": "next"},
+    {"op_id": "p2", "type": "practice", "session_type": "scales", "lesson_id": 5, "ts": "2026-02-10T11:00:00Z"},
+    {"op_id": "n1", "type": "notes", "session_type": "scales", "lesson_id": 5, "notes": "arco"},
+]
+
+
+def sync(client, operations):
+    return client.post("/api/sync", json={"operations": operations})
+
+
+def test_replayed_batch_is_applied_once(client):
+    first = sync(client, OPS + [OPS[0]]).json()
+    assert first["applied"] == ["p1", "a1", "p2", "n1"] and first["duplicates"] == ["p1"]
+
+    replay = sync(client, OPS).json()
+    assert replay["applied"] == [] and sorted(replay["duplicates"]) == ["a1", "n1", "p1", "p2"]
+    progress = replay["progress"]
+    assert progress["scales"]["practice_counts"]["5"] == 2
+    assert progress["speed"]["current_lesson"] == 2
+    log = client.get("/api/daily-logs/2026-02-10").json()["log"]
+    assert log["session_times"]["scales"] == 30
+    assert len(client.get("/api/progress/history/scales/5").json()["events"]) == 2
+
+
+def test_interrupted_batch_resumes_without_applying_twice(server, client, run, monkeypatch):
+    collection_class = type(server.db.daily_logs)
+    bulk_write = collection_class.bulk_write
+
+    async def failing(self, *args, **kwargs):
+        if self.name == "daily_logs":
+            raise PyMongoError("connection lost")
+        return await bulk_write(self, *args, **kwargs)
+
+    # The daily log write fails after the events and the progress update went through
+    monkeypatch.setattr(collection_class, "bulk_write", failing)
+    try:
+        sync(client, OPS)
+    except PyMongoError:
+        pass
+    monkeypatch.setattr(collection_class, "bulk_write", bulk_write)
+    progress = client.get("/api/progress").json()
+    assert progress["scales"]["practice_counts"]["5"] == 2 and progress["speed"]["current_lesson"] == 2
+
+    retry = sync(client, OPS).json()
+    assert retry["applied"] == ["p1", "a1", "p2", "n1"] and retry["duplicates"] == []
+    assert retry["progress"]["scales"]["practice_counts"]["5"] == 2
+    assert retry["progress"]["speed"]["current_lesson"] == 2
+    assert client.get("/api/daily-logs/2026-02-10").json()["log"]["session_times"]["scales"] == 30
+    assert len(client.get("/api/progress/history/scales/5").json()["events"]) == 2
+
+    async def leftovers():
+        return (
+            await server.db.session_time.count_documents({"op_id": "p1"}),
+            (await server.db.progress.find_one({"username": "admin"})).get("sync_pending_ops"),
+            await server.db.daily_logs.count_documents({"sync_pending_ops.0": {"$exists": True}}),
+            await server.db.sync_ops.count_documents({"applied_at": {"$exists": False}}),
+        )
+    assert run(leftovers) == (1, [], 0, 0)
+    assert sync(client, OPS).json()["applied"] == []
+
+
+def test_ops_claimed_by_a_running_upload_are_refused(server, client, run):
+    async def running_claim():
+        now = datetime.utcnow()
+        await server.db.sync_ops.insert_one({
+            "username": "admin", "op_id": "busy", "received_at": now,
+            "claim_id": "other", "lease_until": now + timedelta(seconds=60),
+        })
+    run(running_claim)
+
+    operations = [
+        {"op_id": "free", "type": "practice", "session_type": "scales", "lesson_id": 6},
+        {"op_id": "busy", "type": "practice", "session_type": "scales", "lesson_id": 6},
+    ]
+    assert sync(client, operations).status_code == 409
+    assert "6" not in client.get("/api/progress").json()["scales"]["practice_counts"]
+
+    async def expire_claim():
+        await server.db.sync_ops.update_one({"op_id": "busy"}, {"$set": {"lease_until": datetime.utcnow()}})
+    run(expire_claim)
+    response = sync(client, operations).json()
+    assert response["applied"] == ["free", "busy"]
+    assert response["progress"]["scales"]["practice_counts"]["6"] == 2
+
+
+def test_invalid_ops_are_rejected_and_not_retried(client):
+    operations = [
+        {"op_id": "r1", "type": "teleport"},
+        {"op_id": "r2", "type": "practice", "session_type": "nope", "lesson_id": 1},
+    ]
+    first = sync(client, operations).json()
+    assert first["applied"] == [] and [r["op_id"] for r in first["rejected"]] == ["r1", "r2"]
+    assert sorted(sync(client, operations).json()["duplicates"]) == ["r1", "r2"]
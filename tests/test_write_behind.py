@@ -0,0 +1,175 @@
+"""Write-behind coalescing and flushes (backend/write_behind.py)."""
+
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from tests.loadtest import import_server, in_process_db
+
+import_server()  # puts backend/ on sys.path
+from write_behind import CoalescingBuffer, coalesce  # noqa: E402
+
+
+class FlakyDatabase:
+    """Database whose collections fail or stall bulk_write on demand"""
+
+    def __init__(self, database):
+        self.database = database
+        self.fail = None  # exception raised instead of every bulk_write while set
+        self.after_write = None  # awaited after a bulk_write was applied
+
+    def __getitem__(self, name):
+        return FlakyCollection(self, self.database[name])
+
+
+class FlakyCollection:
+    def __init__(self, owner: FlakyDatabase, collection):
+        self.owner = owner
+        self.collection = collection
+
+    async def bulk_write(self, requests, ordered=True):
+        if self.owner.fail is not None:
+            raise self.owner.fail
+        result = await self.collection.bulk_write(requests, ordered=ordered)
+        if self.owner.after_write is not None:
+            await self.owner.after_write()
+        return result
+
+
+@pytest.fixture
+def database():
+    return FlakyDatabase(in_process_db(None, "violin_test_write_behind"))
+
+
+def count(database, collection: str, **filter):
+    async def read():
+        document = await database.database[collection].find_one(filter)
+        return document and document.get("n")
+    return read
+
+
+def test_coalesce_folds_updates_in_order():
+    assert coalesce([
+        {"$inc": {"n": 1}, "$set": {"at": 1}, "$addToSet": {"tags": "a"}, "$setOnInsert": {"created": 1}},
+        {"$inc": {"n": 2}, "$set": {"at": 2}, "$addToSet": {"tags": {"$each": ["a", "b"]}}, "$setOnInsert": {"created": 2}},
+        {"$max": {"best": 3}},
+        {"$max": {"best": 1}},
+    ]) == {
+        "$inc": {"n": 3},
+        "$set": {"at": 2},
+        "$addToSet": {"tags": {"$each": ["a", "b"]}},
+        "$setOnInsert": {"created": 1},
+        "$max": {"best": 3},
+    }
+    with pytest.raises(ValueError):
+        coalesce([{"$push": {"list": 1}}])
+
+
+def test_updates_to_one_document_become_one_write(database):
+    buffer = CoalescingBuffer(lambda: database, enabled=True)
+
+    async def scenario():
+        for _ in range(10):
+            buffer.add("counters", {"_id": "a"}, {"$inc": {"n": 1}}, upsert=True)
+        buffer.add("counters", {"_id": "b"}, {"$inc": {"n": 5}}, upsert=True)
+        assert buffer.pending_inc("counters", {"_id": "a"}, "n") == 10
+        written = await buffer.flush()
+        return written, await count(database, "counters", _id="a")(), await count(database, "counters", _id="b")()
+
+    assert asyncio.run(scenario()) == (2, 10, 5)
+    assert (buffer.flushed_documents, buffer.flushed_updates, len(buffer)) == (2, 11, 0)
+
+
+def test_flush_with_match_writes_only_the_matching_updates_and_inserts(database):
+    buffer = CoalescingBuffer(lambda: database, enabled=True)
+
+    async def scenario():
+        for user in ("ana", "bia"):
+            buffer.add("counters", {"_id": user}, {"$inc": {"n": 1}}, upsert=True)
+            buffer.append("points", {"user": user})
+        await buffer.flush(lambda collection, document: document.get("_id", document.get("user")) == "ana")
+        first = (await count(database, "counters", _id="ana")(), await count(database, "counters", _id="bia")(),
+                 await database.database.points.count_documents({}), buffer.snapshot())
+        await buffer.flush()
+        return first, await database.database.points.count_documents({})
+
+    (ana, bia, points, snapshot), all_points = asyncio.run(scenario())
+    assert (ana, bia, points) == (1, None, 1)
+    assert snapshot["pending_documents"] == 1 and snapshot["pending_inserts"] == 1
+    # no empty insert list is left behind to fail the next full flush
+    assert all_points == 2 and len(buffer) == 0
+
+
+def test_failed_flush_is_retried_under_newer_updates(database):
+    buffer = CoalescingBuffer(lambda: database, enabled=True)
+
+    async def scenario():
+        buffer.add("counters", {"_id": "a"}, {"$inc": {"n": 2}, "$set": {"last": "old"}}, upsert=True)
+        buffer.append("points", {"user": "a"})
+        database.fail = AutoReconnect("connection lost")
+        assert await buffer.flush() == 0
+        database.fail = None
+        assert buffer.pending_inc("counters", {"_id": "a"}, "n") == 2
+        buffer.add("counters", {"_id": "a"}, {"$inc": {"n": 1}, "$set": {"last": "new"}}, upsert=True)
+        await buffer.flush()
+        document = await database.database.counters.find_one({"_id": "a"})
+        return document, await database.database.points.count_documents({})
+
+    document, points = asyncio.run(scenario())
+    assert (document["n"], document["last"], points) == (3, "new", 1)
+    assert buffer.flushed_updates == 2
+
+
+def test_rejected_writes_are_dropped_and_not_counted(database):
+    buffer = CoalescingBuffer(lambda: database, enabled=True)
+
+    async def scenario():
+        buffer.add("counters", {"_id": "a"}, {"$inc": {"n": 1}})
+        buffer.add("counters", {"_id": "b"}, {"$inc": {"n": 1}})
+        buffer.add("counters", {"_id": "b"}, {"$inc": {"n": 1}})
+        database.fail = BulkWriteError({"writeErrors": [{"index": 0, "code": 14, "errmsg": "type mismatch"}]})
+        return await buffer.flush()
+
+    assert asyncio.run(scenario()) == 1
+    assert buffer.flushed_updates == 2 and len(buffer) == 0
+
+
+def test_read_during_a_flush_counts_an_increment_once(database):
+    buffer = CoalescingBuffer(lambda: database, enabled=True)
+
+    async def scenario():
+        applied = asyncio.Event()
+        release = asyncio.Event()
+
+        async def stall():
+            # The write is applied but the flush hasn't finished yet
+            applied.set()
+            await release.wait()
+        database.after_write = stall
+
+        buffer.add("counters", {"_id": "a"}, {"$inc": {"n": 3}}, upsert=True)
+        flush = asyncio.create_task(buffer.flush())
+        await applied.wait()
+        read = asyncio.create_task(buffer.read_with_pending(
+            count(database, "counters", _id="a"), "counters", {"_id": "a"}, "n"
+        ))
+        await asyncio.sleep(0.05)
+        release.set()
+        await flush
+        return await read
+
+    stored, pending = asyncio.run(scenario())
+    assert stored + pending == 3
+
+
+def test_practice_taps_under_write_behind_are_counted_once(server, client, run):
+    server.WRITE_BEHIND.enabled = True
+    tap = {"session_type": "scales", "lesson_id": 1}
+    counts = [client.post("/api/progress/practice", json=tap).json()["practice_count"] for _ in range(5)]
+    assert counts == [1, 2, 3, 4, 5]
+    assert len(server.WRITE_BEHIND) > 0
+    run(server.WRITE_BEHIND.flush)
+    assert client.post("/api/progress/practice", json=tap).json()["practice_count"] == 6
+    # reads flush the user's buffered updates first
+    assert client.get("/api/progress").json()["scales"]["practice_counts"]["1"] == 6